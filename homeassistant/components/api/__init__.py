@@ -204,7 +204,12 @@ class APIStatesView(HomeAssistantView):
             for state in request.app["hass"].states.async_all()
             if entity_perm(state.entity_id, "read")
         ]
-        return self.json(states)
+        # The states are serialized once and shared by all requests
+        try:
+            msg = "[{}]".format(",".join(state.as_json() for state in states))
+        except (ValueError, TypeError):
+            return self.json(states)
+        return self.serialized_json(msg.encode("UTF-8"))
 
 
 class APIEntityStateView(HomeAssistantView):
@@ -222,7 +227,10 @@ class APIEntityStateView(HomeAssistantView):
 
         state = request.app["hass"].states.get(entity_id)
         if state:
-            return self.json(state)
+            try:
+                return self.serialized_json(state.as_json().encode("UTF-8"))
+            except (ValueError, TypeError):
+                return self.json(state)
         return self.json_message("Entity not found.", HTTP_NOT_FOUND)
 
     async def post(self, request, entity_id):
@@ -1,8 +1,8 @@
 """Allows the creation of a sensor that filters state property."""
+import asyncio
 from collections import Counter, deque
 from copy import copy
 from datetime import timedelta
-from functools import partial
 import logging
 from numbers import Number
 import statistics
@@ -10,7 +10,7 @@ from typing import Optional
 
 import voluptuous as vol
 
-from homeassistant.components import history
+from homeassistant.components.history.loader import async_get_loader
 from homeassistant.components.sensor import PLATFORM_SCHEMA
 from homeassistant.const import (
     ATTR_ENTITY_ID,
@@ -21,7 +21,7 @@ from homeassistant.const import (
     STATE_UNAVAILABLE,
     STATE_UNKNOWN,
 )
-from homeassistant.core import callback
+from homeassistant.core import State, callback
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.entity import Entity
 from homeassistant.helpers.event import async_track_state_change
@@ -233,35 +233,33 @@ class SensorFilter(Entity):
                     largest_window_time = filt.window_size
 
             # Retrieve the largest window_size of each type
+            loader = async_get_loader(self.hass)
             if largest_window_items > 0:
-                filter_history = await self.hass.async_add_job(
-                    partial(
-                        history.get_last_state_changes,
-                        self.hass,
-                        largest_window_items,
-                        entity_id=self._entity,
-                    )
+                history_list.extend(
+                    await loader.async_last_states(self._entity, largest_window_items)
                 )
-                if self._entity in filter_history:
-                    history_list.extend(filter_history[self._entity])
             if largest_window_time > timedelta(seconds=0):
                 start = dt_util.utcnow() - largest_window_time
-                filter_history = await self.hass.async_add_job(
-                    partial(
-                        history.state_changes_during_period,
-                        self.hass,
-                        start,
-                        entity_id=self._entity,
-                    )
+                start_state, window_states = await asyncio.gather(
+                    loader.async_state_at(self._entity, start),
+                    loader.async_states_during_period(self._entity, start),
                 )
-                if self._entity in filter_history:
-                    history_list.extend(
-                        [
-                            state
-                            for state in filter_history[self._entity]
-                            if state not in history_list
-                        ]
+                if start_state is not None:
+                    # The state at the start of the window
+                    window_states.insert(
+                        0,
+                        State(
+                            start_state.entity_id,
+                            start_state.state,
+                            start_state.attributes,
+                            start,
+                            start,
+                            start_state.context,
+                        ),
                     )
+                history_list.extend(
+                    [state for state in window_states if state not in history_list]
+                )
 
             # Sort the window states
             history_list = sorted(history_list, key=lambda s: s.last_updated)
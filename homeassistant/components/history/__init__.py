@@ -1,16 +1,29 @@
 """Provide pre-made queries on top of the recorder component."""
+import asyncio
 from collections import defaultdict
 from datetime import timedelta
 from itertools import groupby
+import json
 import logging
+import threading
 import time
 
+from aiohttp import web
 from sqlalchemy import and_, func
 import voluptuous as vol
 
 from homeassistant.components import recorder
 from homeassistant.components.http import HomeAssistantView
-from homeassistant.components.recorder.models import States
+from homeassistant.components.recorder.models import (
+    StateAttributes,
+    States,
+    process_timestamp,
+)
+from homeassistant.components.recorder.statistics import (
+    PERIOD_5MINUTE,
+    PERIOD_HOURLY,
+    get_statistics,
+)
 from homeassistant.components.recorder.util import execute, session_scope
 from homeassistant.const import (
     ATTR_HIDDEN,
@@ -18,22 +31,42 @@ from homeassistant.const import (
     CONF_ENTITIES,
     CONF_EXCLUDE,
     CONF_INCLUDE,
+    CONTENT_TYPE_JSON,
     HTTP_BAD_REQUEST,
+    STATE_UNAVAILABLE,
+    STATE_UNKNOWN,
 )
+from homeassistant.core import State, split_entity_id
 import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.json import JSONEncoder
 import homeassistant.util.dt as dt_util
 
+from .cache import RecentStatesCache
+
 # mypy: allow-untyped-defs, no-check-untyped-defs
 
 _LOGGER = logging.getLogger(__name__)
 
 DOMAIN = "history"
 CONF_ORDER = "use_include_order"
+CONF_CACHE = "cache"
+CONF_MAX_STATES = "max_states"
+
+DATA_CACHE = "history_cache"
 
 CONFIG_SCHEMA = vol.Schema(
     {
         DOMAIN: recorder.FILTER_SCHEMA.extend(
-            {vol.Optional(CONF_ORDER, default=False): cv.boolean}
+            {
+                vol.Optional(CONF_ORDER, default=False): cv.boolean,
+                vol.Optional(CONF_CACHE): vol.Schema(
+                    {
+                        vol.Optional(CONF_MAX_STATES, default=100): vol.All(
+                            vol.Coerce(int), vol.Range(min=1)
+                        )
+                    }
+                ),
+            }
         )
     },
     extra=vol.ALLOW_EXTRA,
@@ -42,6 +75,18 @@ CONFIG_SCHEMA = vol.Schema(
 SIGNIFICANT_DOMAINS = ("thermostat", "climate", "water_heater")
 IGNORE_DOMAINS = ("zone", "scene")
 
+# Longer periods are served from the statistics of numeric entities
+STATISTICS_MIN_PERIOD = timedelta(days=2)
+# Longer periods use hourly instead of 5-minute statistics
+STATISTICS_5MINUTE_MAX_PERIOD = timedelta(days=7)
+# States of numeric entities shown in between their statistics
+STATISTICS_GAP_STATES = (STATE_UNAVAILABLE, STATE_UNKNOWN)
+
+# Number of rows read from the database at once by a streamed response
+STREAM_BATCH_SIZE = 1000
+# Number of encoded batches buffered for a streamed response
+STREAM_QUEUE_SIZE = 4
+
 
 def get_significant_states(
     hass,
@@ -50,6 +95,7 @@ def get_significant_states(
     entity_ids=None,
     filters=None,
     include_start_time_state=True,
+    exclude_entity_ids=None,
 ):
     """
     Return states changes during UTC period start_time - end_time.
@@ -61,20 +107,14 @@ def get_significant_states(
     timer_start = time.perf_counter()
 
     with session_scope(hass=hass) as session:
-        query = session.query(States).filter(
-            (
-                States.domain.in_(SIGNIFICANT_DOMAINS)
-                | (States.last_changed == States.last_updated)
-            )
-            & (States.last_updated > start_time)
+        query = _significant_states_query(
+            session.query(States),
+            start_time,
+            end_time,
+            entity_ids,
+            filters,
+            exclude_entity_ids,
         )
-
-        if filters:
-            query = filters.apply(query, entity_ids)
-
-        if end_time is not None:
-            query = query.filter(States.last_updated < end_time)
-
         query = query.order_by(States.last_updated)
 
         states = (
@@ -92,6 +132,373 @@ def get_significant_states(
     )
 
 
+def get_minimal_significant_states(
+    hass,
+    start_time,
+    end_time=None,
+    entity_ids=None,
+    filters=None,
+    include_start_time_state=True,
+    include_attributes=False,
+):
+    """Return the JSON of the states changes during UTC period start_time - end_time.
+
+    Only the entity_id, state, last_changed and optionally the attributes of
+    the states are read from the database and encoded as JSON without
+    creating State objects. Returns a dictionary of the lists of the JSON
+    encoded states per entity.
+    """
+    timer_start = time.perf_counter()
+    encode = JSONEncoder().encode
+    result = defaultdict(list)
+    # Set all entity IDs to empty lists in result set to maintain the order
+    if entity_ids is not None:
+        for ent_id in entity_ids:
+            result[ent_id] = []
+
+    if include_start_time_state:
+        for state in get_states(hass, start_time, entity_ids, filters=filters):
+            result[state.entity_id].append(
+                _initial_minimal_state_json(
+                    state, start_time, include_attributes, encode
+                )
+            )
+
+    with session_scope(hass=hass) as session:
+        query = _significant_states_query(
+            _minimal_states_query(session, include_attributes),
+            start_time,
+            end_time,
+            entity_ids,
+            filters,
+        )
+        query = query.order_by(States.last_updated)
+
+        for ent_id, state_json in _minimal_states_json(hass, query, include_attributes):
+            result[ent_id].append(state_json)
+
+    if _LOGGER.isEnabledFor(logging.DEBUG):
+        elapsed = time.perf_counter() - timer_start
+        _LOGGER.debug("get_minimal_significant_states took %fs", elapsed)
+
+    return {key: val for key, val in result.items() if val}
+
+
+def stream_significant_states(
+    hass,
+    start_time,
+    end_time=None,
+    entity_ids=None,
+    filters=None,
+    include_start_time_state=True,
+    minimal_response=False,
+    include_attributes=False,
+):
+    """Yield the JSON of the states changes during UTC period start_time - end_time.
+
+    The JSON is the list of state lists per entity returned by the history
+    API, but the states are read from the database in batches and encoded as
+    they are read, so the memory used does not depend on the length of the
+    period. The lists are ordered by entity_id.
+    """
+    encode = JSONEncoder().encode
+    initial_states = {}
+    if include_start_time_state:
+        for state in get_states(hass, start_time, entity_ids, filters=filters):
+            if minimal_response:
+                initial_states[state.entity_id] = _initial_minimal_state_json(
+                    state, start_time, include_attributes, encode
+                )
+            else:
+                state.last_changed = start_time
+                state.last_updated = start_time
+                initial_states[state.entity_id] = encode(state)
+
+    parts = ["["]
+    entity_id = None
+
+    with session_scope(hass=hass) as session:
+        if minimal_response:
+            query = _minimal_states_query(session, include_attributes)
+        else:
+            query = session.query(States)
+        query = _significant_states_query(
+            query, start_time, end_time, entity_ids, filters
+        )
+        query = query.order_by(States.entity_id, States.last_updated).yield_per(
+            STREAM_BATCH_SIZE
+        )
+
+        if minimal_response:
+            rows = _minimal_states_json(hass, query, include_attributes)
+        else:
+            rows = _states_json(query, encode)
+
+        for row_entity_id, state_json in rows:
+            if row_entity_id == entity_id:
+                parts.append(",")
+            else:
+                parts.append("[" if entity_id is None else "],[")
+                entity_id = row_entity_id
+                initial_state_json = initial_states.pop(entity_id, None)
+                if initial_state_json is not None:
+                    parts.append(initial_state_json)
+                    parts.append(",")
+
+            parts.append(state_json)
+            if len(parts) >= STREAM_BATCH_SIZE:
+                yield "".join(parts)
+                parts = []
+
+    separator = ","
+    if entity_id is None:
+        separator = ""
+    else:
+        parts.append("]")
+
+    # Entities that did not change during the period
+    for initial_state_json in initial_states.values():
+        parts.append(f"{separator}[{initial_state_json}]")
+        separator = ","
+
+    parts.append("]")
+    yield "".join(parts)
+
+
+def _states_json(query, encode):
+    """Yield the entity_id and JSON of the significant states of a query."""
+    for row in query:
+        state = row.to_native()
+        if (
+            state is None
+            or not _is_significant(state)
+            or state.attributes.get(ATTR_HIDDEN, False)
+        ):
+            continue
+
+        yield state.entity_id, encode(state)
+
+
+def _minimal_states_query(session, include_attributes):
+    """Return a query of the columns of the minimal states."""
+    if not include_attributes:
+        return session.query(States.entity_id, States.state, States.last_changed)
+
+    return session.query(
+        States.entity_id,
+        States.state,
+        States.last_changed,
+        StateAttributes.shared_attrs,
+        States.attributes,
+    ).outerjoin(StateAttributes, States.attributes_id == StateAttributes.attributes_id)
+
+
+def _minimal_states_json(hass, query, include_attributes):
+    """Yield the entity_id and minimal JSON of the significant states of a query.
+
+    The attributes are not decoded, so entities are hidden or insignificant
+    based on their current state.
+    """
+    skip_entity_ids = {}
+
+    for row in query:
+        entity_id = row.entity_id
+        skip = skip_entity_ids.get(entity_id)
+        if skip is None:
+            state = hass.states.get(entity_id)
+            skip = skip_entity_ids[entity_id] = state is not None and (
+                not _is_significant(state) or state.attributes.get(ATTR_HIDDEN, False)
+            )
+        if skip:
+            continue
+
+        attributes = None
+        if include_attributes:
+            # Rows recorded before the attributes were shared store them
+            attributes = row.shared_attrs or row.attributes or "{}"
+
+        yield entity_id, _minimal_state_json(
+            entity_id, row.state, process_timestamp(row.last_changed), attributes
+        )
+
+
+def _initial_minimal_state_json(state, start_time, include_attributes, encode):
+    """Return the minimal JSON of a state at the start of a period."""
+    attributes = None
+    if include_attributes:
+        attributes = encode(dict(state.attributes))
+
+    return _minimal_state_json(state.entity_id, state.state, start_time, attributes)
+
+
+def _minimal_state_json(entity_id, state, last_changed, attributes=None):
+    """Return the JSON of the entity_id, state, last_changed and attributes.
+
+    The attributes are passed as JSON and left out if None.
+    """
+    parts = [
+        '{"entity_id":',
+        json.dumps(entity_id),
+        ',"state":',
+        json.dumps(state),
+        ',"last_changed":"',
+        last_changed.isoformat(),
+        '"',
+    ]
+    if attributes is not None:
+        parts.append(',"attributes":')
+        parts.append(attributes)
+    parts.append("}")
+    return "".join(parts)
+
+
+def get_significant_states_with_statistics(
+    hass,
+    start_time,
+    end_time,
+    entity_ids=None,
+    filters=None,
+    include_start_time_state=True,
+):
+    """Return states changes during UTC period start_time - end_time.
+
+    Numeric entities are represented by the mean of their 5-minute or hourly
+    statistics since their first statistics, and by their significant states
+    before. Their unavailable and unknown states are kept. All other entities
+    are represented by their significant states.
+    """
+    period = PERIOD_HOURLY
+    keep_days = hass.data[recorder.DATA_INSTANCE].keep_days
+    if end_time - start_time <= STATISTICS_5MINUTE_MAX_PERIOD and (
+        start_time >= dt_util.utcnow() - timedelta(days=keep_days)
+    ):
+        period = PERIOD_5MINUTE
+
+    statistics = get_statistics(hass, period, start_time, end_time, entity_ids, filters)
+
+    raw_entity_ids = entity_ids
+    if entity_ids is not None:
+        raw_entity_ids = [
+            entity_id for entity_id in entity_ids if entity_id not in statistics
+        ]
+
+    result = {}
+    if raw_entity_ids is None or raw_entity_ids:
+        result = get_significant_states(
+            hass,
+            start_time,
+            end_time,
+            raw_entity_ids,
+            filters,
+            include_start_time_state,
+            list(statistics) if raw_entity_ids is None else None,
+        )
+
+    if statistics:
+        statistics_since = {
+            entity_id: rows[0]["start"] for entity_id, rows in statistics.items()
+        }
+        raw_states = _get_states_around_statistics(
+            hass, start_time, end_time, statistics_since, include_start_time_state
+        )
+    else:
+        raw_states = {}
+
+    for entity_id, rows in statistics.items():
+        entity_states = raw_states.get(entity_id, [])
+        # Use the attributes of the state at the start time if it was fetched
+        state = entity_states[0] if entity_states else hass.states.get(entity_id)
+        attributes = state.attributes if state is not None else {}
+        if attributes.get(ATTR_HIDDEN, False):
+            continue
+
+        since = statistics_since[entity_id]
+        entity_states = [
+            state
+            for state in entity_states
+            if state.last_updated < since or state.state in STATISTICS_GAP_STATES
+        ]
+        entity_states.extend(
+            State(
+                entity_id,
+                row["mean"],
+                attributes,
+                max(row["start"], start_time),
+                max(row["start"], start_time),
+                temp_invalid_id_bypass=True,
+            )
+            for row in rows
+        )
+        entity_states.sort(key=lambda state: state.last_updated)
+        result[entity_id] = entity_states
+
+    if entity_ids is not None:
+        return {
+            entity_id: result[entity_id]
+            for entity_id in entity_ids
+            if entity_id in result
+        }
+
+    return result
+
+
+def _get_states_around_statistics(
+    hass, start_time, end_time, statistics_since, include_start_time_state
+):
+    """Return the significant states of the entities with statistics.
+
+    Only the states before the first statistics of the entities and the
+    unavailable and unknown states are read from the database.
+    """
+    entity_ids = list(statistics_since)
+
+    with session_scope(hass=hass) as session:
+        query = _significant_states_query(
+            session.query(States), start_time, end_time, entity_ids, None
+        )
+        query = query.filter(
+            States.entity_id.in_(entity_ids)
+            & (
+                (States.last_updated < max(statistics_since.values()))
+                | States.state.in_(STATISTICS_GAP_STATES)
+            )
+        )
+
+        states = (
+            state
+            for state in execute(query.order_by(States.last_updated))
+            if _is_significant(state)
+        )
+
+    return states_to_json(
+        hass, states, start_time, entity_ids, None, include_start_time_state
+    )
+
+
+def _significant_states_query(
+    query, start_time, end_time, entity_ids, filters, exclude_entity_ids=None
+):
+    """Filter a states query to the significant states during a period."""
+    query = query.filter(
+        (
+            States.domain.in_(SIGNIFICANT_DOMAINS)
+            | (States.last_changed == States.last_updated)
+        )
+        & (States.last_updated > start_time)
+    )
+
+    if filters:
+        query = filters.apply(query, entity_ids)
+
+    if end_time is not None:
+        query = query.filter(States.last_updated < end_time)
+
+    if exclude_entity_ids:
+        query = query.filter(~States.entity_id.in_(exclude_entity_ids))
+
+    return query
+
+
 def state_changes_during_period(hass, start_time, end_time=None, entity_id=None):
     """Return states changes during UTC period start_time - end_time."""
 
@@ -274,6 +681,13 @@ async def async_setup(hass, config):
         filters.included_domains = include.get(CONF_DOMAINS, [])
     use_include_order = conf.get(CONF_ORDER)
 
+    cache_conf = conf.get(CONF_CACHE)
+    if cache_conf is not None:
+        cache = hass.data[DATA_CACHE] = RecentStatesCache(
+            hass, cache_conf[CONF_MAX_STATES]
+        )
+        cache.async_start()
+
     hass.http.register_view(HistoryPeriodView(filters, use_include_order))
     hass.components.frontend.async_register_built_in_panel(
         "history", "history", "hass:poll-box"
@@ -330,35 +744,145 @@ class HistoryPeriodView(HomeAssistantView):
 
         hass = request.app["hass"]
 
-        result = await hass.async_add_job(
-            get_significant_states,
-            hass,
-            start_time,
-            end_time,
-            entity_ids,
-            self.filters,
-            include_start_time_state,
-        )
-        result = list(result.values())
-        if _LOGGER.isEnabledFor(logging.DEBUG):
-            elapsed = time.perf_counter() - timer_start
-            _LOGGER.debug("Extracted %d states in %fs", sum(map(len, result)), elapsed)
+        minimal_response = "minimal_response" in request.query
+        include_attributes = "include_attributes" in request.query
+
+        if "stream" in request.query:
+            return await self._async_stream(
+                request,
+                stream_significant_states(
+                    hass,
+                    start_time,
+                    end_time,
+                    entity_ids,
+                    self.filters,
+                    include_start_time_state,
+                    minimal_response,
+                    include_attributes,
+                ),
+            )
+
+        if minimal_response:
+            result = await hass.async_add_executor_job(
+                get_minimal_significant_states,
+                hass,
+                start_time,
+                end_time,
+                entity_ids,
+                self.filters,
+                include_start_time_state,
+                include_attributes,
+            )
+        else:
+            result = None
+            cache = hass.data.get(DATA_CACHE)
+            if end_time - start_time > STATISTICS_MIN_PERIOD:
+                get_states_job = get_significant_states_with_statistics
+            else:
+                get_states_job = get_significant_states
+                if cache is not None:
+                    result = cache.async_get_significant_states(
+                        start_time,
+                        end_time,
+                        entity_ids,
+                        self.filters,
+                        include_start_time_state,
+                    )
+                    _LOGGER.debug(
+                        "History cache %s, hit rate %.2f",
+                        "miss" if result is None else "hit",
+                        cache.hit_rate,
+                    )
+
+            if result is None:
+                result = await hass.async_add_job(
+                    get_states_job,
+                    hass,
+                    start_time,
+                    end_time,
+                    entity_ids,
+                    self.filters,
+                    include_start_time_state,
+                )
 
         # Optionally reorder the result to respect the ordering given
         # by any entities explicitly included in the configuration.
+        sorted_result = []
         if self.use_include_order:
-            sorted_result = []
             for order_entity in self.filters.included_entities:
-                for state_list in result:
-                    if state_list[0].entity_id == order_entity:
-                        sorted_result.append(state_list)
-                        result.remove(state_list)
-                        break
-            sorted_result.extend(result)
-            result = sorted_result
+                if order_entity in result:
+                    sorted_result.append(result.pop(order_entity))
+        sorted_result.extend(result.values())
+        result = sorted_result
+
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            elapsed = time.perf_counter() - timer_start
+            _LOGGER.debug("Extracted %d states in %fs", sum(map(len, result)), elapsed)
+
+        if minimal_response:
+            return await hass.async_add_executor_job(_minimal_response, result)
 
         return await hass.async_add_job(self.json, result)
 
+    async def _async_stream(self, request, chunks):
+        """Write the chunks of a generator to a streamed response.
+
+        The generator runs in the executor and at most STREAM_QUEUE_SIZE
+        chunks are waiting to be written at any time.
+        """
+        hass = request.app["hass"]
+        to_write = asyncio.Queue(STREAM_QUEUE_SIZE)
+        done = object()
+        aborted = threading.Event()
+
+        def produce():
+            """Queue the chunks until done or the response is aborted."""
+            try:
+                for chunk in chunks:
+                    if aborted.is_set():
+                        return
+                    asyncio.run_coroutine_threadsafe(
+                        to_write.put(chunk), hass.loop
+                    ).result()
+            finally:
+                chunks.close()
+                if not aborted.is_set():
+                    asyncio.run_coroutine_threadsafe(
+                        to_write.put(done), hass.loop
+                    ).result()
+
+        response = web.StreamResponse()
+        response.content_type = CONTENT_TYPE_JSON
+        response.enable_chunked_encoding()
+        await response.prepare(request)
+
+        producer = hass.async_add_executor_job(produce)
+        completed = False
+        try:
+            while True:
+                chunk = await to_write.get()
+                if chunk is done:
+                    break
+                await response.write(chunk.encode("UTF-8"))
+            completed = True
+        finally:
+            if not completed:
+                aborted.set()
+                # Unblock the producer waiting for room in the queue
+                while not to_write.empty():
+                    to_write.get_nowait()
+
+        await producer
+        return response
+
+
+def _minimal_response(result):
+    """Return a response with the lists of JSON encoded states."""
+    return web.Response(
+        text="[{}]".format(",".join(f"[{','.join(states)}]" for states in result)),
+        content_type=CONTENT_TYPE_JSON,
+    )
+
 
 class Filters:
     """Container for the configured include and exclude filters."""
@@ -370,9 +894,11 @@ class Filters:
         self.included_entities = []
         self.included_domains = []
 
-    def apply(self, query, entity_ids=None):
+    def apply(self, query, entity_ids=None, model=States):
         """Apply the include/exclude filter on domains and entities on query.
 
+        The filter is applied to the domain and entity_id columns of model.
+
         Following rules apply:
         * only the include section is configured - just query the specified
           entities or domains.
@@ -384,45 +910,67 @@ class Filters:
 
         # specific entities requested - do not in/exclude anything
         if entity_ids is not None:
-            return query.filter(States.entity_id.in_(entity_ids))
-        query = query.filter(~States.domain.in_(IGNORE_DOMAINS))
+            return query.filter(model.entity_id.in_(entity_ids))
+        query = query.filter(~model.domain.in_(IGNORE_DOMAINS))
 
         filter_query = None
         # filter if only excluded domain is configured
         if self.excluded_domains and not self.included_domains:
-            filter_query = ~States.domain.in_(self.excluded_domains)
+            filter_query = ~model.domain.in_(self.excluded_domains)
             if self.included_entities:
-                filter_query &= States.entity_id.in_(self.included_entities)
+                filter_query &= model.entity_id.in_(self.included_entities)
         # filter if only included domain is configured
         elif not self.excluded_domains and self.included_domains:
-            filter_query = States.domain.in_(self.included_domains)
+            filter_query = model.domain.in_(self.included_domains)
             if self.included_entities:
-                filter_query |= States.entity_id.in_(self.included_entities)
+                filter_query |= model.entity_id.in_(self.included_entities)
         # filter if included and excluded domain is configured
         elif self.excluded_domains and self.included_domains:
-            filter_query = ~States.domain.in_(self.excluded_domains)
+            filter_query = ~model.domain.in_(self.excluded_domains)
             if self.included_entities:
-                filter_query &= States.domain.in_(
+                filter_query &= model.domain.in_(
                     self.included_domains
-                ) | States.entity_id.in_(self.included_entities)
+                ) | model.entity_id.in_(self.included_entities)
             else:
-                filter_query &= States.domain.in_(
+                filter_query &= model.domain.in_(
                     self.included_domains
-                ) & ~States.domain.in_(self.excluded_domains)
+                ) & ~model.domain.in_(self.excluded_domains)
         # no domain filter just included entities
         elif (
             not self.excluded_domains
             and not self.included_domains
             and self.included_entities
         ):
-            filter_query = States.entity_id.in_(self.included_entities)
+            filter_query = model.entity_id.in_(self.included_entities)
         if filter_query is not None:
             query = query.filter(filter_query)
         # finally apply excluded entities filter if configured
         if self.excluded_entities:
-            query = query.filter(~States.entity_id.in_(self.excluded_entities))
+            query = query.filter(~model.entity_id.in_(self.excluded_entities))
         return query
 
+    def matches(self, entity_id):
+        """Return if an entity passes the filters, like apply does in SQL."""
+        domain = split_entity_id(entity_id)[0]
+        if domain in IGNORE_DOMAINS or entity_id in self.excluded_entities:
+            return False
+
+        if self.excluded_domains and not self.included_domains:
+            return domain not in self.excluded_domains and (
+                not self.included_entities or entity_id in self.included_entities
+            )
+        if not self.excluded_domains and self.included_domains:
+            return (
+                domain in self.included_domains or entity_id in self.included_entities
+            )
+        if self.excluded_domains and self.included_domains:
+            return domain not in self.excluded_domains and (
+                domain in self.included_domains or entity_id in self.included_entities
+            )
+        if self.included_entities:
+            return entity_id in self.included_entities
+        return True
+
 
 def _is_significant(state):
     """Test if state is significant for history charts.
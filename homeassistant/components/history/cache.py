@@ -0,0 +1,173 @@
+"""In-memory cache of the recent state changes of each entity."""
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, Optional
+
+from homeassistant.components.recorder.const import DATA_INSTANCE
+from homeassistant.const import ATTR_HIDDEN, EVENT_STATE_CHANGED
+from homeassistant.core import State, callback
+import homeassistant.util.dt as dt_util
+
+
+class RecentStatesCache:
+    """Keep the last max_states states of each entity in memory.
+
+    Only the states since the cache was started are kept. History queries
+    are answered from the cache if it holds every state of the queried
+    entities during the queried period.
+    """
+
+    def __init__(self, hass, max_states: int) -> None:
+        """Initialize the cache."""
+        self.hass = hass
+        self.max_states = max_states
+        self.hits = 0
+        self.misses = 0
+        self._states: Dict[str, Deque[State]] = {}
+        # The cache holds all states of an entity since this time
+        self._covered_since: Dict[str, datetime] = {}
+        self._started: Optional[datetime] = None
+        self._all_covered_since: Optional[datetime] = None
+        self._unsub = None
+
+    @property
+    def hit_rate(self) -> Optional[float]:
+        """Return the share of the queries answered from the cache."""
+        queries = self.hits + self.misses
+        if not queries:
+            return None
+        return self.hits / queries
+
+    @callback
+    def async_start(self) -> None:
+        """Start caching the state changes."""
+        self._started = self._all_covered_since = dt_util.utcnow()
+        for state in self.hass.states.async_all():
+            if self._is_recorded(state.entity_id):
+                self._async_add(state)
+        self._unsub = self.hass.bus.async_listen(
+            EVENT_STATE_CHANGED, self._async_state_changed
+        )
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop caching the state changes."""
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+
+    @callback
+    def _async_state_changed(self, event) -> None:
+        """Add the new state of an entity to the cache."""
+        new_state = event.data.get("new_state")
+        if new_state is None:
+            return
+
+        if self._is_recorded(new_state.entity_id):
+            self._async_add(new_state)
+
+    def _is_recorded(self, entity_id: str) -> bool:
+        """Return if the recorder records the states of an entity.
+
+        Only the states that are recorded are in the history.
+        """
+        instance = self.hass.data.get(DATA_INSTANCE)
+        return instance is None or instance.entity_filter(entity_id)
+
+    @callback
+    def _async_add(self, state: State) -> None:
+        """Add a state to the cache."""
+        states = self._states.get(state.entity_id)
+        if states is None:
+            states = self._states[state.entity_id] = deque()
+
+        if len(states) == self.max_states:
+            states.popleft()
+            # The state before the oldest cached one is gone
+            covered_since = (states[0] if states else state).last_updated
+            self._covered_since[state.entity_id] = covered_since
+            if covered_since > self._all_covered_since:
+                self._all_covered_since = covered_since
+
+        states.append(state)
+
+    @callback
+    def async_get_significant_states(
+        self,
+        start_time,
+        end_time=None,
+        entity_ids=None,
+        filters=None,
+        include_start_time_state=True,
+    ):
+        """Return the significant states like history.get_significant_states.
+
+        Returns None if the cache does not hold all states of the period.
+        """
+        # pylint: disable=import-outside-toplevel
+        from . import IGNORE_DOMAINS, SIGNIFICANT_DOMAINS, _is_significant
+
+        if not self._covers(start_time, entity_ids):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        if entity_ids is None:
+            entity_ids = [
+                entity_id
+                for entity_id in self._states
+                if filters is None or filters.matches(entity_id)
+            ]
+
+        result = {}
+        for entity_id in entity_ids:
+            states = []
+            for state in self._states.get(entity_id, ()):
+                if end_time is not None and state.last_updated >= end_time:
+                    break
+
+                if state.last_updated <= start_time:
+                    # The last one is the state at the start time
+                    if include_start_time_state and state.domain not in IGNORE_DOMAINS:
+                        states = [state]
+                    continue
+
+                if (
+                    state.domain in SIGNIFICANT_DOMAINS
+                    or state.last_changed == state.last_updated
+                ) and _is_significant(state):
+                    states.append(state)
+
+            if states and states[0].last_updated <= start_time:
+                initial_state = states[0]
+                states[0] = State(
+                    initial_state.entity_id,
+                    initial_state.state,
+                    initial_state.attributes,
+                    start_time,
+                    start_time,
+                    initial_state.context,
+                )
+
+            states = [
+                state
+                for state in states
+                if not state.attributes.get(ATTR_HIDDEN, False)
+            ]
+            if states:
+                result[entity_id] = states
+
+        return result
+
+    def _covers(self, start_time, entity_ids) -> bool:
+        """Return if the cache holds all states since start_time."""
+        if self._started is None:
+            return False
+
+        if entity_ids is None:
+            return start_time >= self._all_covered_since
+
+        return all(
+            start_time >= self._covered_since.get(entity_id, self._started)
+            for entity_id in entity_ids
+        )
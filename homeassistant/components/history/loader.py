@@ -0,0 +1,336 @@
+"""Load the recent history of many entities with a few queries."""
+import asyncio
+from collections import defaultdict
+import logging
+from typing import Dict, List, NamedTuple, Optional
+
+from sqlalchemy import select, union_all
+
+from homeassistant.components.recorder.const import DATA_INSTANCE
+from homeassistant.components.recorder.models import (
+    RecorderRuns,
+    States,
+    process_timestamp,
+)
+from homeassistant.components.recorder.util import execute, session_scope
+from homeassistant.const import ATTR_HIDDEN
+from homeassistant.core import State, callback
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_LOADER = "history_loader"
+
+# Seconds to wait for more requests before querying the database
+BATCH_DELAY = 0.1
+# Maximum number of requests answered by a single query
+MAX_REQUESTS_PER_QUERY = 100
+
+_PERIOD = "period"
+_LAST = "last"
+_POINT = "point"
+
+
+class _Request(NamedTuple):
+    """A request for the history of a single entity."""
+
+    kind: str
+    entity_id: str
+    future: asyncio.Future
+    start_time: Optional[object] = None
+    end_time: Optional[object] = None
+    number_of_states: Optional[int] = None
+    changes_only: bool = True
+
+
+@callback
+def async_get_loader(hass) -> "HistoryLoader":
+    """Return the history loader of this Home Assistant instance."""
+    loader = hass.data.get(DATA_LOADER)
+    if loader is None:
+        loader = hass.data[DATA_LOADER] = HistoryLoader(hass)
+    return loader
+
+
+class HistoryLoader:
+    """Collect history requests of integrations and answer them in batches.
+
+    Integrations that load the history of their source entity at startup
+    each request it at about the same time. The requests made within
+    BATCH_DELAY are answered with one query per kind of request instead of
+    one query per entity.
+    """
+
+    def __init__(self, hass) -> None:
+        """Initialize the loader."""
+        self.hass = hass
+        self.queries = 0
+        self._requests: List[_Request] = []
+        self._flush_handle = None
+
+    async def async_states_during_period(
+        self, entity_id: str, start_time, end_time=None, changes_only: bool = True
+    ) -> List[State]:
+        """Return the states of an entity during UTC period start_time - end_time.
+
+        Attribute-only updates are left out if changes_only is set.
+        """
+        return await self._async_request(
+            _PERIOD,
+            entity_id,
+            start_time=start_time,
+            end_time=end_time,
+            changes_only=changes_only,
+        )
+
+    async def async_last_states(
+        self,
+        entity_id: str,
+        number_of_states: int,
+        start_time=None,
+        changes_only: bool = True,
+    ) -> List[State]:
+        """Return the last number_of_states states of an entity.
+
+        Only the states since start_time are returned if it is given.
+        """
+        return await self._async_request(
+            _LAST,
+            entity_id,
+            start_time=start_time,
+            number_of_states=number_of_states,
+            changes_only=changes_only,
+        )
+
+    async def async_state_at(
+        self, entity_id: str, utc_point_in_time
+    ) -> Optional[State]:
+        """Return the state of an entity at a point in time."""
+        return await self._async_request(
+            _POINT, entity_id, start_time=utc_point_in_time
+        )
+
+    async def _async_request(self, kind, entity_id, **kwargs):
+        """Queue a request and wait for its result."""
+        future = self.hass.loop.create_future()
+        self._requests.append(_Request(kind, entity_id.lower(), future, **kwargs))
+        if self._flush_handle is None:
+            self._flush_handle = self.hass.loop.call_later(
+                BATCH_DELAY, self._async_flush
+            )
+        return await future
+
+    @callback
+    def _async_flush(self) -> None:
+        """Answer the queued requests."""
+        self._flush_handle = None
+        requests = self._requests
+        self._requests = []
+        self.hass.async_create_task(self._async_load(requests))
+
+    async def _async_load(self, requests: List[_Request]) -> None:
+        """Load the history of the requests and return it to the requesters."""
+        try:
+            results = await self.hass.async_add_executor_job(self._load, requests)
+        except Exception as err:  # pylint: disable=broad-except
+            for request in requests:
+                if not request.future.done():
+                    request.future.set_exception(err)
+            return
+
+        for request, result in zip(requests, results):
+            if not request.future.done():
+                request.future.set_result(result)
+
+    def _load(self, requests: List[_Request]) -> list:
+        """Return the results of the requests, grouping them by kind."""
+        results: Dict[int, object] = {}
+        by_kind = defaultdict(list)
+        for index, request in enumerate(requests):
+            by_kind[request.kind].append((index, request))
+
+        for kind, load in (
+            (_PERIOD, self._load_periods),
+            (_LAST, self._load_last_states),
+            (_POINT, self._load_points),
+        ):
+            kind_requests = by_kind[kind]
+            for chunk_start in range(0, len(kind_requests), MAX_REQUESTS_PER_QUERY):
+                chunk = kind_requests[
+                    chunk_start : chunk_start + MAX_REQUESTS_PER_QUERY
+                ]
+                for (index, _), result in zip(chunk, load([req for _, req in chunk])):
+                    results[index] = result
+
+        _LOGGER.debug("Answered %d history requests", len(requests))
+        return [results[index] for index in range(len(requests))]
+
+    def _load_periods(self, requests: List[_Request]) -> List[List[State]]:
+        """Return the states during the periods with a single query."""
+        start_time = min(request.start_time for request in requests)
+        end_times = [request.end_time for request in requests]
+
+        with session_scope(hass=self.hass) as session:
+            query = session.query(States).filter(
+                States.entity_id.in_({request.entity_id for request in requests})
+                & (States.last_updated > start_time)
+            )
+            if None not in end_times:
+                query = query.filter(States.last_updated < max(end_times))
+            if all(request.changes_only for request in requests):
+                query = query.filter(States.last_changed == States.last_updated)
+
+            self.queries += 1
+            states = execute(query.order_by(States.entity_id, States.last_updated))
+
+        by_entity = defaultdict(list)
+        for state in states:
+            by_entity[state.entity_id].append(state)
+
+        return [
+            [
+                state
+                for state in by_entity[request.entity_id]
+                if state.last_updated > request.start_time
+                and (request.end_time is None or state.last_updated < request.end_time)
+                and (
+                    not request.changes_only or state.last_changed == state.last_updated
+                )
+            ]
+            for request in requests
+        ]
+
+    def _load_last_states(self, requests: List[_Request]) -> List[List[State]]:
+        """Return the last states of the entities with a single query."""
+        subqueries = []
+        for request in requests:
+            subquery = select([States.state_id]).where(
+                States.entity_id == request.entity_id
+            )
+            if request.start_time is not None:
+                subquery = subquery.where(States.last_updated >= request.start_time)
+            if request.changes_only:
+                subquery = subquery.where(States.last_changed == States.last_updated)
+            # The derived tables keep the limits valid in a compound select
+            subquery = (
+                subquery.order_by(States.last_updated.desc())
+                .limit(request.number_of_states)
+                .alias()
+            )
+            subqueries.append(select([subquery.c.state_id]))
+
+        with session_scope(hass=self.hass) as session:
+            query = session.query(States).filter(
+                States.state_id.in_(union_all(*subqueries))
+            )
+            self.queries += 1
+            states = execute(query.order_by(States.last_updated))
+
+        by_entity = defaultdict(list)
+        for state in states:
+            by_entity[state.entity_id].append(state)
+
+        results = []
+        for request in requests:
+            entity_states = by_entity[request.entity_id]
+            if request.start_time is not None:
+                entity_states = [
+                    state
+                    for state in entity_states
+                    if state.last_updated >= request.start_time
+                ]
+            if request.changes_only:
+                entity_states = [
+                    state
+                    for state in entity_states
+                    if state.last_changed == state.last_updated
+                ]
+            results.append(entity_states[-request.number_of_states :])
+        return results
+
+    def _load_points(self, requests: List[_Request]) -> List[Optional[State]]:
+        """Return the states at the points in time with a single query."""
+        with session_scope(hass=self.hass) as session:
+            run_starts = self._run_starts(
+                session, {request.start_time for request in requests}
+            )
+
+            subqueries = []
+            for request in requests:
+                run_start = run_starts.get(request.start_time)
+                # History did not run at the point in time
+                if run_start is None:
+                    continue
+
+                subquery = (
+                    select([States.state_id])
+                    .where(
+                        (States.entity_id == request.entity_id)
+                        & (States.last_updated >= run_start)
+                        & (States.last_updated < request.start_time)
+                    )
+                    .order_by(States.last_updated.desc())
+                    .limit(1)
+                    .alias()
+                )
+                subqueries.append(select([subquery.c.state_id]))
+
+            states = []
+            if subqueries:
+                query = session.query(States).filter(
+                    States.state_id.in_(union_all(*subqueries))
+                )
+                self.queries += 1
+                states = execute(query.order_by(States.last_updated))
+
+        by_entity = defaultdict(list)
+        for state in states:
+            by_entity[state.entity_id].append(state)
+
+        results = []
+        for request in requests:
+            run_start = run_starts.get(request.start_time)
+            state_at = None
+            if run_start is None:
+                results.append(state_at)
+                continue
+
+            for state in by_entity[request.entity_id]:
+                if state.last_updated >= request.start_time:
+                    break
+                if state.last_updated >= run_start:
+                    state_at = state
+
+            if state_at is not None and state_at.attributes.get(ATTR_HIDDEN, False):
+                state_at = None
+            results.append(state_at)
+        return results
+
+    def _run_starts(self, session, points) -> Dict[object, object]:
+        """Return the start of the recorder run of each point in time."""
+        instance = self.hass.data[DATA_INSTANCE]
+        run_starts = {
+            point: instance.run_info.start
+            for point in points
+            if point > instance.recording_start
+        }
+        earlier_points = points.difference(run_starts)
+        if not earlier_points:
+            return run_starts
+
+        self.queries += 1
+        runs = (
+            session.query(RecorderRuns)
+            .filter(
+                (RecorderRuns.start < max(earlier_points))
+                & (RecorderRuns.end > min(earlier_points))
+            )
+            .all()
+        )
+        for point in earlier_points:
+            for run in runs:
+                start = process_timestamp(run.start)
+                if start < point < process_timestamp(run.end):
+                    run_starts[point] = start
+                    break
+
+        return run_starts
@@ -1,11 +1,13 @@
 """Component to make instant statistics about your history."""
+import asyncio
+from collections import deque
 import datetime
 import logging
 import math
 
 import voluptuous as vol
 
-from homeassistant.components import history
+from homeassistant.components.history.loader import async_get_loader
 from homeassistant.components.sensor import PLATFORM_SCHEMA
 from homeassistant.const import (
     CONF_ENTITY_ID,
@@ -109,6 +111,7 @@ class HistoryStatsSensor(Entity):
         self._unit_of_measurement = UNITS[sensor_type]
 
         self._period = (datetime.datetime.now(), datetime.datetime.now())
+        self._window = None
         self.value = None
         self.count = None
 
@@ -121,8 +124,22 @@ class HistoryStatsSensor(Entity):
                 """Force the component to refresh."""
                 self.async_schedule_update_ha_state(True)
 
+            @callback
+            def state_changed(entity_id, old_state, new_state):
+                """Add the state change to the window and refresh."""
+                if (
+                    self._window is not None
+                    and new_state is not None
+                    and new_state.last_changed == new_state.last_updated
+                ):
+                    self._window.add(
+                        new_state.last_changed.timestamp(),
+                        new_state.state == self._entity_state,
+                    )
+                force_refresh()
+
             force_refresh()
-            async_track_state_change(self.hass, self._entity_id, force_refresh)
+            async_track_state_change(self.hass, self._entity_id, state_changed)
 
         # Delay first refresh to keep startup fast
         hass.bus.listen_once(EVENT_HOMEASSISTANT_START, start_refresh)
@@ -203,38 +220,15 @@ class HistoryStatsSensor(Entity):
             # Don't compute anything as the value cannot have changed
             return
 
-        # Get history between start and end
-        history_list = history.state_changes_during_period(
-            self.hass, start, end, str(self._entity_id)
-        )
+        # Only go to the database if the period is not covered by the window
+        totals = asyncio.run_coroutine_threadsafe(
+            self._async_get_totals(start, end), self.hass.loop
+        ).result()
 
-        if self._entity_id not in history_list.keys():
+        if totals is None:
             return
 
-        # Get the first state
-        last_state = history.get_state(self.hass, start, self._entity_id)
-        last_state = last_state is not None and last_state == self._entity_state
-        last_time = start_timestamp
-        elapsed = 0
-        count = 0
-
-        # Make calculations
-        for item in history_list.get(self._entity_id):
-            current_state = item.state == self._entity_state
-            current_time = item.last_changed.timestamp()
-
-            if last_state:
-                elapsed += current_time - last_time
-            if current_state and not last_state:
-                count += 1
-
-            last_state = current_state
-            last_time = current_time
-
-        # Count time elapsed between last history state and end of measure
-        if last_state:
-            measure_end = min(end_timestamp, now_timestamp)
-            elapsed += measure_end - last_time
+        elapsed, count = totals
 
         # Save value in hours
         self.value = elapsed / 3600
@@ -242,6 +236,51 @@ class HistoryStatsSensor(Entity):
         # Save counter
         self.count = count
 
+    async def _async_get_totals(self, start, end):
+        """Return the time on and the count of the period."""
+        window = self._window
+        start_timestamp = start.timestamp()
+        # The end of the period is never in the future
+        measure_end = end.timestamp()
+
+        if (
+            window is None
+            or start_timestamp < window.start
+            or window.last_time > measure_end
+        ):
+            window = await self._async_load_window(start, end)
+        elif start_timestamp > window.start:
+            window.trim(start_timestamp)
+
+        if not window.has_data:
+            return None
+
+        return window.totals(measure_end)
+
+    async def _async_load_window(self, start, end):
+        """Load the changes of the tracked state during the period."""
+        loader = async_get_loader(self.hass)
+        history_list, start_state = await asyncio.gather(
+            loader.async_states_during_period(self._entity_id, start, end),
+            loader.async_state_at(self._entity_id, start),
+        )
+
+        window = self._window = HistoryStatsWindow(
+            start.timestamp(),
+            None if start_state is None else start_state.state == self._entity_state,
+        )
+        for item in history_list:
+            window.add(item.last_changed.timestamp(), item.state == self._entity_state)
+
+        # The recorder may not have committed the latest change yet
+        state = self.hass.states.get(self._entity_id)
+        if state is not None and state.last_changed <= end:
+            window.add(
+                state.last_changed.timestamp(), state.state == self._entity_state
+            )
+
+        return window
+
     def update_period(self):
         """Parse the templates and store a datetime tuple in _period."""
         start = None
@@ -301,6 +340,75 @@ class HistoryStatsSensor(Entity):
         self._period = start, end
 
 
+class HistoryStatsWindow:
+    """Running totals of the tracked state since the start of the period.
+
+    The changes since the start are kept so the start can be moved forward
+    without loading the history again.
+    """
+
+    def __init__(self, start, start_on):
+        """Initialize the window with the state at its start.
+
+        start_on is None if the state at the start is not known.
+        """
+        self.start = start
+        self.last_time = start
+        self.has_data = start_on is not None
+        self._start_on = bool(start_on)
+        self._last_on = self._start_on
+        self._changes = deque()
+        self._elapsed = 0
+        # Being on at the start counts as a period of being on
+        self._count = int(self._start_on)
+
+    def add(self, time, is_on):
+        """Add a change of the state, ignoring changes already added."""
+        if time <= self.last_time and self._changes:
+            return
+
+        time = max(time, self.start)
+        if self._last_on:
+            self._elapsed += time - self.last_time
+        if is_on and not self._last_on:
+            self._count += 1
+
+        self._changes.append((time, is_on))
+        self.last_time = time
+        self._last_on = is_on
+        self.has_data = True
+
+    def trim(self, start):
+        """Move the start of the window forward to start."""
+        self._count -= self._start_on
+        prev_time, prev_on = self.start, self._start_on
+
+        while self._changes and self._changes[0][0] <= start:
+            time, is_on = self._changes.popleft()
+            if prev_on:
+                self._elapsed -= time - prev_time
+            if is_on and not prev_on:
+                self._count -= 1
+            prev_time, prev_on = time, is_on
+
+        if self._changes:
+            if prev_on:
+                self._elapsed -= start - prev_time
+        else:
+            self.last_time = start
+
+        self.start = start
+        self._start_on = prev_on
+        self._count += prev_on
+
+    def totals(self, end):
+        """Return the time on in seconds and the count until end."""
+        elapsed = self._elapsed
+        if self._last_on:
+            elapsed += end - self.last_time
+        return elapsed, self._count
+
+
 class HistoryStatsHelper:
     """Static methods to make the HistoryStatsSensor code lighter."""
 
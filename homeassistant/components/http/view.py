@@ -53,6 +53,11 @@ class HomeAssistantView:
         except (ValueError, TypeError) as err:
             _LOGGER.error("Unable to serialize to JSON: %s\n%s", err, result)
             raise HTTPInternalServerError
+        return HomeAssistantView.serialized_json(msg, status_code, headers)
+
+    @staticmethod
+    def serialized_json(msg, status_code=200, headers=None):
+        """Return a response of a result serialized to JSON bytes."""
         response = web.Response(
             body=msg,
             content_type=CONTENT_TYPE_JSON,
@@ -2,12 +2,12 @@
 from datetime import timedelta
 from itertools import groupby
 import logging
-import time
 
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy import func
+from sqlalchemy.orm import contains_eager
 import voluptuous as vol
 
-from homeassistant.components import sun
+from homeassistant.components import sun, websocket_api
 from homeassistant.components.alexa.smart_home import EVENT_ALEXA_SMART_HOME
 from homeassistant.components.homekit.const import (
     ATTR_DISPLAY_NAME,
@@ -16,12 +16,9 @@ from homeassistant.components.homekit.const import (
     EVENT_HOMEKIT_CHANGED,
 )
 from homeassistant.components.http import HomeAssistantView
-from homeassistant.components.recorder.models import Events, States
-from homeassistant.components.recorder.util import (
-    QUERY_RETRY_WAIT,
-    RETRIES,
-    session_scope,
-)
+from homeassistant.components.recorder.const import DATA_INSTANCE
+from homeassistant.components.recorder.models import Events, StateAttributes, States
+from homeassistant.components.recorder.util import session_scope
 from homeassistant.const import (
     ATTR_DOMAIN,
     ATTR_ENTITY_ID,
@@ -41,9 +38,16 @@ from homeassistant.const import (
     STATE_OFF,
     STATE_ON,
 )
-from homeassistant.core import DOMAIN as HA_DOMAIN, State, callback, split_entity_id
+from homeassistant.core import (
+    DOMAIN as HA_DOMAIN,
+    Event,
+    State,
+    callback,
+    split_entity_id,
+)
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.entityfilter import generate_filter
+from homeassistant.helpers.event import async_track_point_in_utc_time
 from homeassistant.loader import bind_hass
 import homeassistant.util.dt as dt_util
 
@@ -59,6 +63,9 @@ DOMAIN = "logbook"
 
 GROUP_BY_MINUTES = 15
 
+# Seconds to wait for the recorder to commit the events before a backlog
+BACKLOG_COMMIT_TIMEOUT = 10
+
 CONFIG_SCHEMA = vol.Schema(
     {
         DOMAIN: vol.Schema(
@@ -139,7 +146,9 @@ async def async_setup(hass, config):
         message = message.async_render()
         async_log_entry(hass, name, message, domain, entity_id)
 
-    hass.http.register_view(LogbookView(config.get(DOMAIN, {})))
+    hass.data[DOMAIN] = config.get(DOMAIN, {})
+    hass.http.register_view(LogbookView(hass.data[DOMAIN]))
+    websocket_api.async_register_command(hass, websocket_subscribe)
 
     hass.components.frontend.async_register_built_in_panel(
         "logbook", "logbook", "hass:format-list-bulleted-type"
@@ -181,13 +190,191 @@ class LogbookView(HomeAssistantView):
         end_day = start_day + timedelta(days=period)
         hass = request.app["hass"]
 
-        def json_events():
-            """Fetch events and generate JSON."""
+        limit = request.query.get("limit")
+        if limit is None:
+
+            def json_events():
+                """Fetch events and generate JSON."""
+                return self.json(
+                    _get_events(hass, self.config, start_day, end_day, entity_id)
+                )
+
+            return await hass.async_add_job(json_events)
+
+        try:
+            limit = int(limit)
+        except ValueError:
+            return self.json_message("Invalid limit", HTTP_BAD_REQUEST)
+
+        if limit < 1:
+            return self.json_message("Invalid limit", HTTP_BAD_REQUEST)
+
+        after = request.query.get("cursor")
+        if after is not None:
+            after = _parse_cursor(after)
+            if after is None:
+                return self.json_message("Invalid cursor", HTTP_BAD_REQUEST)
+
+        def json_events_page():
+            """Fetch a page of events and generate JSON."""
+            entries, next_cursor = _get_events_page(
+                hass, self.config, start_day, end_day, entity_id, after, limit
+            )
             return self.json(
-                _get_events(hass, self.config, start_day, end_day, entity_id)
+                {
+                    "entries": entries,
+                    "cursor": next_cursor and _format_cursor(next_cursor),
+                }
+            )
+
+        return await hass.async_add_job(json_events_page)
+
+
+@websocket_api.async_response
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "logbook/subscribe",
+        vol.Optional("start_time"): str,
+        vol.Optional("entity_id"): cv.entity_id,
+    }
+)
+async def websocket_subscribe(hass, connection, msg):
+    """Send the logbook entries since start_time and then the new entries.
+
+    The new events are converted to entries as they are fired, so only the
+    entries of the backlog are read from the database. The new continuous
+    sensor states are held till the end of their GROUP_BY_MINUTES group, so
+    only the last one is sent like humanify does.
+    """
+    start_time = msg.get("start_time")
+    if start_time is None:
+        start_time = dt_util.start_of_local_day()
+    else:
+        start_time = dt_util.parse_datetime(start_time)
+        if start_time is None:
+            connection.send_error(msg["id"], "invalid_start_time", "Invalid start_time")
+            return
+    start_time = dt_util.as_utc(start_time)
+
+    config = hass.data[DOMAIN]
+    entity_id = msg.get("entity_id")
+    entities_filter = _generate_filter_from_config(config)
+    # Events fired while the backlog is read
+    pending = []
+    # Last continuous sensor event of each entity in the current group
+    held_events = {}
+    unsub_send_held = None
+
+    @callback
+    def send_entries(events):
+        """Send the entries of new events to the websocket."""
+        entries = list(humanify(hass, events))
+        if entries:
+            connection.send_message(
+                websocket_api.event_message(msg["id"], {"entries": entries})
+            )
+
+    @callback
+    def send_held_events(now=None):
+        """Send the entries of the held sensor events."""
+        nonlocal unsub_send_held
+        if unsub_send_held is not None and now is None:
+            unsub_send_held()
+        unsub_send_held = None
+        events = sorted(held_events.values(), key=lambda event: event.time_fired)
+        held_events.clear()
+        send_entries(events)
+
+    @callback
+    def forward_event(event):
+        """Forward the entries of a new event to the websocket."""
+        nonlocal unsub_send_held
+        event = _live_event(event, entities_filter, entity_id)
+        if event is None:
+            return
+
+        if pending is not None:
+            pending.append(event)
+            return
+
+        if not _is_continuous(event):
+            send_entries([event])
+            return
+
+        if held_events and _event_group(event) != _event_group(
+            next(iter(held_events.values()))
+        ):
+            send_held_events()
+
+        held_events[event.data["entity_id"]] = event
+        if unsub_send_held is None:
+            unsub_send_held = async_track_point_in_utc_time(
+                hass, send_held_events, _group_end(event.time_fired)
             )
 
-        return await hass.async_add_job(json_events)
+    unsubs = [
+        hass.bus.async_listen(event_type, forward_event)
+        for event_type in ALL_EVENT_TYPES
+    ]
+
+    @callback
+    def unsubscribe():
+        """Stop forwarding events."""
+        for unsub in unsubs:
+            unsub()
+        if unsub_send_held is not None:
+            unsub_send_held()
+
+    connection.subscriptions[msg["id"]] = unsubscribe
+    subscribed_at = dt_util.utcnow()
+
+    def get_backlog():
+        """Get the entries of the events fired before the subscription."""
+        instance = hass.data[DATA_INSTANCE]
+        if not instance.commit_queued_events(BACKLOG_COMMIT_TIMEOUT):
+            _LOGGER.warning(
+                "Events not committed within %d seconds, the backlog may miss them",
+                BACKLOG_COMMIT_TIMEOUT,
+            )
+        return _get_events(hass, config, start_time, subscribed_at, entity_id)
+
+    entries = await hass.async_add_executor_job(get_backlog)
+    entries.extend(humanify(hass, pending))
+    pending = None
+
+    connection.send_result(msg["id"])
+    connection.send_message(
+        websocket_api.event_message(msg["id"], {"entries": entries})
+    )
+
+
+def _live_event(event, entities_filter, entity_id=None):
+    """Return an event fired on the bus like it is read from the database.
+
+    Returns None if the event is not shown in the logbook.
+    """
+    if event.event_type == EVENT_STATE_CHANGED:
+        if entity_id is not None and event.data.get("entity_id") != entity_id:
+            return None
+
+        old_state = event.data.get("old_state")
+        new_state = event.data.get("new_state")
+        event = Event(
+            event.event_type,
+            {
+                "entity_id": event.data.get("entity_id"),
+                "old_state": old_state and old_state.as_dict(),
+                "new_state": new_state and new_state.as_dict(),
+            },
+            event.origin,
+            event.time_fired,
+            event.context,
+        )
+
+    if not _keep_event(event, entities_filter):
+        return None
+
+    return event
 
 
 def humanify(hass, events):
@@ -200,9 +387,7 @@ def humanify(hass, events):
     domain_prefixes = tuple(f"{dom}." for dom in CONTINUOUS_DOMAINS)
 
     # Group events in batches of GROUP_BY_MINUTES
-    for _, g_events in groupby(
-        events, lambda event: event.time_fired.minute // GROUP_BY_MINUTES
-    ):
+    for _, g_events in groupby(events, _event_group):
 
         events_batch = list(g_events)
 
@@ -379,33 +564,8 @@ def humanify(hass, events):
                 }
 
 
-def _get_related_entity_ids(session, entity_filter):
-    timer_start = time.perf_counter()
-
-    query = session.query(States).with_entities(States.entity_id).distinct()
-
-    for tryno in range(0, RETRIES):
-        try:
-            result = [row.entity_id for row in query if entity_filter(row.entity_id)]
-
-            if _LOGGER.isEnabledFor(logging.DEBUG):
-                elapsed = time.perf_counter() - timer_start
-                _LOGGER.debug(
-                    "fetching %d distinct domain/entity_id pairs took %fs",
-                    len(result),
-                    elapsed,
-                )
-
-            return result
-        except SQLAlchemyError as err:
-            _LOGGER.error("Error executing query: %s", err)
-
-            if tryno == RETRIES - 1:
-                raise
-            time.sleep(QUERY_RETRY_WAIT)
-
-
-def _generate_filter_from_config(config):
+def _filter_lists_from_config(config):
+    """Return the included and excluded domains and entities of the config."""
     excluded_entities = []
     excluded_domains = []
     included_entities = []
@@ -420,10 +580,103 @@ def _generate_filter_from_config(config):
         included_entities = include.get(CONF_ENTITIES, [])
         included_domains = include.get(CONF_DOMAINS, [])
 
-    return generate_filter(
-        included_domains, included_entities, excluded_domains, excluded_entities
+    return included_domains, included_entities, excluded_domains, excluded_entities
+
+
+def _generate_filter_from_config(config):
+    return generate_filter(*_filter_lists_from_config(config))
+
+
+def _entities_filter_clause(config):
+    """Return the SQL clause of the include/exclude filter on states.
+
+    Mirrors the entity filter generated from the config, returns None if
+    all entities pass.
+    """
+    (
+        included_domains,
+        included_entities,
+        excluded_domains,
+        excluded_entities,
+    ) = _filter_lists_from_config(config)
+
+    in_domains = States.domain.in_(included_domains)
+    in_entities = States.entity_id.in_(included_entities)
+    in_excluded_domains = States.domain.in_(excluded_domains)
+    in_excluded_entities = States.entity_id.in_(excluded_entities)
+    have_exclude = bool(excluded_entities or excluded_domains)
+    have_include = bool(included_entities or included_domains)
+
+    if not have_include and not have_exclude:
+        return None
+
+    if have_include and not have_exclude:
+        return in_entities | in_domains
+
+    if not have_include and have_exclude:
+        return ~in_excluded_entities & ~in_excluded_domains
+
+    if included_domains:
+        return (in_domains & ~in_excluded_entities) | (~in_domains & in_entities)
+
+    if excluded_domains:
+        return (in_excluded_domains & in_entities) | (
+            ~in_excluded_domains & ~in_excluded_entities
+        )
+
+    return in_entities
+
+
+def _events_query(session, config, start_day, end_day, entity_id=None, after=None):
+    """Return the query of the events of a period shown in the logbook.
+
+    The rows hold the event and its state, if it is a state change. The
+    state changes are filtered in SQL, the other events still have to
+    be filtered by _keep_event. Events after the cursor after, a tuple of
+    time fired and event id, are returned.
+    """
+    if entity_id is not None:
+        states_filter = States.entity_id == entity_id.lower()
+    else:
+        states_filter = _entities_filter_clause(config)
+
+    # Don't show continuous sensor value changes in the logbook
+    continuous_filter = ~(
+        States.domain.in_(CONTINUOUS_DOMAINS)
+        & func.coalesce(StateAttributes.shared_attrs, States.attributes, "").like(
+            '%"unit_of_measurement"%'
+        )
     )
 
+    state_changes_filter = (
+        States.last_updated == States.last_changed
+    ) & continuous_filter
+    if states_filter is not None:
+        state_changes_filter &= states_filter
+
+    # The new states of the state changes are read from the joined states
+    query = (
+        session.query(Events, States)
+        .order_by(Events.time_fired, Events.event_id)
+        .outerjoin(States, (Events.event_id == States.event_id))
+        .outerjoin(
+            StateAttributes, (States.attributes_id == StateAttributes.attributes_id)
+        )
+        .options(contains_eager(States.state_attributes))
+        .filter(Events.event_type.in_(ALL_EVENT_TYPES))
+        .filter((Events.time_fired > start_day) & (Events.time_fired < end_day))
+        .filter(state_changes_filter | (States.state_id.is_(None)))
+    )
+
+    if after is not None:
+        time_fired, event_id = after
+        query = query.filter(
+            (Events.time_fired > time_fired)
+            | ((Events.time_fired == time_fired) & (Events.event_id > event_id))
+        )
+
+    return query
+
 
 def _get_events(hass, config, start_day, end_day, entity_id=None):
     """Get events for a period of time."""
@@ -432,34 +685,89 @@ def _get_events(hass, config, start_day, end_day, entity_id=None):
     def yield_events(query):
         """Yield Events that are not filtered away."""
         for row in query.yield_per(500):
-            event = row.to_native()
+            event = row.Events.to_native(row.States)
             if _keep_event(event, entities_filter):
                 yield event
 
     with session_scope(hass=hass) as session:
-        if entity_id is not None:
-            entity_ids = [entity_id.lower()]
-        else:
-            entity_ids = _get_related_entity_ids(session, entities_filter)
-
-        query = (
-            session.query(Events)
-            .order_by(Events.time_fired)
-            .outerjoin(States, (Events.event_id == States.event_id))
-            .filter(Events.event_type.in_(ALL_EVENT_TYPES))
-            .filter((Events.time_fired > start_day) & (Events.time_fired < end_day))
-            .filter(
-                (
-                    (States.last_updated == States.last_changed)
-                    & States.entity_id.in_(entity_ids)
-                )
-                | (States.state_id.is_(None))
-            )
-        )
+        query = _events_query(session, config, start_day, end_day, entity_id)
 
         return list(humanify(hass, yield_events(query)))
 
 
+def _get_events_page(hass, config, start_day, end_day, entity_id, after, limit):
+    """Get a page of the events for a period of time.
+
+    The page holds at least limit events, unless it is the last page, and
+    ends where the events are no longer grouped by humanify. Returns the
+    entries and the cursor of the next page, None for the last page.
+    """
+    entities_filter = _generate_filter_from_config(config)
+    events = []
+    group = None
+    position = after
+    next_cursor = None
+
+    with session_scope(hass=hass) as session:
+        query = _events_query(session, config, start_day, end_day, entity_id, after)
+
+        for row in query.yield_per(500):
+            event = row.Events.to_native(row.States)
+            if _keep_event(event, entities_filter):
+                event_group = _event_group(event)
+                if len(events) >= limit and event_group != group:
+                    next_cursor = position
+                    break
+
+                events.append(event)
+                group = event_group
+
+            position = (event.time_fired, row.Events.event_id)
+
+    return list(humanify(hass, events)), next_cursor
+
+
+def _event_group(event):
+    """Return the group of an event, see humanify."""
+    return event.time_fired.minute // GROUP_BY_MINUTES
+
+
+def _group_end(time_fired):
+    """Return the end of the group of an event fired at time_fired."""
+    return time_fired.replace(
+        minute=time_fired.minute - time_fired.minute % GROUP_BY_MINUTES,
+        second=0,
+        microsecond=0,
+    ) + timedelta(minutes=GROUP_BY_MINUTES)
+
+
+def _is_continuous(event):
+    """Return if an event is a state change of a continuous sensor."""
+    return (
+        event.event_type == EVENT_STATE_CHANGED
+        and split_entity_id(event.data["entity_id"])[0] in CONTINUOUS_DOMAINS
+    )
+
+
+def _format_cursor(cursor):
+    """Return the string of a cursor."""
+    time_fired, event_id = cursor
+    # UTC without offset, so the cursor is safe to use in a query string
+    return "{},{}".format(
+        dt_util.as_utc(time_fired).strftime("%Y-%m-%dT%H:%M:%S.%fZ"), event_id
+    )
+
+
+def _parse_cursor(cursor):
+    """Return the cursor of a string, None if it is invalid."""
+    time_fired, _, event_id = cursor.rpartition(",")
+    time_fired = dt_util.parse_datetime(time_fired)
+    if time_fired is None or not event_id.isdigit():
+        return None
+
+    return dt_util.as_utc(time_fired), int(event_id)
+
+
 def _keep_event(event, entities_filter):
     domain, entity_id = None, None
 
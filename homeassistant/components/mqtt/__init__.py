@@ -11,7 +11,7 @@ import socket
 import ssl
 import sys
 import time
-from typing import Any, Callable, List, Optional, Union
+from typing import Any, Callable, Dict, List, Optional, Union
 
 import attr
 import requests.certs
@@ -58,6 +58,7 @@ from .const import (
 from .discovery import MQTT_DISCOVERY_UPDATED, clear_discovery_hash
 from .models import Message, MessageCallbackType, PublishPayloadType
 from .subscription import async_subscribe_topics, async_unsubscribe_topics
+from .topic_trie import TopicTrie
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -768,6 +769,7 @@ class MQTT:
         self.port = port
         self.keepalive = keepalive
         self.subscriptions: List[Subscription] = []
+        self._subscription_trie = TopicTrie()
         self.birth_message = birth_message
         self.connected = False
         self._mqttc: mqtt.Client = None
@@ -802,8 +804,11 @@ class MQTT:
         self._mqttc.on_message = self._mqtt_on_message
 
         if will_message is not None:
-            self._mqttc.will_set(  # pylint: disable=no-value-for-parameter
-                *attr.astuple(will_message)
+            self._mqttc.will_set(
+                will_message.topic,
+                will_message.payload,
+                will_message.qos,
+                will_message.retain,
             )
 
     async def async_publish(
@@ -863,6 +868,7 @@ class MQTT:
 
         subscription = Subscription(topic, msg_callback, qos, encoding)
         self.subscriptions.append(subscription)
+        self._subscription_trie.add(topic, subscription)
 
         await self._async_perform_subscription(topic, qos)
 
@@ -872,6 +878,7 @@ class MQTT:
             if subscription not in self.subscriptions:
                 raise HomeAssistantError("Can't remove subscription twice")
             self.subscriptions.remove(subscription)
+            self._subscription_trie.remove(topic, subscription)
 
             if any(other.topic == topic for other in self.subscriptions):
                 # Other subscriptions on topic remaining - don't unsubscribe.
@@ -934,8 +941,11 @@ class MQTT:
 
         if self.birth_message:
             self.hass.add_job(
-                self.async_publish(  # pylint: disable=no-value-for-parameter
-                    *attr.astuple(self.birth_message)
+                self.async_publish(
+                    self.birth_message.topic,
+                    self.birth_message.payload,
+                    self.birth_message.qos,
+                    self.birth_message.retain,
                 )
             )
 
@@ -952,27 +962,32 @@ class MQTT:
             msg.payload,
         )
 
-        for subscription in self.subscriptions:
-            if not _match_topic(subscription.topic, msg.topic):
-                continue
-
-            payload: SubscribePayloadType = msg.payload
-            if subscription.encoding is not None:
-                try:
-                    payload = msg.payload.decode(subscription.encoding)
-                except (AttributeError, UnicodeDecodeError):
-                    _LOGGER.warning(
-                        "Can't decode payload %s on %s with encoding %s (for %s)",
-                        msg.payload,
-                        msg.topic,
-                        subscription.encoding,
-                        subscription.callback,
-                    )
-                    continue
-
-            self.hass.async_run_job(
-                subscription.callback, Message(msg.topic, payload, msg.qos, msg.retain)
-            )
+        # Subscribers with the same encoding share the message, so its
+        # payload is decoded only once
+        messages: Dict[Optional[str], Message] = {}
+
+        for subscription in self._subscription_trie.match(msg.topic):
+            message = messages.get(subscription.encoding)
+            if message is None:
+                payload: SubscribePayloadType = msg.payload
+                if subscription.encoding is not None:
+                    try:
+                        payload = msg.payload.decode(subscription.encoding)
+                    except (AttributeError, UnicodeDecodeError):
+                        _LOGGER.warning(
+                            "Can't decode payload %s on %s with encoding %s (for %s)",
+                            msg.payload,
+                            msg.topic,
+                            subscription.encoding,
+                            subscription.callback,
+                        )
+                        continue
+
+                message = messages[subscription.encoding] = Message(
+                    msg.topic, payload, msg.qos, msg.retain
+                )
+
+            self.hass.async_run_job(subscription.callback, message)
 
     def _mqtt_on_disconnect(self, _mqttc, _userdata, result_code: int) -> None:
         """Disconnected callback."""
@@ -1015,20 +1030,6 @@ def _raise_on_error(result_code: int) -> None:
         )
 
 
-def _match_topic(subscription: str, topic: str) -> bool:
-    """Test if topic matches subscription."""
-    # pylint: disable=import-outside-toplevel
-    from paho.mqtt.matcher import MQTTMatcher
-
-    matcher = MQTTMatcher()
-    matcher[subscription] = True
-    try:
-        next(matcher.iter_match(topic))
-        return True
-    except StopIteration:
-        return False
-
-
 class MqttAttributes(Entity):
     """Mixin used for platforms that support JSON attributes."""
 
@@ -182,7 +182,8 @@ class MqttBinarySensor(
             value_template = self._config.get(CONF_VALUE_TEMPLATE)
             if value_template is not None:
                 payload = value_template.async_render_with_possible_json_value(
-                    payload, variables={"entity_id": self.entity_id}
+                    payload,
+                    variables={"entity_id": self.entity_id, **msg.template_variables},
                 )
             if payload == self._config[CONF_PAYLOAD_ON]:
                 self._state = True
@@ -351,19 +351,13 @@ class MqttClimate(
         self._hold = None
         self._aux = False
 
-        value_templates = {}
-        for key in TEMPLATE_KEYS:
-            value_templates[key] = lambda value: value
-        if CONF_VALUE_TEMPLATE in config:
-            value_template = config.get(CONF_VALUE_TEMPLATE)
+        value_template = config.get(CONF_VALUE_TEMPLATE)
+        if value_template is not None:
             value_template.hass = self.hass
-            value_templates = {
-                key: value_template.async_render_with_possible_json_value
-                for key in TEMPLATE_KEYS
-            }
+        value_templates = {key: value_template for key in TEMPLATE_KEYS}
         for key in TEMPLATE_KEYS & config.keys():
             tpl = config[key]
-            value_templates[key] = tpl.async_render_with_possible_json_value
+            value_templates[key] = tpl
             tpl.hass = self.hass
         self._value_templates = value_templates
 
@@ -382,7 +376,11 @@ class MqttClimate(
 
         def render_template(msg, template_name):
             template = self._value_templates[template_name]
-            return template(msg.payload)
+            if template is None:
+                return msg.payload
+            return template.async_render_with_possible_json_value(
+                msg.payload, variables=msg.template_variables
+            )
 
         @callback
         def handle_action_received(msg):
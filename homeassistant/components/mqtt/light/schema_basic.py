@@ -4,6 +4,7 @@ Support for MQTT lights.
 For more details about this platform, please refer to the documentation at
 https://home-assistant.io/components/light.mqtt/
 """
+from functools import partial
 import logging
 
 import voluptuous as vol
@@ -150,6 +151,13 @@ PLATFORM_SCHEMA_BASIC = (
 )
 
 
+def _render_message(tpl, msg):
+    """Render a value template with the payload of a message."""
+    return tpl.async_render_with_possible_json_value(
+        msg.payload, variables=msg.template_variables
+    )
+
+
 async def async_setup_entity_basic(
     config, async_add_entities, config_entry, discovery_hash=None
 ):
@@ -290,17 +298,17 @@ class MqttLight(
         templates = {}
         for key, tpl in list(self._templates.items()):
             if tpl is None:
-                templates[key] = lambda value: value
+                templates[key] = lambda msg: msg.payload
             else:
                 tpl.hass = self.hass
-                templates[key] = tpl.async_render_with_possible_json_value
+                templates[key] = partial(_render_message, tpl)
 
         last_state = await self.async_get_last_state()
 
         @callback
         def state_received(msg):
             """Handle new MQTT messages."""
-            payload = templates[CONF_STATE](msg.payload)
+            payload = templates[CONF_STATE](msg)
             if not payload:
                 _LOGGER.debug("Ignoring empty state message from '%s'", msg.topic)
                 return
@@ -323,7 +331,7 @@ class MqttLight(
         @callback
         def brightness_received(msg):
             """Handle new MQTT messages for the brightness."""
-            payload = templates[CONF_BRIGHTNESS](msg.payload)
+            payload = templates[CONF_BRIGHTNESS](msg)
             if not payload:
                 _LOGGER.debug("Ignoring empty brightness message from '%s'", msg.topic)
                 return
@@ -354,7 +362,7 @@ class MqttLight(
         @callback
         def rgb_received(msg):
             """Handle new MQTT messages for RGB."""
-            payload = templates[CONF_RGB](msg.payload)
+            payload = templates[CONF_RGB](msg)
             if not payload:
                 _LOGGER.debug("Ignoring empty rgb message from '%s'", msg.topic)
                 return
@@ -385,7 +393,7 @@ class MqttLight(
         @callback
         def color_temp_received(msg):
             """Handle new MQTT messages for color temperature."""
-            payload = templates[CONF_COLOR_TEMP](msg.payload)
+            payload = templates[CONF_COLOR_TEMP](msg)
             if not payload:
                 _LOGGER.debug("Ignoring empty color temp message from '%s'", msg.topic)
                 return
@@ -414,7 +422,7 @@ class MqttLight(
         @callback
         def effect_received(msg):
             """Handle new MQTT messages for effect."""
-            payload = templates[CONF_EFFECT](msg.payload)
+            payload = templates[CONF_EFFECT](msg)
             if not payload:
                 _LOGGER.debug("Ignoring empty effect message from '%s'", msg.topic)
                 return
@@ -443,7 +451,7 @@ class MqttLight(
         @callback
         def hs_received(msg):
             """Handle new MQTT messages for hs color."""
-            payload = templates[CONF_HS](msg.payload)
+            payload = templates[CONF_HS](msg)
             if not payload:
                 _LOGGER.debug("Ignoring empty hs message from '%s'", msg.topic)
                 return
@@ -474,7 +482,7 @@ class MqttLight(
         @callback
         def white_value_received(msg):
             """Handle new MQTT messages for white value."""
-            payload = templates[CONF_WHITE_VALUE](msg.payload)
+            payload = templates[CONF_WHITE_VALUE](msg)
             if not payload:
                 _LOGGER.debug("Ignoring empty white value message from '%s'", msg.topic)
                 return
@@ -505,7 +513,7 @@ class MqttLight(
         @callback
         def xy_received(msg):
             """Handle new MQTT messages for xy color."""
-            payload = templates[CONF_XY](msg.payload)
+            payload = templates[CONF_XY](msg)
             if not payload:
                 _LOGGER.debug("Ignoring empty xy-color message from '%s'", msg.topic)
                 return
@@ -1,19 +1,47 @@
 """Modesl used by multiple MQTT modules."""
-from typing import Callable, Union
+import json
+from typing import Any, Callable, Dict, Union
 
 import attr
+import jinja2
 
 PublishPayloadType = Union[str, bytes, int, float, None]
 
+_UNDECODED = object()
+
 
 @attr.s(slots=True, frozen=True)
 class Message:
-    """MQTT Message."""
+    """MQTT Message.
+
+    A message is shared by the subscribers of its topic that use the same
+    encoding, so the payload is decoded as JSON at most once.
+    """
 
     topic = attr.ib(type=str)
     payload = attr.ib(type=PublishPayloadType)
     qos = attr.ib(type=int)
     retain = attr.ib(type=bool)
+    _template_variables = attr.ib(
+        type=Dict[str, Any], default=_UNDECODED, init=False, eq=False, repr=False
+    )
+
+    @property
+    def template_variables(self) -> Dict[str, Any]:
+        """Return the value_json template variable of the payload.
+
+        value_json is undefined if the payload is not valid JSON, like when
+        it is left out of the template variables.
+        """
+        variables = self._template_variables
+        if variables is _UNDECODED:
+            try:
+                value_json = json.loads(self.payload)
+            except (ValueError, TypeError):
+                value_json = jinja2.Undefined(name="value_json")
+            variables = {"value_json": value_json}
+            object.__setattr__(self, "_template_variables", variables)
+        return variables
 
 
 MessageCallbackType = Callable[[Message], None]
@@ -184,7 +184,7 @@ class MqttSensor(
 
             if template is not None:
                 payload = template.async_render_with_possible_json_value(
-                    payload, self._state
+                    payload, self._state, variables=msg.template_variables
                 )
             self._state = payload
             self.async_write_ha_state()
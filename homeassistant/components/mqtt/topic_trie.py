@@ -0,0 +1,115 @@
+"""Trie to match MQTT topics against subscribed topic filters."""
+from itertools import count
+from operator import itemgetter
+from typing import Any, Dict, List, Tuple
+
+
+class _TopicNode:
+    """Node of the topic trie holding one topic level."""
+
+    __slots__ = ("children", "values")
+
+    def __init__(self) -> None:
+        """Initialize the node."""
+        self.children: Dict[str, "_TopicNode"] = {}
+        self.values: List[Tuple[int, Any]] = []
+
+
+class TopicTrie:
+    """Wildcard aware trie of MQTT topic filters.
+
+    Matching a topic takes time proportional to the depth of the topic instead
+    of the number of stored filters. Matches are returned in the order the
+    values were added, with the same semantics as paho's MQTTMatcher.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the trie."""
+        self._root = _TopicNode()
+        self._sequence = count()
+        self._size = 0
+
+    def __len__(self) -> int:
+        """Return the number of stored values."""
+        return self._size
+
+    def add(self, topic_filter: str, value: Any) -> None:
+        """Store a value for a topic filter."""
+        node = self._root
+        for level in topic_filter.split("/"):
+            child = node.children.get(level)
+            if child is None:
+                child = node.children[level] = _TopicNode()
+            node = child
+        node.values.append((next(self._sequence), value))
+        self._size += 1
+
+    def remove(self, topic_filter: str, value: Any) -> None:
+        """Remove a value stored for a topic filter.
+
+        Raises KeyError if the value is not stored for the filter.
+        """
+        path = []
+        node = self._root
+        for level in topic_filter.split("/"):
+            child = node.children.get(level)
+            if child is None:
+                raise KeyError(topic_filter)
+            path.append((node, level))
+            node = child
+
+        for idx, (_, stored) in enumerate(node.values):
+            if stored is value:
+                del node.values[idx]
+                break
+        else:
+            raise KeyError(topic_filter)
+
+        self._size -= 1
+
+        # Prune the branches that no longer hold any values
+        for parent, level in reversed(path):
+            child = parent.children[level]
+            if child.values or child.children:
+                break
+            del parent.children[level]
+
+    def match(self, topic: str) -> List[Any]:
+        """Return the values of all filters matching a topic."""
+        matches: List[Tuple[int, Any]] = []
+        levels = topic.split("/")
+        # Wildcards at the first level don't match topics starting with $
+        self._match(self._root, levels, 0, not topic.startswith("$"), matches)
+
+        if len(matches) > 1:
+            matches.sort(key=itemgetter(0))
+
+        return [value for _, value in matches]
+
+    def _match(
+        self,
+        node: _TopicNode,
+        levels: List[str],
+        idx: int,
+        normal: bool,
+        matches: List[Tuple[int, Any]],
+    ) -> None:
+        """Collect the values of the nodes matching the remaining levels."""
+        wildcards = normal or idx > 0
+
+        if idx == len(levels):
+            matches.extend(node.values)
+        else:
+            child = node.children.get(levels[idx])
+            if child is not None:
+                self._match(child, levels, idx + 1, normal, matches)
+
+            if wildcards:
+                child = node.children.get("+")
+                if child is not None:
+                    self._match(child, levels, idx + 1, normal, matches)
+
+        if wildcards:
+            child = node.children.get("#")
+            if child is not None:
+                matches.extend(child.values)
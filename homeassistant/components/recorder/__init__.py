@@ -1,6 +1,6 @@
 """Support for recording details."""
 import asyncio
-from collections import namedtuple
+from collections import OrderedDict, namedtuple
 import concurrent.futures
 from datetime import datetime, timedelta
 import logging
@@ -38,7 +38,8 @@ import homeassistant.util.dt as dt_util
 
 from . import migration, purge
 from .const import DATA_INSTANCE
-from .models import Base, Events, RecorderRuns, States
+from .models import Base, Events, RecorderRuns, StateAttributes, States
+from .statistics import StatisticsCompiler
 from .util import session_scope
 
 _LOGGER = logging.getLogger(__name__)
@@ -64,9 +65,14 @@ CONF_DB_URL = "db_url"
 CONF_PURGE_KEEP_DAYS = "purge_keep_days"
 CONF_PURGE_INTERVAL = "purge_interval"
 CONF_EVENT_TYPES = "event_types"
+CONF_COMMIT_INTERVAL = "commit_interval"
+CONF_COMMIT_MAX_EVENTS = "commit_max_events"
 
 CONNECT_RETRY_WAIT = 3
 
+# Number of serialized attributes to remember the ids of
+STATE_ATTRIBUTES_ID_CACHE_SIZE = 2048
+
 FILTER_SCHEMA = vol.Schema(
     {
         vol.Optional(CONF_EXCLUDE, default={}): vol.Schema(
@@ -96,6 +102,12 @@ CONFIG_SCHEMA = vol.Schema(
                     vol.Coerce(int), vol.Range(min=0)
                 ),
                 vol.Optional(CONF_DB_URL): cv.string,
+                vol.Optional(CONF_COMMIT_INTERVAL, default=1): vol.All(
+                    vol.Coerce(float), vol.Range(min=0)
+                ),
+                vol.Optional(CONF_COMMIT_MAX_EVENTS, default=1000): vol.All(
+                    vol.Coerce(int), vol.Range(min=1)
+                ),
             }
         )
     },
@@ -133,6 +145,8 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     conf = config[DOMAIN]
     keep_days = conf.get(CONF_PURGE_KEEP_DAYS)
     purge_interval = conf.get(CONF_PURGE_INTERVAL)
+    commit_interval = conf[CONF_COMMIT_INTERVAL]
+    commit_max_events = conf[CONF_COMMIT_MAX_EVENTS]
 
     db_url = conf.get(CONF_DB_URL, None)
     if not db_url:
@@ -144,6 +158,8 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
         hass=hass,
         keep_days=keep_days,
         purge_interval=purge_interval,
+        commit_interval=commit_interval,
+        commit_max_events=commit_max_events,
         uri=db_url,
         include=include,
         exclude=exclude,
@@ -165,6 +181,15 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
 PurgeTask = namedtuple("PurgeTask", ["keep_days", "repack"])
 
 
+class CommitTask:
+    """Marker that forces the pending event batch to be committed."""
+
+    def __init__(self):
+        """Initialize the task."""
+        # Set once the events queued before the task are committed
+        self.done = threading.Event()
+
+
 class Recorder(threading.Thread):
     """A threaded recorder class."""
 
@@ -173,6 +198,8 @@ class Recorder(threading.Thread):
         hass: HomeAssistant,
         keep_days: int,
         purge_interval: int,
+        commit_interval: float,
+        commit_max_events: int,
         uri: str,
         include: Dict,
         exclude: Dict,
@@ -183,6 +210,8 @@ class Recorder(threading.Thread):
         self.hass = hass
         self.keep_days = keep_days
         self.purge_interval = purge_interval
+        self.commit_interval = commit_interval
+        self.commit_max_events = commit_max_events
         self.queue: Any = queue.Queue()
         self.recording_start = dt_util.utcnow()
         self.db_url = uri
@@ -199,6 +228,33 @@ class Recorder(threading.Thread):
         self.exclude_t = exclude.get(CONF_EVENT_TYPES, [])
 
         self.get_session = None
+        self.statistics = StatisticsCompiler()
+
+        # Recently used ids of stored attributes and the attributes added by
+        # the pending commit, keyed by the serialized attributes
+        self._state_attributes_ids: OrderedDict = OrderedDict()
+        self._pending_state_attributes: Dict[str, StateAttributes] = {}
+
+        self.commit_count = 0
+        self.last_commit_events = 0
+        self.last_commit_duration: Optional[float] = None
+        self.max_commit_duration: Optional[float] = None
+
+    @property
+    def queue_depth(self) -> int:
+        """Return the number of events waiting in the queue."""
+        return self.queue.qsize()
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Return queue and commit metrics of the recorder."""
+        return {
+            "queue_depth": self.queue_depth,
+            "commit_count": self.commit_count,
+            "last_commit_events": self.last_commit_events,
+            "last_commit_duration": self.last_commit_duration,
+            "max_commit_duration": self.max_commit_duration,
+        }
 
     @callback
     def async_initialize(self):
@@ -310,16 +366,42 @@ class Recorder(threading.Thread):
 
             self.hass.helpers.event.track_point_in_time(async_purge, run)
 
+        pending = []
+        batch_started = None
+
         while True:
-            event = self.queue.get()
+            timeout = None
+            if pending:
+                timeout = max(
+                    0, batch_started + self.commit_interval - time.monotonic()
+                )
+
+            try:
+                event = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                self._commit_events(pending)
+                pending = []
+                continue
 
             if event is None:
+                self._commit_events(pending)
                 self._close_run()
                 self._close_connection()
                 self.queue.task_done()
+                self._drain_queue()
                 return
+            if isinstance(event, CommitTask):
+                self._commit_events(pending)
+                pending = []
+                event.done.set()
+                self.queue.task_done()
+                continue
             if isinstance(event, PurgeTask):
-                purge.purge_old_data(self, event.keep_days, event.repack)
+                self._commit_events(pending)
+                pending = []
+                if not purge.purge_old_data(self, event.keep_days, event.repack):
+                    # Continue purging after the events queued in the meantime
+                    self.queue.put(event)
                 self.queue.task_done()
                 continue
             if event.event_type == EVENT_TIME_CHANGED:
@@ -335,62 +417,200 @@ class Recorder(threading.Thread):
                     self.queue.task_done()
                     continue
 
-            tries = 1
-            updated = False
-            while not updated and tries <= 10:
-                if tries != 1:
-                    time.sleep(CONNECT_RETRY_WAIT)
-                try:
-                    with session_scope(session=self.get_session()) as session:
-                        try:
-                            dbevent = Events.from_event(event)
-                            session.add(dbevent)
-                            session.flush()
-                        except (TypeError, ValueError):
-                            _LOGGER.warning("Event is not JSON serializable: %s", event)
-
-                        if event.event_type == EVENT_STATE_CHANGED:
-                            try:
-                                dbstate = States.from_event(event)
-                                dbstate.event_id = dbevent.event_id
-                                session.add(dbstate)
-                            except (TypeError, ValueError):
-                                _LOGGER.warning(
-                                    "State is not JSON serializable: %s",
-                                    event.data.get("new_state"),
-                                )
-
-                    updated = True
-
-                except exc.OperationalError as err:
-                    _LOGGER.error(
-                        "Error in database connectivity: %s. "
-                        "(retrying in %s seconds)",
-                        err,
-                        CONNECT_RETRY_WAIT,
-                    )
-                    tries += 1
+            if not pending:
+                batch_started = time.monotonic()
+            pending.append(event)
 
-                except exc.SQLAlchemyError:
-                    updated = True
-                    _LOGGER.exception("Error saving event: %s", event)
+            if (
+                len(pending) >= self.commit_max_events
+                or time.monotonic() - batch_started >= self.commit_interval
+            ):
+                self._commit_events(pending)
+                pending = []
 
-            if not updated:
+    def _drain_queue(self):
+        """Mark the tasks queued after the stop as done.
+
+        An unfinished purge queues itself again, possibly after the stop.
+        """
+        while True:
+            try:
+                event = self.queue.get_nowait()
+            except queue.Empty:
+                return
+            if isinstance(event, CommitTask):
+                # The events before the stop were committed
+                event.done.set()
+            self.queue.task_done()
+
+    def _commit_events(self, events):
+        """Write a batch of events to the database in a single transaction.
+
+        The queue tasks of the events are only marked done once the batch
+        has been committed, so block_till_done waits for the data to be
+        written.
+        """
+        if not events:
+            return
+
+        timer_start = time.perf_counter()
+        written = self._write_events(events)
+
+        if written:
+            self.statistics.process_events(written)
+            self.statistics.commit(self.get_session)
+
+        elapsed = time.perf_counter() - timer_start
+        self.commit_count += 1
+        self.last_commit_events = len(events)
+        self.last_commit_duration = elapsed
+        if self.max_commit_duration is None or elapsed > self.max_commit_duration:
+            self.max_commit_duration = elapsed
+        _LOGGER.debug(
+            "Committed %d events in %fs, %d events queued",
+            len(events),
+            elapsed,
+            self.queue_depth,
+        )
+
+        for _ in events:
+            self.queue.task_done()
+
+    def _write_events(self, events):
+        """Write events to the database, return the events that were written.
+
+        If the batch fails for another reason than the connection, the events
+        are written one by one so only the events that cause the error are
+        lost.
+        """
+        tries = 1
+        while tries <= 10:
+            if tries != 1:
+                time.sleep(CONNECT_RETRY_WAIT)
+            try:
+                self._pending_state_attributes = {}
+                with session_scope(session=self.get_session()) as session:
+                    for event in events:
+                        self._add_event(session, event)
+                    session.flush()
+                    pending = self._pending_state_attributes
+                    added_attributes = [
+                        (shared_attrs, dbattrs.attributes_id)
+                        for shared_attrs, dbattrs in pending.items()
+                    ]
+
+                for shared_attrs, attributes_id in added_attributes:
+                    self._cache_state_attributes_id(shared_attrs, attributes_id)
+                return events
+
+            except exc.OperationalError as err:
                 _LOGGER.error(
-                    "Error in database update. Could not save "
-                    "after %d tries. Giving up",
-                    tries,
+                    "Error in database connectivity: %s. (retrying in %s seconds)",
+                    err,
+                    CONNECT_RETRY_WAIT,
                 )
+                tries += 1
 
-            self.queue.task_done()
+            except exc.SQLAlchemyError:
+                if len(events) == 1:
+                    _LOGGER.exception("Error saving event: %s", events[0])
+                    return []
+
+                written = []
+                for event in events:
+                    written.extend(self._write_events([event]))
+                return written
+
+        _LOGGER.error(
+            "Error in database update. Could not save %d events after %d tries. "
+            "Giving up",
+            len(events),
+            tries,
+        )
+        return []
+
+    def _add_event(self, session, event):
+        """Add the rows for a single event to the session."""
+        try:
+            dbevent = Events.from_event(event)
+            session.add(dbevent)
+            session.flush()
+        except (TypeError, ValueError):
+            _LOGGER.warning("Event is not JSON serializable: %s", event)
+
+        if event.event_type == EVENT_STATE_CHANGED:
+            try:
+                dbstate = States.from_event(event)
+                dbstate.event_id = dbevent.event_id
+                self._set_state_attributes(
+                    session, dbstate, StateAttributes.shared_attrs_from_event(event)
+                )
+                session.add(dbstate)
+            except (TypeError, ValueError):
+                _LOGGER.warning(
+                    "State is not JSON serializable: %s", event.data.get("new_state"),
+                )
+
+    def _set_state_attributes(self, session, dbstate, shared_attrs):
+        """Reference the stored attributes or store them if they are new."""
+        attributes_id = self._state_attributes_ids.get(shared_attrs)
+        if attributes_id is not None:
+            self._state_attributes_ids.move_to_end(shared_attrs)
+            dbstate.attributes_id = attributes_id
+            return
+
+        dbattrs = self._pending_state_attributes.get(shared_attrs)
+        if dbattrs is not None:
+            dbstate.state_attributes = dbattrs
+            return
+
+        attrs_hash = StateAttributes.hash_shared_attrs(shared_attrs)
+        attributes_id = (
+            session.query(StateAttributes.attributes_id)
+            .filter(
+                (StateAttributes.hash == attrs_hash)
+                & (StateAttributes.shared_attrs == shared_attrs)
+            )
+            .scalar()
+        )
+        if attributes_id is not None:
+            self._cache_state_attributes_id(shared_attrs, attributes_id)
+            dbstate.attributes_id = attributes_id
+            return
+
+        dbattrs = StateAttributes(hash=attrs_hash, shared_attrs=shared_attrs)
+        self._pending_state_attributes[shared_attrs] = dbattrs
+        dbstate.state_attributes = dbattrs
+
+    def _cache_state_attributes_id(self, shared_attrs, attributes_id):
+        """Remember the id of stored attributes."""
+        self._state_attributes_ids[shared_attrs] = attributes_id
+        if len(self._state_attributes_ids) > STATE_ATTRIBUTES_ID_CACHE_SIZE:
+            self._state_attributes_ids.popitem(last=False)
+
+    def clear_state_attributes_cache(self):
+        """Forget the ids of stored attributes, used when they are purged."""
+        self._state_attributes_ids.clear()
 
     @callback
     def event_listener(self, event):
         """Listen for new events and put them in the process queue."""
         self.queue.put(event)
 
+    def commit_queued_events(self, timeout: float) -> bool:
+        """Commit the events queued so far and wait till they are written.
+
+        Unlike block_till_done, the events queued later are not waited for.
+        Returns False if the events are not written within timeout seconds.
+        """
+        task = CommitTask()
+        self.queue.put(task)
+        return task.done.wait(timeout)
+
     def block_till_done(self):
-        """Block till all events processed."""
+        """Block till all events processed and committed."""
+        if self.is_alive():
+            self.queue.put(CommitTask())
         self.queue.join()
 
     def _setup_connection(self):
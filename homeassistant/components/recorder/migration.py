@@ -1,4 +1,5 @@
 """Schema migration helpers."""
+import json
 import logging
 import os
 
@@ -6,11 +7,13 @@ from sqlalchemy import Table, text
 from sqlalchemy.engine import reflection
 from sqlalchemy.exc import OperationalError, SQLAlchemyError
 
-from .models import SCHEMA_VERSION, Base, SchemaChanges
+from .models import SCHEMA_VERSION, Base, SchemaChanges, slim_state_changed_data
 from .util import session_scope
 
 _LOGGER = logging.getLogger(__name__)
 PROGRESS_FILE = ".migration_progress"
+# Number of events rewritten in a single transaction
+MIGRATION_BATCH_SIZE = 1000
 
 
 def migrate_schema(instance):
@@ -199,6 +202,64 @@ def _add_columns(engine, table_name, columns_def):
             )
 
 
+def _create_table(engine, table_name):
+    """Create a table defined in the models if it does not exist yet."""
+    _LOGGER.debug("Creating table %s", table_name)
+    Base.metadata.tables[table_name].create(engine, checkfirst=True)
+
+
+def _slim_state_changed_events(engine):
+    """Remove the states from the data of the recorded state_changed events.
+
+    The new state is stored in the states table as well, see
+    models.slim_state_changed_data.
+    """
+    _LOGGER.info(
+        "Slimming down recorded state changes. Note: this can take several "
+        "minutes on large databases and slow computers. Please be patient!"
+    )
+    select = text(
+        "SELECT event_id, event_data FROM events "
+        "WHERE event_type = 'state_changed' AND event_id > :after "
+        "ORDER BY event_id LIMIT :limit"
+    )
+    update = text("UPDATE events SET event_data = :event_data WHERE event_id = :id")
+    after = -1
+
+    while True:
+        with engine.begin() as connection:
+            rows = connection.execute(
+                select, after=after, limit=MIGRATION_BATCH_SIZE
+            ).fetchall()
+
+            for event_id, event_data in rows:
+                try:
+                    data = json.loads(event_data)
+                except ValueError:
+                    continue
+
+                old_state = data.get("old_state")
+                slim_data = slim_state_changed_data(
+                    data.get("entity_id"),
+                    None if old_state is None else old_state.get("state"),
+                    "new_state" in data and data["new_state"] is None,
+                )
+                if slim_data == data:
+                    continue
+
+                connection.execute(
+                    update, event_data=json.dumps(slim_data), id=event_id
+                )
+
+        if len(rows) < MIGRATION_BATCH_SIZE:
+            break
+        after = rows[-1][0]
+
+    if engine.dialect.name == "sqlite":
+        # Release the space of the removed states
+        engine.execute("VACUUM")
+
+
 def _apply_update(engine, new_version, old_version):
     """Perform operations to bring schema up to date."""
     if new_version == 1:
@@ -249,6 +310,14 @@ def _apply_update(engine, new_version, old_version):
     elif new_version == 7:
         _create_index(engine, "states", "ix_states_entity_id")
     elif new_version == 8:
+        _create_table(engine, "statistics")
+    elif new_version == 9:
+        _create_table(engine, "state_attributes")
+        _add_columns(engine, "states", ["attributes_id INTEGER"])
+        _create_index(engine, "states", "ix_states_attributes_id")
+    elif new_version == 10:
+        _slim_state_changed_events(engine)
+    elif new_version == 11:
         # Pending migration, want to group a few.
         pass
         # _add_columns(engine, "events", [
@@ -2,11 +2,14 @@
 from datetime import datetime
 import json
 import logging
+import zlib
 
 from sqlalchemy import (
+    BigInteger,
     Boolean,
     Column,
     DateTime,
+    Float,
     ForeignKey,
     Index,
     Integer,
@@ -15,8 +18,10 @@ from sqlalchemy import (
     distinct,
 )
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import relationship
 from sqlalchemy.orm.session import Session
 
+from homeassistant.const import EVENT_STATE_CHANGED
 from homeassistant.core import Context, Event, EventOrigin, State, split_entity_id
 from homeassistant.helpers.json import JSONEncoder
 import homeassistant.util.dt as dt_util
@@ -25,7 +30,7 @@ import homeassistant.util.dt as dt_util
 # pylint: disable=invalid-name
 Base = declarative_base()
 
-SCHEMA_VERSION = 7
+SCHEMA_VERSION = 10
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -46,10 +51,23 @@ class Events(Base):  # type: ignore
 
     @staticmethod
     def from_event(event):
-        """Create an event database object from a native event."""
+        """Create an event database object from a native event.
+
+        The data of state_changed events is slimmed down, see
+        slim_state_changed_data.
+        """
+        data = event.data
+        if event.event_type == EVENT_STATE_CHANGED:
+            old_state = data.get("old_state")
+            data = slim_state_changed_data(
+                data["entity_id"],
+                None if old_state is None else old_state.state,
+                data.get("new_state") is None,
+            )
+
         return Events(
             event_type=event.event_type,
-            event_data=json.dumps(event.data, cls=JSONEncoder),
+            event_data=json.dumps(data, cls=JSONEncoder),
             origin=str(event.origin),
             time_fired=event.time_fired,
             context_id=event.context.id,
@@ -57,15 +75,26 @@ class Events(Base):  # type: ignore
             # context_parent_id=event.context.parent_id,
         )
 
-    def to_native(self):
-        """Convert to a natve HA Event."""
+    def to_native(self, state=None):
+        """Convert to a natve HA Event.
+
+        The new state of a slim state_changed event is added to the data from
+        state, the States row of the event.
+        """
         context = Context(id=self.context_id, user_id=self.context_user_id)
         try:
+            data = json.loads(self.event_data)
+            if self.event_type == EVENT_STATE_CHANGED and "new_state" not in data:
+                native_state = None if state is None else state.to_native()
+                data["new_state"] = (
+                    None if native_state is None else native_state.as_dict()
+                )
+
             return Event(
                 self.event_type,
-                json.loads(self.event_data),
+                data,
                 EventOrigin(self.origin),
-                _process_timestamp(self.time_fired),
+                process_timestamp(self.time_fired),
                 context=context,
             )
         except ValueError:
@@ -74,6 +103,61 @@ class Events(Base):  # type: ignore
             return None
 
 
+def slim_state_changed_data(entity_id, old_state, removed):
+    """Return the data of a state_changed event as stored in the events table.
+
+    The new state is stored in the states table, it is only stored here if
+    the entity was removed. The old state is reduced to its state.
+    """
+    data = {
+        "entity_id": entity_id,
+        "old_state": None if old_state is None else {"state": old_state},
+    }
+    if removed:
+        data["new_state"] = None
+    return data
+
+
+class StateAttributes(Base):  # type: ignore
+    """State attributes shared between state changes."""
+
+    __tablename__ = "state_attributes"
+    attributes_id = Column(Integer, primary_key=True)
+    hash = Column(BigInteger, index=True)
+    shared_attrs = Column(Text)
+
+    _native = None
+
+    @staticmethod
+    def shared_attrs_from_event(event):
+        """Return the serialized attributes of a state_changed event."""
+        state = event.data.get("new_state")
+        # State got deleted
+        if state is None:
+            return "{}"
+        return json.dumps(dict(state.attributes), cls=JSONEncoder)
+
+    @staticmethod
+    def hash_shared_attrs(shared_attrs):
+        """Return the hash used to look up serialized attributes."""
+        return zlib.crc32(shared_attrs.encode("utf-8"))
+
+    def to_native(self):
+        """Convert to a state attributes dictionary.
+
+        The result is kept, so states sharing these attributes in a query
+        only decode them once.
+        """
+        if self._native is None:
+            try:
+                self._native = json.loads(self.shared_attrs)
+            except ValueError:
+                # When json.loads fails
+                _LOGGER.exception("Error converting row to state attributes: %s", self)
+                self._native = {}
+        return self._native
+
+
 class States(Base):  # type: ignore
     """State change history."""
 
@@ -82,7 +166,11 @@ class States(Base):  # type: ignore
     domain = Column(String(64))
     entity_id = Column(String(255), index=True)
     state = Column(String(255))
+    # Only used by rows recorded before the attributes were shared
     attributes = Column(Text)
+    attributes_id = Column(
+        Integer, ForeignKey("state_attributes.attributes_id"), index=True
+    )
     event_id = Column(Integer, ForeignKey("events.event_id"), index=True)
     last_changed = Column(DateTime(timezone=True), default=datetime.utcnow)
     last_updated = Column(DateTime(timezone=True), default=datetime.utcnow, index=True)
@@ -97,9 +185,14 @@ class States(Base):  # type: ignore
         Index("ix_states_entity_id_last_updated", "entity_id", "last_updated"),
     )
 
+    state_attributes = relationship(StateAttributes, lazy="joined")
+
     @staticmethod
     def from_event(event):
-        """Create object from a state_changed event."""
+        """Create object from a state_changed event.
+
+        The attributes are stored separately, see StateAttributes.
+        """
         entity_id = event.data["entity_id"]
         state = event.data.get("new_state")
 
@@ -114,13 +207,11 @@ class States(Base):  # type: ignore
         if state is None:
             dbstate.state = ""
             dbstate.domain = split_entity_id(entity_id)[0]
-            dbstate.attributes = "{}"
             dbstate.last_changed = event.time_fired
             dbstate.last_updated = event.time_fired
         else:
             dbstate.domain = state.domain
             dbstate.state = state.state
-            dbstate.attributes = json.dumps(dict(state.attributes), cls=JSONEncoder)
             dbstate.last_changed = state.last_changed
             dbstate.last_updated = state.last_updated
 
@@ -130,12 +221,19 @@ class States(Base):  # type: ignore
         """Convert to an HA state object."""
         context = Context(id=self.context_id, user_id=self.context_user_id)
         try:
+            if self.state_attributes is not None:
+                attributes = self.state_attributes.to_native()
+            elif self.attributes:
+                attributes = json.loads(self.attributes)
+            else:
+                attributes = {}
+
             return State(
                 self.entity_id,
                 self.state,
-                json.loads(self.attributes),
-                _process_timestamp(self.last_changed),
-                _process_timestamp(self.last_updated),
+                attributes,
+                process_timestamp(self.last_changed),
+                process_timestamp(self.last_updated),
                 context=context,
                 # Temp, because database can still store invalid entity IDs
                 # Remove with 1.0 or in 2020.
@@ -185,6 +283,40 @@ class RecorderRuns(Base):  # type: ignore
         return self
 
 
+class Statistics(Base):  # type: ignore
+    """Downsampled statistics of a numeric entity over a fixed period."""
+
+    __tablename__ = "statistics"
+    id = Column(Integer, primary_key=True)
+    domain = Column(String(64))
+    entity_id = Column(String(255))
+    # Length of the period in seconds
+    period = Column(Integer)
+    start = Column(DateTime(timezone=True))
+    min = Column(Float)
+    mean = Column(Float)
+    max = Column(Float)
+    last = Column(Float)
+    count = Column(Integer)
+
+    __table_args__ = (
+        # Used for fetching the statistics of entities over a time range
+        # (get_statistics in statistics.py)
+        Index("ix_statistics_entity_id_period_start", "entity_id", "period", "start"),
+    )
+
+    def to_native(self):
+        """Convert to a dictionary of the statistics."""
+        return {
+            "entity_id": self.entity_id,
+            "start": process_timestamp(self.start),
+            "min": self.min,
+            "mean": self.mean,
+            "max": self.max,
+            "last": self.last,
+        }
+
+
 class SchemaChanges(Base):  # type: ignore
     """Representation of schema version changes."""
 
@@ -194,7 +326,7 @@ class SchemaChanges(Base):  # type: ignore
     changed = Column(DateTime(timezone=True), default=datetime.utcnow)
 
 
-def _process_timestamp(ts):
+def process_timestamp(ts):
     """Process a timestamp into datetime object."""
     if ts is None:
         return None
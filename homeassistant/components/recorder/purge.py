@@ -6,37 +6,150 @@ from sqlalchemy.exc import SQLAlchemyError
 
 import homeassistant.util.dt as dt_util
 
-from .models import Events, States
+from .models import Events, StateAttributes, States, Statistics
+from .statistics import PERIOD_5MINUTE
 from .util import session_scope
 
 _LOGGER = logging.getLogger(__name__)
 
+# Maximum number of rows of each table deleted by a single purge pass
+MAX_ROWS_TO_PURGE = 1000
+# Number of free SQLite pages released by a single repack pass
+MAX_PAGES_TO_VACUUM = 1024
+
 
 def purge_old_data(instance, purge_days, repack):
-    """Purge events and states older than purge_days ago."""
+    """Purge events and states older than purge_days ago.
+
+    A single call deletes at most MAX_ROWS_TO_PURGE rows of each table, so
+    the recorder can write new events in between. Returns False if there is
+    more to purge or repack, True when done.
+    """
     purge_before = dt_util.utcnow() - timedelta(days=purge_days)
     _LOGGER.debug("Purging events before %s", purge_before)
 
     try:
         with session_scope(session=instance.get_session()) as session:
-            deleted_rows = (
-                session.query(States)
-                .filter((States.last_updated < purge_before))
-                .delete(synchronize_session=False)
+            rows = (
+                session.query(States.state_id, States.attributes_id)
+                .filter(States.last_updated < purge_before)
+                .order_by(States.state_id)
+                .limit(MAX_ROWS_TO_PURGE)
+                .all()
+            )
+            deleted_states = _delete_rows(
+                session, States.state_id, [row.state_id for row in rows]
             )
-            _LOGGER.debug("Deleted %s states", deleted_rows)
+            _LOGGER.debug("Deleted %s states", deleted_states)
+
+            # Attributes that are no longer used by any state
+            attributes_ids = {row.attributes_id for row in rows}
+            attributes_ids.discard(None)
+            if attributes_ids:
+                attributes_ids.difference_update(
+                    row.attributes_id
+                    for row in session.query(States.attributes_id)
+                    .filter(States.attributes_id.in_(attributes_ids))
+                    .distinct()
+                )
+                deleted_rows = _delete_rows(
+                    session, StateAttributes.attributes_id, list(attributes_ids)
+                )
+                instance.clear_state_attributes_cache()
+                _LOGGER.debug("Deleted %s state attributes", deleted_rows)
+
+            # Events are referenced by states, delete them once the old
+            # states are gone
+            if deleted_states == MAX_ROWS_TO_PURGE:
+                _LOGGER.info(
+                    "Purged %s states before %s, continuing",
+                    deleted_states,
+                    purge_before,
+                )
+                return False
 
-            deleted_rows = (
-                session.query(Events)
-                .filter((Events.time_fired < purge_before))
-                .delete(synchronize_session=False)
+            event_ids = [
+                row.event_id
+                for row in session.query(Events.event_id)
+                .filter(Events.time_fired < purge_before)
+                .order_by(Events.event_id)
+                .limit(MAX_ROWS_TO_PURGE)
+            ]
+            deleted_events = _delete_rows(session, Events.event_id, event_ids)
+            _LOGGER.debug("Deleted %s events", deleted_events)
+
+            # The hourly statistics are kept as long-term history
+            statistics_ids = [
+                row.id
+                for row in session.query(Statistics.id)
+                .filter(
+                    (Statistics.period == PERIOD_5MINUTE)
+                    & (Statistics.start < purge_before)
+                )
+                .order_by(Statistics.id)
+                .limit(MAX_ROWS_TO_PURGE)
+            ]
+            deleted_statistics = _delete_rows(session, Statistics.id, statistics_ids)
+            _LOGGER.debug("Deleted %s 5-minute statistics", deleted_statistics)
+
+        if MAX_ROWS_TO_PURGE in (deleted_events, deleted_statistics):
+            _LOGGER.info(
+                "Purged %s events and %s 5-minute statistics before %s, continuing",
+                deleted_events,
+                deleted_statistics,
+                purge_before,
             )
-            _LOGGER.debug("Deleted %s events", deleted_rows)
+            return False
 
         # Execute sqlite vacuum command to free up space on disk
-        if repack and instance.engine.driver in ("pysqlite", "postgresql"):
+        if repack and instance.engine.driver == "pysqlite":
+            return _repack_sqlite(instance)
+
+        if repack and instance.engine.driver == "postgresql":
             _LOGGER.debug("Vacuuming SQL DB to free space")
             instance.engine.execute("VACUUM")
 
     except SQLAlchemyError as err:
         _LOGGER.warning("Error purging history: %s.", err)
+
+    return True
+
+
+def _delete_rows(session, column, ids):
+    """Delete the rows with the given primary keys."""
+    if not ids:
+        return 0
+
+    return (
+        session.query(column.class_)
+        .filter(column.in_(ids))
+        .delete(synchronize_session=False)
+    )
+
+
+def _repack_sqlite(instance):
+    """Release free pages of a SQLite database in bounded steps.
+
+    Databases without incremental auto vacuum are converted by a single full
+    VACUUM, after which later repacks are incremental. Returns False if there
+    are more pages to release, True when done.
+    """
+    with instance.engine.connect() as conn:
+        auto_vacuum = conn.execute("PRAGMA auto_vacuum").scalar()
+
+        if auto_vacuum != 2:
+            _LOGGER.debug("Vacuuming SQL DB to free space")
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+            return True
+
+        _LOGGER.debug("Incrementally vacuuming SQL DB to free space")
+        # The pages are only released while the result is consumed
+        conn.execute(f"PRAGMA incremental_vacuum({MAX_PAGES_TO_VACUUM})").fetchall()
+        free_pages = conn.execute("PRAGMA freelist_count").scalar()
+
+    if free_pages:
+        _LOGGER.info("%s free pages left to vacuum, continuing", free_pages)
+        return False
+
+    return True
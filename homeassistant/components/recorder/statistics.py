@@ -0,0 +1,206 @@
+"""Downsampled long-term statistics of numeric entities."""
+from collections import defaultdict
+import logging
+import math
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import split_entity_id
+import homeassistant.util.dt as dt_util
+
+from .models import Statistics
+from .util import execute, session_scope
+
+_LOGGER = logging.getLogger(__name__)
+
+PERIOD_5MINUTE = 300
+PERIOD_HOURLY = 3600
+PERIODS = (PERIOD_5MINUTE, PERIOD_HOURLY)
+
+
+def _numeric_value(state: str) -> Optional[float]:
+    """Return the state as a float or None if it is not numeric."""
+    try:
+        value = float(state)
+    except ValueError:
+        return None
+
+    if not math.isfinite(value):
+        return None
+    return value
+
+
+class _Bucket:
+    """Statistics of an entity for a single period being compiled."""
+
+    __slots__ = ("row_id", "start", "min", "max", "total", "count", "last", "dirty")
+
+    def __init__(self, start: float, value: float) -> None:
+        """Initialize the bucket with its first value."""
+        self.row_id: Optional[int] = None
+        self.start = start
+        self.min = self.max = self.total = self.last = value
+        self.count = 1
+        self.dirty = True
+
+    def add(self, value: float) -> None:
+        """Add a value to the bucket."""
+        if value < self.min:
+            self.min = value
+        elif value > self.max:
+            self.max = value
+        self.total += value
+        self.count += 1
+        self.last = value
+        self.dirty = True
+
+    def merge_row(self, row: Statistics) -> None:
+        """Merge the values that were stored for this bucket in an earlier run."""
+        self.row_id = row.id
+        self.min = min(self.min, row.min)
+        self.max = max(self.max, row.max)
+        self.total += row.mean * row.count
+        self.count += row.count
+
+
+class StatisticsCompiler:
+    """Compile the 5-minute and hourly statistics of numeric entities.
+
+    The statistics are compiled in memory from the recorded state changes and
+    the buckets that changed are written to the database after each commit,
+    so the statistics of the running period are always available.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the compiler."""
+        self._buckets: Dict[Tuple[str, int], _Bucket] = {}
+        # Buckets of ended periods that were not written yet
+        self._ended: List[Tuple[Tuple[str, int], _Bucket]] = []
+
+    def process_events(self, events) -> None:
+        """Add the numeric states of the state changed events to the buckets."""
+        for event in events:
+            if event.event_type != EVENT_STATE_CHANGED:
+                continue
+
+            new_state = event.data.get("new_state")
+            if new_state is None:
+                continue
+
+            value = _numeric_value(new_state.state)
+            if value is None:
+                continue
+
+            timestamp = new_state.last_updated.timestamp()
+            for period in PERIODS:
+                start = timestamp - timestamp % period
+                key = (new_state.entity_id, period)
+                bucket = self._buckets.get(key)
+
+                if bucket is not None and bucket.start == start:
+                    bucket.add(value)
+                elif bucket is None or bucket.start < start:
+                    new_bucket = self._buckets[key] = _Bucket(start, value)
+                    if bucket is not None:
+                        # The bucket was not written by an earlier run
+                        new_bucket.row_id = 0
+                        if bucket.dirty:
+                            self._ended.append((key, bucket))
+
+    def commit(self, get_session) -> None:
+        """Write the buckets that changed to the database."""
+        dirty = self._ended
+        dirty.extend(
+            (key, bucket) for key, bucket in self._buckets.items() if bucket.dirty
+        )
+        self._ended = []
+        if not dirty:
+            return
+
+        try:
+            with session_scope(session=get_session()) as session:
+                added = []
+                for (entity_id, period), bucket in dirty:
+                    start = dt_util.utc_from_timestamp(bucket.start)
+
+                    if bucket.row_id is None:
+                        row = (
+                            session.query(Statistics)
+                            .filter_by(entity_id=entity_id, period=period, start=start)
+                            .first()
+                        )
+                        if row is None:
+                            bucket.row_id = 0
+                        else:
+                            bucket.merge_row(row)
+
+                    values = {
+                        "min": bucket.min,
+                        "mean": bucket.total / bucket.count,
+                        "max": bucket.max,
+                        "last": bucket.last,
+                        "count": bucket.count,
+                    }
+
+                    if bucket.row_id:
+                        session.query(Statistics).filter(
+                            Statistics.id == bucket.row_id
+                        ).update(values, synchronize_session=False)
+                        continue
+
+                    row = Statistics(
+                        domain=split_entity_id(entity_id)[0],
+                        entity_id=entity_id,
+                        period=period,
+                        start=start,
+                        **values,
+                    )
+                    session.add(row)
+                    added.append((bucket, row))
+
+                session.flush()
+                for bucket, row in added:
+                    bucket.row_id = row.id
+
+        except SQLAlchemyError:
+            _LOGGER.exception("Error saving statistics")
+            # Compile from what was stored before the failure
+            self._buckets.clear()
+            return
+
+        for _, bucket in dirty:
+            bucket.dirty = False
+
+
+def get_statistics(
+    hass, period, start_time, end_time=None, entity_ids=None, filters=None
+):
+    """Return the statistics of a period during UTC start_time - end_time.
+
+    The statistics are returned per entity as lists of dictionaries ordered by
+    the start of the period. The first period may start before start_time.
+    """
+    timestamp = start_time.timestamp()
+    period_start = dt_util.utc_from_timestamp(timestamp - timestamp % period)
+
+    with session_scope(hass=hass) as session:
+        query = session.query(Statistics).filter(
+            (Statistics.period == period) & (Statistics.start >= period_start)
+        )
+
+        if filters:
+            query = filters.apply(query, entity_ids, Statistics)
+        elif entity_ids is not None:
+            query = query.filter(Statistics.entity_id.in_(entity_ids))
+
+        if end_time is not None:
+            query = query.filter(Statistics.start < end_time)
+
+        rows = execute(query.order_by(Statistics.entity_id, Statistics.start))
+
+    result = defaultdict(list)
+    for row in rows:
+        result[row["entity_id"]].append(row)
+    return result
@@ -3,10 +3,18 @@ import voluptuous as vol
 
 from homeassistant.auth.permissions.const import POLICY_READ
 from homeassistant.const import EVENT_STATE_CHANGED, EVENT_TIME_CHANGED, MATCH_ALL
-from homeassistant.core import DOMAIN as HASS_DOMAIN, callback
-from homeassistant.exceptions import HomeAssistantError, ServiceNotFound, Unauthorized
+from homeassistant.core import DOMAIN as HASS_DOMAIN, callback, split_entity_id
+from homeassistant.exceptions import (
+    HomeAssistantError,
+    ServiceNotFound,
+    TemplateError,
+    Unauthorized,
+)
 from homeassistant.helpers import config_validation as cv
-from homeassistant.helpers.event import async_track_state_change
+from homeassistant.helpers.event import (
+    async_track_state_change,
+    async_track_template_result,
+)
 from homeassistant.helpers.service import async_get_all_descriptions
 
 from . import const, decorators, messages
@@ -19,6 +27,7 @@ def async_register_commands(hass, async_reg):
     """Register commands."""
     async_reg(hass, handle_subscribe_events)
     async_reg(hass, handle_unsubscribe_events)
+    async_reg(hass, handle_subscribe_entities)
     async_reg(hass, handle_call_service)
     async_reg(hass, handle_get_states)
     async_reg(hass, handle_get_services)
@@ -63,7 +72,7 @@ def handle_subscribe_events(hass, connection, msg):
             ):
                 return
 
-            connection.send_message(messages.event_message(msg["id"], event))
+            connection.send_message(messages.cached_event_message(msg["id"], event))
 
     else:
 
@@ -73,7 +82,7 @@ def handle_subscribe_events(hass, connection, msg):
             if event.event_type == EVENT_TIME_CHANGED:
                 return
 
-            connection.send_message(messages.event_message(msg["id"], event.as_dict()))
+            connection.send_message(messages.cached_event_message(msg["id"], event))
 
     connection.subscriptions[msg["id"]] = hass.bus.async_listen(
         event_type, forward_events
@@ -82,6 +91,108 @@ def handle_subscribe_events(hass, connection, msg):
     connection.send_message(messages.result_message(msg["id"]))
 
 
+@callback
+@decorators.websocket_command(
+    {
+        vol.Required("type"): "subscribe_entities",
+        vol.Optional("entity_ids"): cv.entity_ids,
+        vol.Optional("domains"): vol.All(cv.ensure_list, [cv.string]),
+    }
+)
+def handle_subscribe_entities(hass, connection, msg):
+    """Handle subscribe entities command.
+
+    Sends the current states of the matching entities, followed by the
+    changed parts of their states. Without a filter all entities are matched.
+
+    Async friendly.
+    """
+    entity_ids = msg.get("entity_ids")
+    domains = msg.get("domains")
+    entity_perm = connection.user.permissions.check_entity
+
+    def entity_filter(entity_id):
+        """Return if an entity should be forwarded."""
+        if entity_ids is None and domains is None:
+            return entity_perm(entity_id, POLICY_READ)
+
+        if (entity_ids is None or entity_id not in entity_ids) and (
+            domains is None or split_entity_id(entity_id)[0] not in domains
+        ):
+            return False
+
+        return entity_perm(entity_id, POLICY_READ)
+
+    @callback
+    def forward_entity_changes(entity_id, old_state, new_state):
+        """Forward the changed part of the entity state to websocket."""
+        if not entity_filter(entity_id):
+            return
+
+        if new_state is None:
+            event = {"removed": [entity_id]}
+        elif old_state is None:
+            event = {"added": {entity_id: new_state.as_dict()}}
+        else:
+            event = {"changed": {entity_id: _state_diff(old_state, new_state)}}
+
+        connection.send_message(messages.event_message(msg["id"], event))
+
+    if domains is None and entity_ids is not None:
+        track_entity_ids = entity_ids
+    else:
+        track_entity_ids = MATCH_ALL
+
+    connection.subscriptions[msg["id"]] = async_track_state_change(
+        hass, track_entity_ids, forward_entity_changes
+    )
+
+    connection.send_message(messages.result_message(msg["id"]))
+
+    connection.send_message(
+        messages.event_message(
+            msg["id"],
+            {
+                "added": {
+                    state.entity_id: state.as_dict()
+                    for state in hass.states.async_all()
+                    if entity_filter(state.entity_id)
+                }
+            },
+        )
+    )
+
+
+def _state_diff(old_state, new_state):
+    """Return the parts of a state that changed."""
+    diff = {"last_updated": new_state.last_updated}
+
+    if old_state.state != new_state.state:
+        diff["state"] = new_state.state
+    if old_state.last_changed != new_state.last_changed:
+        diff["last_changed"] = new_state.last_changed
+    if old_state.context != new_state.context:
+        diff["context"] = new_state.context
+
+    old_attributes = old_state.attributes
+    new_attributes = new_state.attributes
+
+    if old_attributes != new_attributes:
+        changed = {
+            key: value
+            for key, value in new_attributes.items()
+            if key not in old_attributes or old_attributes[key] != value
+        }
+        if changed:
+            diff["attributes"] = changed
+
+        removed = [key for key in old_attributes if key not in new_attributes]
+        if removed:
+            diff["attributes_removed"] = removed
+
+    return diff
+
+
 @callback
 @decorators.websocket_command(
     {
@@ -178,7 +289,15 @@ def handle_get_states(hass, connection, msg):
             if entity_perm(state.entity_id, "read")
         ]
 
-    connection.send_message(messages.result_message(msg["id"], states))
+    # The states are serialized once and shared by all connections
+    try:
+        serialized = "[{}]".format(",".join(state.as_json() for state in states))
+    except (ValueError, TypeError):
+        # The writer reports the state that can't be serialized
+        connection.send_message(messages.result_message(msg["id"], states))
+        return
+
+    connection.send_message(messages.serialized_result_message(msg["id"], serialized))
 
 
 @decorators.websocket_command({vol.Required("type"): "get_services"})
@@ -233,7 +352,8 @@ def handle_render_template(hass, connection, msg):
 
     entity_ids = msg.get("entity_ids")
     if entity_ids is None:
-        entity_ids = template.extract_entities(variables)
+        _render_template_tracked(hass, connection, msg, template, variables)
+        return
 
     @callback
     def state_listener(*_):
@@ -243,12 +363,33 @@ def handle_render_template(hass, connection, msg):
             )
         )
 
-    if entity_ids and entity_ids != MATCH_ALL:
-        connection.subscriptions[msg["id"]] = async_track_state_change(
-            hass, entity_ids, state_listener
-        )
-    else:
-        connection.subscriptions[msg["id"]] = lambda: None
+    connection.subscriptions[msg["id"]] = async_track_state_change(
+        hass, entity_ids, state_listener
+    )
 
     connection.send_result(msg["id"])
     state_listener()
+
+
+@callback
+def _render_template_tracked(hass, connection, msg, template, variables):
+    """Render a template again when the states it read change."""
+
+    @callback
+    def template_listener(event, template, last_result, result):
+        if isinstance(result, TemplateError) or result == last_result:
+            return
+
+        connection.send_message(messages.event_message(msg["id"], {"result": result}))
+
+    info = async_track_template_result(hass, template, template_listener, variables)
+    connection.subscriptions[msg["id"]] = info.async_remove
+
+    connection.send_result(msg["id"])
+
+    if isinstance(info.last_result, TemplateError):
+        raise info.last_result
+
+    connection.send_message(
+        messages.event_message(msg["id"], {"result": info.last_result})
+    )
@@ -1,4 +1,6 @@
 """Message templates for websocket commands."""
+from collections import OrderedDict
+from typing import Any, Tuple
 
 import voluptuous as vol
 
@@ -8,6 +10,12 @@ from . import const
 
 # mypy: allow-untyped-defs
 
+# Number of recently serialized events to keep
+EVENT_CACHE_SIZE = 128
+# Serialized events keyed by object id. The event is kept alongside its
+# serialized form so the id can't be reused while it is cached.
+_EVENT_CACHE: "OrderedDict[int, Tuple[Any, str]]" = OrderedDict()
+
 # Minimal requirements of a message
 MINIMAL_MESSAGE_SCHEMA = vol.Schema(
     {vol.Required("id"): cv.positive_int, vol.Required("type"): cv.string},
@@ -23,6 +31,14 @@ def result_message(iden, result=None):
     return {"id": iden, "type": const.TYPE_RESULT, "success": True, "result": result}
 
 
+def serialized_result_message(iden, result):
+    """Return a success result message with a result serialized to JSON."""
+    return '{"id": %d, "type": "result", "success": true, "result": %s}' % (
+        iden,
+        result,
+    )
+
+
 def error_message(iden, code, message):
     """Return an error result message."""
     return {
@@ -36,3 +52,29 @@ def error_message(iden, code, message):
 def event_message(iden, event):
     """Return an event message."""
     return {"id": iden, "type": "event", "event": event}
+
+
+def cached_event_message(iden, event):
+    """Return a serialized event message.
+
+    The event is serialized once and shared by all subscriptions it is sent
+    to, only the message id differs. Returns a regular event message if the
+    event can't be serialized, so the writer reports the error.
+    """
+    key = id(event)
+    cached = _EVENT_CACHE.get(key)
+
+    if cached is not None and cached[0] is event:
+        _EVENT_CACHE.move_to_end(key)
+        dumped = cached[1]
+    else:
+        try:
+            dumped = const.JSON_DUMP(event)
+        except (ValueError, TypeError):
+            return event_message(iden, event)
+
+        _EVENT_CACHE[key] = (event, dumped)
+        if len(_EVENT_CACHE) > EVENT_CACHE_SIZE:
+            _EVENT_CACHE.popitem(last=False)
+
+    return '{"id": %d, "type": "event", "event": %s}' % (iden, dumped)
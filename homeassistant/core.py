@@ -9,6 +9,9 @@ from concurrent.futures import ThreadPoolExecutor
 import datetime
 import enum
 import functools
+import heapq
+import itertools
+import json
 import logging
 import os
 import pathlib
@@ -28,7 +31,6 @@ from typing import (
     Set,
     TypeVar,
 )
-import uuid
 
 from async_timeout import timeout
 import attr
@@ -66,6 +68,8 @@ from homeassistant.exceptions import (
 from homeassistant.util import location, slugify
 from homeassistant.util.async_ import fire_coroutine_threadsafe, run_callback_threadsafe
 import homeassistant.util.dt as dt_util
+from homeassistant.util.read_only_dict import ReadOnlyDict
+from homeassistant.util.ulid import ulid_hex
 from homeassistant.util.unit_system import IMPERIAL_SYSTEM, METRIC_SYSTEM, UnitSystem
 
 # Typing imports that create a circular dependency
@@ -95,6 +99,9 @@ SOURCE_YAML = "yaml"
 # How long to wait till things that run on startup have to finish.
 TIMEOUT_EVENT_START = 15
 
+# Number of entity ids of which the validation result is cached
+MAX_EXPECTED_ENTITY_IDS = 16384
+
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -103,10 +110,13 @@ def split_entity_id(entity_id: str) -> List[str]:
     return entity_id.split(".", 1)
 
 
+@functools.lru_cache(MAX_EXPECTED_ENTITY_IDS)
 def valid_entity_id(entity_id: str) -> bool:
     """Test if an entity ID is a valid format.
 
     Format: <domain>.<entity> where both are slugs.
+
+    The results are cached, slugify is expensive.
     """
     return "." in entity_id and slugify(entity_id) == entity_id.replace(".", "_", 1)
 
@@ -140,6 +150,50 @@ def async_loop_exception_handler(_: Any, context: Dict) -> None:
     )
 
 
+class HassJobType(enum.Enum):
+    """Represent a job type."""
+
+    Coroutinefunction = 1
+    Callback = 2
+    Executor = 3
+
+
+class HassJob:
+    """Represent a job to be run later.
+
+    The type of the callable is determined once when the job is created, so
+    it does not need to be inspected every time the job is run.
+    """
+
+    __slots__ = ("job_type", "target")
+
+    def __init__(self, target: Callable[..., Any]) -> None:
+        """Create a job object."""
+        if asyncio.iscoroutine(target):
+            raise ValueError("Coroutine not allowed to be passed to HassJob")
+
+        self.target = target
+        self.job_type = _get_callable_job_type(target)
+
+    def __repr__(self) -> str:
+        """Return the job."""
+        return f"<Job {self.job_type} {self.target}>"
+
+
+def _get_callable_job_type(target: Callable[..., Any]) -> HassJobType:
+    """Determine the job type from the callable."""
+    # Check for partials to properly determine if coroutine function
+    check_target = target
+    while isinstance(check_target, functools.partial):
+        check_target = check_target.func
+
+    if is_callback(check_target):
+        return HassJobType.Callback
+    if asyncio.iscoroutinefunction(check_target):
+        return HassJobType.Coroutinefunction
+    return HassJobType.Executor
+
+
 class CoreState(enum.Enum):
     """Represent the current state of Home Assistant."""
 
@@ -174,6 +228,7 @@ class HomeAssistant:
         self._pending_tasks: list = []
         self._track_task = True
         self.bus = EventBus(self)
+        self.scheduler = TimerScheduler(self)
         self.services = ServiceRegistry(self)
         self.states = StateMachine(self.bus, self.loop)
         self.config = Config(self)
@@ -313,6 +368,36 @@ class HomeAssistant:
 
         return task
 
+    @callback
+    def async_add_hass_job(
+        self, hassjob: HassJob, *args: Any
+    ) -> Optional[asyncio.Future]:
+        """Add a HassJob from within the event loop.
+
+        This method must be run in the event loop.
+
+        hassjob: HassJob to call.
+        args: parameters for method to call.
+        """
+        job_type = hassjob.job_type
+
+        if job_type is HassJobType.Callback:
+            self.loop.call_soon(hassjob.target, *args)
+            return None
+
+        if job_type is HassJobType.Coroutinefunction:
+            task = self.loop.create_task(hassjob.target(*args))
+        else:
+            task = self.loop.run_in_executor(  # type: ignore
+                None, hassjob.target, *args
+            )
+
+        # If a task is scheduled
+        if self._track_task:
+            self._pending_tasks.append(task)
+
+        return task
+
     @callback
     def async_create_task(self, target: Coroutine) -> asyncio.tasks.Task:
         """Create a task from within the eventloop.
@@ -365,6 +450,20 @@ class HomeAssistant:
         else:
             self.async_add_job(target, *args)
 
+    @callback
+    def async_run_hass_job(self, hassjob: HassJob, *args: Any) -> None:
+        """Run a HassJob from within the event loop.
+
+        This method must be run in the event loop.
+
+        hassjob: HassJob
+        args: parameters for method to call.
+        """
+        if hassjob.job_type is HassJobType.Callback:
+            hassjob.target(*args)
+        else:
+            self.async_add_hass_job(hassjob, *args)
+
     def block_till_done(self) -> None:
         """Block till all pending work is done."""
         asyncio.run_coroutine_threadsafe(
@@ -437,7 +536,7 @@ class Context:
 
     user_id = attr.ib(type=str, default=None)
     parent_id = attr.ib(type=Optional[str], default=None)
-    id = attr.ib(type=str, default=attr.Factory(lambda: uuid.uuid4().hex))
+    id = attr.ib(type=str, default=attr.Factory(ulid_hex))
 
     def as_dict(self) -> dict:
         """Return a dictionary representation of the context."""
@@ -515,7 +614,7 @@ class EventBus:
 
     def __init__(self, hass: HomeAssistant) -> None:
         """Initialize a new event bus."""
-        self._listeners: Dict[str, List[Callable]] = {}
+        self._listeners: Dict[str, List[HassJob]] = {}
         self._hass = hass
 
     @callback
@@ -557,23 +656,27 @@ class EventBus:
 
         This method must be run in the event loop.
         """
-        listeners = self._listeners.get(event_type, [])
+        listeners = self._listeners.get(event_type)
 
         # EVENT_HOMEASSISTANT_CLOSE should go only to his listeners
-        match_all_listeners = self._listeners.get(MATCH_ALL)
-        if match_all_listeners is not None and event_type != EVENT_HOMEASSISTANT_CLOSE:
-            listeners = match_all_listeners + listeners
+        match_all_listeners = None
+        if event_type != EVENT_HOMEASSISTANT_CLOSE:
+            match_all_listeners = self._listeners.get(MATCH_ALL)
 
         event = Event(event_type, event_data, origin, None, context)
 
         if event_type != EVENT_TIME_CHANGED:
             _LOGGER.debug("Bus:Handling %s", event)
 
-        if not listeners:
-            return
+        add_hass_job = self._hass.async_add_hass_job
+
+        if match_all_listeners is not None:
+            for job in match_all_listeners:
+                add_hass_job(job, event)
 
-        for func in listeners:
-            self._hass.async_add_job(func, event)
+        if listeners is not None:
+            for job in listeners:
+                add_hass_job(job, event)
 
     def listen(self, event_type: str, listener: Callable) -> CALLBACK_TYPE:
         """Listen for all events or events of a specific type.
@@ -600,14 +703,19 @@ class EventBus:
 
         This method must be run in the event loop.
         """
+        return self._async_listen_job(event_type, HassJob(listener))
+
+    @callback
+    def _async_listen_job(self, event_type: str, hassjob: HassJob) -> CALLBACK_TYPE:
+        """Listen for events of a specific type with a HassJob."""
         if event_type in self._listeners:
-            self._listeners[event_type].append(listener)
+            self._listeners[event_type].append(hassjob)
         else:
-            self._listeners[event_type] = [listener]
+            self._listeners[event_type] = [hassjob]
 
         def remove_listener() -> None:
             """Remove the listener."""
-            self._async_remove_listener(event_type, listener)
+            self._async_remove_listener(event_type, hassjob)
 
         return remove_listener
 
@@ -641,6 +749,9 @@ class EventBus:
         This method must be run in the event loop.
         """
 
+        job = HassJob(listener)
+        onetime_job: HassJob
+
         @callback
         def onetime_listener(event: Event) -> None:
             """Remove listener from event bus and then fire listener."""
@@ -652,19 +763,21 @@ class EventBus:
             # multiple times as well.
             # This will make sure the second time it does nothing.
             setattr(onetime_listener, "run", True)
-            self._async_remove_listener(event_type, onetime_listener)
-            self._hass.async_run_job(listener, event)
+            self._async_remove_listener(event_type, onetime_job)
+            self._hass.async_run_hass_job(job, event)
+
+        onetime_job = HassJob(onetime_listener)
 
-        return self.async_listen(event_type, onetime_listener)
+        return self._async_listen_job(event_type, onetime_job)
 
     @callback
-    def _async_remove_listener(self, event_type: str, listener: Callable) -> None:
+    def _async_remove_listener(self, event_type: str, hassjob: HassJob) -> None:
         """Remove a listener of a specific event_type.
 
         This method must be run in the event loop.
         """
         try:
-            self._listeners[event_type].remove(listener)
+            self._listeners[event_type].remove(hassjob)
 
             # delete event_type list if empty
             if not self._listeners[event_type]:
@@ -672,7 +785,164 @@ class EventBus:
         except (KeyError, ValueError):
             # KeyError is key event_type listener did not exist
             # ValueError if listener did not exist within event_type
-            _LOGGER.warning("Unable to remove unknown listener %s", listener)
+            _LOGGER.warning("Unable to remove unknown listener %s", hassjob.target)
+
+
+class TimerHandle:
+    """Handle to a callback scheduled with the TimerScheduler."""
+
+    __slots__ = ("when", "action", "rollback_action", "cancelled", "_scheduler")
+
+    def __init__(
+        self,
+        scheduler: "TimerScheduler",
+        when: datetime.datetime,
+        action: Callable[[datetime.datetime], None],
+        rollback_action: Optional[Callable[[datetime.datetime], None]],
+    ) -> None:
+        """Initialize a timer handle."""
+        self._scheduler = scheduler
+        self.when = when
+        self.action = action
+        self.rollback_action = rollback_action
+        self.cancelled = False
+
+    @callback
+    def cancel(self) -> None:
+        """Cancel the scheduled callback.
+
+        This method must be run in the event loop.
+        """
+        if not self.cancelled:
+            self.cancelled = True
+            self._scheduler.async_cancelled(self)
+
+
+class TimerScheduler:
+    """Run callbacks once a point in time has been reached.
+
+    Pending callbacks are kept in a heap ordered by due time. A single
+    EVENT_TIME_CHANGED listener is attached while callbacks are pending, so
+    each time tick only pops the callbacks that are due instead of waking up
+    every timer.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the scheduler."""
+        self._hass = hass
+        self._heap: List[Any] = []
+        self._sequence = itertools.count()
+        self._active = 0
+        self._last_now: Optional[float] = None
+        self._unsub_time: Optional[CALLBACK_TYPE] = None
+
+    def __len__(self) -> int:
+        """Return the number of pending callbacks."""
+        return self._active
+
+    @callback
+    def async_schedule(
+        self,
+        when: datetime.datetime,
+        action: Callable[[datetime.datetime], None],
+        rollback_action: Optional[Callable[[datetime.datetime], None]] = None,
+    ) -> TimerHandle:
+        """Run a callback with the time of the first tick at or after when.
+
+        If the clock jumps backwards while the callback is pending, the
+        callback is cancelled and rollback_action is called with the new time
+        if given.
+
+        This method must be run in the event loop.
+        """
+        handle = TimerHandle(self, when, action, rollback_action)
+        heapq.heappush(self._heap, (_timestamp(when), next(self._sequence), handle))
+        self._active += 1
+
+        if self._unsub_time is None:
+            self._unsub_time = self._hass.bus.async_listen(
+                EVENT_TIME_CHANGED, self._async_time_changed
+            )
+
+        return handle
+
+    @callback
+    def async_cancelled(self, handle: TimerHandle) -> None:
+        """Update bookkeeping for a cancelled handle.
+
+        Cancelled handles are dropped from the heap lazily.
+        """
+        self._active -= 1
+
+        if self._active == 0:
+            self._heap.clear()
+            self._detach()
+        elif len(self._heap) > 2 * self._active + 64:
+            self._heap = [entry for entry in self._heap if not entry[2].cancelled]
+            heapq.heapify(self._heap)
+
+    @callback
+    def _detach(self) -> None:
+        """Stop listening for time ticks."""
+        if self._unsub_time is not None:
+            self._unsub_time()
+            self._unsub_time = None
+
+    @callback
+    def _async_time_changed(self, event: Event) -> None:
+        """Run the callbacks that are due."""
+        now = event.data[ATTR_NOW]
+        now_ts = _timestamp(now)
+        last_now = self._last_now
+        self._last_now = now_ts
+
+        if last_now is not None and now_ts < last_now:
+            self._async_time_rolled_back(now)
+
+        heap = self._heap
+        # Callbacks scheduled while processing this tick wait for the next one
+        limit = next(self._sequence)
+        deferred = []
+
+        while heap and heap[0][0] <= now_ts:
+            entry = heapq.heappop(heap)
+            handle = entry[2]
+
+            if handle.cancelled:
+                continue
+
+            if entry[1] > limit:
+                deferred.append(entry)
+                continue
+
+            handle.cancel()
+            self._hass.async_run_job(handle.action, now)
+
+            # Heap might have been rebuilt by a cancellation
+            heap = self._heap
+
+        for entry in deferred:
+            heapq.heappush(heap, entry)
+
+    @callback
+    def _async_time_rolled_back(self, now: datetime.datetime) -> None:
+        """Reschedule callbacks that asked to handle the clock jumping back."""
+        handles = [
+            entry[2]
+            for entry in sorted(self._heap, key=lambda entry: entry[1])
+            if not entry[2].cancelled and entry[2].rollback_action is not None
+        ]
+
+        for handle in handles:
+            handle.cancel()
+            self._hass.async_run_job(handle.rollback_action, now)
+
+
+def _timestamp(value: datetime.datetime) -> float:
+    """Return the POSIX timestamp of a datetime, treating naive ones as UTC."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=dt_util.UTC)
+    return value.timestamp()
 
 
 class State:
@@ -693,6 +963,8 @@ class State:
         "last_changed",
         "last_updated",
         "context",
+        "_as_dict",
+        "_as_json",
     ]
 
     def __init__(
@@ -728,6 +1000,8 @@ class State:
         self.last_updated = last_updated or dt_util.utcnow()
         self.last_changed = last_changed or self.last_updated
         self.context = context or Context()
+        self._as_dict: Optional[Dict] = None
+        self._as_json: Optional[str] = None
 
     @property
     def domain(self) -> str:
@@ -753,15 +1027,37 @@ class State:
 
         To be used for JSON serialization.
         Ensures: state == State.from_dict(state.as_dict())
+
+        The dict is created once and can't be modified, a state is not
+        changed after it is set in the state machine.
         """
-        return {
-            "entity_id": self.entity_id,
-            "state": self.state,
-            "attributes": dict(self.attributes),
-            "last_changed": self.last_changed,
-            "last_updated": self.last_updated,
-            "context": self.context.as_dict(),
-        }
+        if self._as_dict is None:
+            self._as_dict = ReadOnlyDict(
+                {
+                    "entity_id": self.entity_id,
+                    "state": self.state,
+                    "attributes": ReadOnlyDict(self.attributes),
+                    "last_changed": self.last_changed,
+                    "last_updated": self.last_updated,
+                    "context": ReadOnlyDict(self.context.as_dict()),
+                }
+            )
+        return self._as_dict
+
+    def as_json(self) -> str:
+        """Return the JSON representation of the State.
+
+        Async friendly.
+
+        The JSON is encoded once, raises ValueError or TypeError if the state
+        can't be encoded.
+        """
+        if self._as_json is None:
+            # pylint: disable=import-outside-toplevel
+            from homeassistant.helpers.json import JSONEncoder
+
+            self._as_json = json.dumps(self.as_dict(), cls=JSONEncoder, allow_nan=False)
+        return self._as_json
 
     @classmethod
     def from_dict(cls, json_dict: Dict) -> Any:
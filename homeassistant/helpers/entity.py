@@ -5,7 +5,7 @@ from datetime import datetime, timedelta
 import functools as ft
 import logging
 from timeit import default_timer as timer
-from typing import Any, Dict, Iterable, List, Optional, Union
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
 
 from homeassistant.config import DATA_CUSTOMIZE
 from homeassistant.const import (
@@ -25,7 +25,7 @@ from homeassistant.const import (
     TEMP_CELSIUS,
     TEMP_FAHRENHEIT,
 )
-from homeassistant.core import CALLBACK_TYPE, Context, HomeAssistant, callback
+from homeassistant.core import CALLBACK_TYPE, Context, HomeAssistant, State, callback
 from homeassistant.exceptions import NoEntitySpecifiedError
 from homeassistant.helpers.entity_platform import EntityPlatform
 from homeassistant.helpers.entity_registry import (
@@ -119,6 +119,11 @@ class Entity(ABC):
     _context: Optional[Context] = None
     _context_set: Optional[datetime] = None
 
+    # Static attributes of the state when cache_static_attributes is set
+    _static_attributes: Optional[Tuple[Dict[str, Any], Dict[str, Any]]] = None
+    # The dynamic part of the last write and the state it wrote
+    _last_write: Optional[Tuple[tuple, Optional[State]]] = None
+
     @property
     def should_poll(self) -> bool:
         """Return True if entity has to be polled for state.
@@ -228,6 +233,18 @@ class Entity(ABC):
         """Flag supported features."""
         return None
 
+    @property
+    def cache_static_attributes(self) -> bool:
+        """Return True if the static attributes of the state may be cached.
+
+        The capability attributes, unit of measurement, name, icon, entity
+        picture, hidden, assumed state, supported features and device class
+        are then read once, and writes that do not change the state, state
+        attributes or device state attributes are skipped. Entities must call
+        async_invalidate_static_attributes when one of those changes.
+        """
+        return False
+
     @property
     def context_recent_time(self) -> timedelta:
         """Time that a context is considered recent."""
@@ -252,6 +269,12 @@ class Entity(ABC):
         """
         return self.registry_entry is None or not self.registry_entry.disabled
 
+    @callback
+    def async_invalidate_static_attributes(self) -> None:
+        """Read the static attributes again on the next write."""
+        self._static_attributes = None
+        self._last_write = None
+
     @callback
     def async_set_context(self, context: Context) -> None:
         """Set the context the entity currently operates under."""
@@ -311,11 +334,16 @@ class Entity(ABC):
 
         start = timer()
 
-        attr = self.capability_attributes
-        attr = dict(attr) if attr else {}
+        if self.cache_static_attributes:
+            if self._static_attributes is None:
+                self._static_attributes = self._async_static_attributes()
+            capability_attr, static_attr = self._static_attributes
+        else:
+            capability_attr, static_attr = self._async_static_attributes()
 
         if not self.available:
             state = STATE_UNAVAILABLE
+            state_attr = device_attr = None
         else:
             state = self.state
 
@@ -324,42 +352,8 @@ class Entity(ABC):
             else:
                 state = str(state)
 
-            attr.update(self.state_attributes or {})
-            attr.update(self.device_state_attributes or {})
-
-        unit_of_measurement = self.unit_of_measurement
-        if unit_of_measurement is not None:
-            attr[ATTR_UNIT_OF_MEASUREMENT] = unit_of_measurement
-
-        entry = self.registry_entry
-        # pylint: disable=consider-using-ternary
-        name = (entry and entry.name) or self.name
-        if name is not None:
-            attr[ATTR_FRIENDLY_NAME] = name
-
-        icon = self.icon
-        if icon is not None:
-            attr[ATTR_ICON] = icon
-
-        entity_picture = self.entity_picture
-        if entity_picture is not None:
-            attr[ATTR_ENTITY_PICTURE] = entity_picture
-
-        hidden = self.hidden
-        if hidden:
-            attr[ATTR_HIDDEN] = hidden
-
-        assumed_state = self.assumed_state
-        if assumed_state:
-            attr[ATTR_ASSUMED_STATE] = assumed_state
-
-        supported_features = self.supported_features
-        if supported_features is not None:
-            attr[ATTR_SUPPORTED_FEATURES] = supported_features
-
-        device_class = self.device_class
-        if device_class is not None:
-            attr[ATTR_DEVICE_CLASS] = str(device_class)
+            state_attr = self.state_attributes
+            device_attr = self.device_state_attributes
 
         end = timer()
 
@@ -374,6 +368,39 @@ class Entity(ABC):
                 end - start,
             )
 
+        if (
+            self._context is not None
+            and dt_util.utcnow() - self._context_set > self.context_recent_time
+        ):
+            self._context = None
+            self._context_set = None
+
+        force_update = self.force_update
+        old_state = self.hass.states.get(self.entity_id)
+
+        write_key = None
+        if self.cache_static_attributes and not force_update:
+            # Customize and the unit system are replaced when reloaded
+            write_key = (
+                state,
+                state_attr and dict(state_attr),
+                device_attr and dict(device_attr),
+                self.hass.data.get(DATA_CUSTOMIZE),
+                self.hass.config.units,
+            )
+            if (
+                self._last_write is not None
+                and self._last_write[1] is old_state
+                and self._last_write[0] == write_key
+            ):
+                self._async_count_noop_write()
+                return
+
+        attr = dict(capability_attr)
+        attr.update(state_attr or {})
+        attr.update(device_attr or {})
+        attr.update(static_attr)
+
         # Overwrite properties that have been set in the config file.
         if DATA_CUSTOMIZE in self.hass.data:
             attr.update(self.hass.data[DATA_CUSTOMIZE].get(self.entity_id))
@@ -394,17 +421,69 @@ class Entity(ABC):
             # Could not convert state to float
             pass
 
-        if (
-            self._context is not None
-            and dt_util.utcnow() - self._context_set > self.context_recent_time
-        ):
-            self._context = None
-            self._context_set = None
-
         self.hass.states.async_set(
-            self.entity_id, state, attr, self.force_update, self._context
+            self.entity_id, state, attr, force_update, self._context
         )
 
+        new_state = self.hass.states.get(self.entity_id)
+        if new_state is old_state and not force_update:
+            self._async_count_noop_write()
+
+        if write_key is not None:
+            self._last_write = (write_key, new_state)
+
+    @callback
+    def _async_static_attributes(self) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Return the capability attributes and the other static attributes.
+
+        The state attributes are merged on top of the capability attributes,
+        the other static attributes are merged on top of those.
+        """
+        capability_attr = self.capability_attributes or {}
+        attr: Dict[str, Any] = {}
+
+        unit_of_measurement = self.unit_of_measurement
+        if unit_of_measurement is not None:
+            attr[ATTR_UNIT_OF_MEASUREMENT] = unit_of_measurement
+
+        entry = self.registry_entry
+        # pylint: disable=consider-using-ternary
+        name = (entry and entry.name) or self.name
+        if name is not None:
+            attr[ATTR_FRIENDLY_NAME] = name
+
+        icon = self.icon
+        if icon is not None:
+            attr[ATTR_ICON] = icon
+
+        entity_picture = self.entity_picture
+        if entity_picture is not None:
+            attr[ATTR_ENTITY_PICTURE] = entity_picture
+
+        hidden = self.hidden
+        if hidden:
+            attr[ATTR_HIDDEN] = hidden
+
+        assumed_state = self.assumed_state
+        if assumed_state:
+            attr[ATTR_ASSUMED_STATE] = assumed_state
+
+        supported_features = self.supported_features
+        if supported_features is not None:
+            attr[ATTR_SUPPORTED_FEATURES] = supported_features
+
+        device_class = self.device_class
+        if device_class is not None:
+            attr[ATTR_DEVICE_CLASS] = str(device_class)
+
+        return capability_attr, attr
+
+    @callback
+    def _async_count_noop_write(self) -> None:
+        """Count a write that did not change the state of the entity."""
+        if self.platform is not None:
+            self.platform.noop_state_writes += 1
+
     def schedule_update_ha_state(self, force_refresh=False):
         """Schedule an update ha state change task.
 
@@ -534,6 +613,7 @@ class Entity(ABC):
             return
 
         if self.registry_entry.entity_id == old.entity_id:
+            self.async_invalidate_static_attributes()
             self.async_write_ha_state()
             return
 
@@ -58,6 +58,8 @@ class EntityPlatform:
         # Method to cancel the retry of setup
         self._async_cancel_retry_setup = None
         self._process_updates = None
+        # Number of state writes of the entities that changed nothing
+        self.noop_state_writes = 0
 
         # Platform is None for the EntityComponent "catch-all" EntityPlatform
         # which powers entity_component.add_entities
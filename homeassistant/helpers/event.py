@@ -1,7 +1,10 @@
 """Helpers for listening to events."""
 from datetime import datetime, timedelta
 import functools as ft
-from typing import Any, Callable, Dict, Iterable, Optional, Union, cast
+import heapq
+import itertools
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union, cast
 
 import attr
 
@@ -14,13 +17,25 @@ from homeassistant.const import (
     SUN_EVENT_SUNRISE,
     SUN_EVENT_SUNSET,
 )
-from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, State, callback
+from homeassistant.core import (
+    CALLBACK_TYPE,
+    Event,
+    HomeAssistant,
+    State,
+    callback,
+    split_entity_id,
+)
+from homeassistant.exceptions import TemplateError
 from homeassistant.helpers.sun import get_astral_event_next
-from homeassistant.helpers.template import Template
+from homeassistant.helpers.template import RenderInfo, Template
 from homeassistant.loader import bind_hass
 from homeassistant.util import dt as dt_util
 from homeassistant.util.async_ import run_callback_threadsafe
 
+DATA_STATE_CHANGE_INDEX = "track_state_change_index"
+
+_LOGGER = logging.getLogger(__name__)
+
 # PyLint does not like the use of threaded_listener_factory
 # pylint: disable=invalid-name
 
@@ -81,12 +96,6 @@ def async_track_state_change(
     @callback
     def state_change_listener(event: Event) -> None:
         """Handle specific state changes."""
-        if (
-            entity_ids != MATCH_ALL
-            and cast(str, event.data.get("entity_id")) not in entity_ids
-        ):
-            return
-
         old_state = event.data.get("old_state")
         if old_state is not None:
             old_state = old_state.state
@@ -103,12 +112,159 @@ def async_track_state_change(
                 event.data.get("new_state"),
             )
 
-    return hass.bus.async_listen(EVENT_STATE_CHANGED, state_change_listener)
+    return _async_get_state_change_index(hass).async_add(
+        entity_ids, state_change_listener
+    )
 
 
 track_state_change = threaded_listener_factory(async_track_state_change)
 
 
+class _StateChangeIndex:
+    """Dispatch state changed events to trackers indexed by entity id.
+
+    A single state changed listener is attached to the bus while trackers
+    exist, which only runs the trackers of the changed entity, the trackers
+    of its domain and the trackers that follow all entities.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the index."""
+        self._hass = hass
+        self._by_entity_id: Dict[str, List[Tuple[int, Callable]]] = {}
+        self._by_domain: Dict[str, List[Tuple[int, Callable]]] = {}
+        self._match_all: List[Tuple[int, Callable]] = []
+        self._sequence = itertools.count()
+        self._indexed = 0
+        self._unsub: Optional[CALLBACK_TYPE] = None
+
+    @property
+    def info(self) -> Dict[str, int]:
+        """Return the number of trackers by type."""
+        return {
+            "indexed": self._indexed,
+            "wildcard": len(self._match_all),
+            "entities": len(self._by_entity_id),
+            "domains": len(self._by_domain),
+        }
+
+    @callback
+    def async_add(
+        self,
+        entity_ids: Union[str, Iterable[str]],
+        listener: Callable,
+        domains: Iterable[str] = (),
+    ) -> CALLBACK_TYPE:
+        """Add a tracker for entity ids and domains or MATCH_ALL."""
+        entry = (next(self._sequence), listener)
+
+        if entity_ids != MATCH_ALL:
+            entity_ids = set(entity_ids)
+            domains = set(domains)
+
+        if entity_ids == MATCH_ALL:
+            self._match_all.append(entry)
+        else:
+            for entity_id in entity_ids:
+                self._by_entity_id.setdefault(entity_id, []).append(entry)
+            for domain in domains:
+                self._by_domain.setdefault(domain, []).append(entry)
+            self._indexed += 1
+
+        if self._unsub is None:
+            self._unsub = self._hass.bus.async_listen(
+                EVENT_STATE_CHANGED, self._async_dispatch
+            )
+
+        removed = False
+
+        @callback
+        def remove_listener() -> None:
+            """Remove the tracker."""
+            nonlocal removed
+            if removed:
+                _LOGGER.warning("Unable to remove unknown listener %s", listener)
+                return
+            removed = True
+
+            if entity_ids == MATCH_ALL:
+                self._match_all.remove(entry)
+            else:
+                _remove_tracker(self._by_entity_id, entity_ids, entry)
+                _remove_tracker(self._by_domain, domains, entry)
+                self._indexed -= 1
+
+            if (
+                not self._match_all
+                and not self._by_entity_id
+                and not self._by_domain
+                and self._unsub
+            ):
+                self._unsub()
+                self._unsub = None
+
+        return remove_listener
+
+    @callback
+    def _async_dispatch(self, event: Event) -> None:
+        """Run the trackers for the changed entity."""
+        entity_id = cast(str, event.data.get("entity_id"))
+        matching = [
+            trackers
+            for trackers in (
+                self._by_entity_id.get(entity_id),
+                self._by_domain.get(split_entity_id(entity_id)[0])
+                if self._by_domain
+                else None,
+                self._match_all,
+            )
+            if trackers
+        ]
+
+        if not matching:
+            return
+        if len(matching) == 1:
+            trackers = list(matching[0])
+        else:
+            # Keep the order in which the trackers were added
+            trackers = list(heapq.merge(*matching))
+
+        for _, listener in trackers:
+            try:
+                listener(event)
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Error tracking state change of %s", entity_id)
+
+
+def _remove_tracker(
+    index: Dict[str, List[Tuple[int, Callable]]],
+    keys: Iterable[str],
+    entry: Tuple[int, Callable],
+) -> None:
+    """Remove a tracker from the lists of the given keys."""
+    for key in keys:
+        trackers = index[key]
+        trackers.remove(entry)
+        if not trackers:
+            del index[key]
+
+
+@callback
+def _async_get_state_change_index(hass: HomeAssistant) -> _StateChangeIndex:
+    """Return the state change index of a Home Assistant instance."""
+    index = hass.data.get(DATA_STATE_CHANGE_INDEX)
+    if index is None:
+        index = hass.data[DATA_STATE_CHANGE_INDEX] = _StateChangeIndex(hass)
+    return cast(_StateChangeIndex, index)
+
+
+@callback
+@bind_hass
+def async_state_change_tracker_info(hass: HomeAssistant) -> Dict[str, int]:
+    """Return the number of indexed and wildcard state change trackers."""
+    return _async_get_state_change_index(hass).info
+
+
 @callback
 @bind_hass
 def async_track_template(
@@ -118,32 +274,156 @@ def async_track_template(
     variables: Optional[Dict[str, Any]] = None,
 ) -> CALLBACK_TYPE:
     """Add a listener that track state changes with template condition."""
-    from . import condition
-
     # Local variable to keep track of if the action has already been triggered
     already_triggered = False
 
     @callback
-    def template_condition_listener(entity_id: str, from_s: State, to_s: State) -> None:
+    def template_condition_listener(
+        event: Event,
+        template: Template,
+        last_result: Union[str, TemplateError],
+        result: Union[str, TemplateError],
+    ) -> None:
         """Check if condition is correct and run action."""
         nonlocal already_triggered
-        template_result = condition.async_template(hass, template, variables)
+        if isinstance(result, TemplateError):
+            _LOGGER.error("Error during template condition: %s", result)
+            template_result = False
+        else:
+            template_result = result.lower() == "true"
 
         # Check to see if template returns true
         if template_result and not already_triggered:
             already_triggered = True
-            hass.async_run_job(action, entity_id, from_s, to_s)
+            hass.async_run_job(
+                action,
+                event.data.get("entity_id"),
+                event.data.get("old_state"),
+                event.data.get("new_state"),
+            )
         elif not template_result:
             already_triggered = False
 
-    return async_track_state_change(
-        hass, template.extract_entities(variables), template_condition_listener
-    )
+    return async_track_template_result(
+        hass, template, template_condition_listener, variables
+    ).async_remove
 
 
 track_template = threaded_listener_factory(async_track_template)
 
 
+class TrackTemplateResultInfo:
+    """Re-render a template when a state it read during the last render changes.
+
+    The state changes of the entities read and the domains iterated by the
+    last render are tracked, and updated after every render.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        template: Template,
+        action: Callable[[Event, Template, Any, Any], None],
+        variables: Optional[Dict[str, Any]],
+    ) -> None:
+        """Initialize the tracker."""
+        self.hass = hass
+        self._template = template
+        self._action = action
+        self._variables = variables
+        self._info: Optional[RenderInfo] = None
+        self._last_result: Union[str, TemplateError, None] = None
+        self._unsub_state_changed: Optional[CALLBACK_TYPE] = None
+
+    @property
+    def last_result(self) -> Union[str, TemplateError, None]:
+        """Return the result or error of the last render."""
+        return self._last_result
+
+    @callback
+    def async_setup(self) -> None:
+        """Render the template and track the states it read."""
+        self._render()
+
+    @callback
+    def async_remove(self) -> None:
+        """Stop tracking the template."""
+        if self._unsub_state_changed is not None:
+            self._unsub_state_changed()
+            self._unsub_state_changed = None
+
+    @callback
+    def _render(self) -> None:
+        """Render the template and update the tracked states."""
+        info = self._template.async_render_to_info(self._variables)
+        try:
+            self._last_result = info.result
+        except TemplateError as ex:
+            self._last_result = ex
+
+        last_info, self._info = self._info, info
+        if (
+            last_info is not None
+            and last_info.all_states == info.all_states
+            and last_info.domains == info.domains
+            and last_info.entities == info.entities
+        ):
+            return
+
+        self.async_remove()
+        if self._template.is_static:
+            return
+        if info.all_states or not (info.entities or info.domains):
+            # Templates that read no states are rendered on every state
+            # change, like templates we could not extract entities from
+            self._unsub_state_changed = _async_get_state_change_index(
+                self.hass
+            ).async_add(MATCH_ALL, self._async_state_changed)
+        else:
+            self._unsub_state_changed = _async_get_state_change_index(
+                self.hass
+            ).async_add(
+                # Entities of a tracked domain are already tracked
+                {
+                    entity_id
+                    for entity_id in info.entities
+                    if split_entity_id(entity_id)[0] not in info.domains
+                },
+                self._async_state_changed,
+                info.domains,
+            )
+
+    @callback
+    def _async_state_changed(self, event: Event) -> None:
+        """Re-render the template and pass the result to the action."""
+        last_result = self._last_result
+        self._render()
+        self.hass.async_run_job(
+            self._action, event, self._template, last_result, self._last_result
+        )
+
+
+@callback
+@bind_hass
+def async_track_template_result(
+    hass: HomeAssistant,
+    template: Template,
+    action: Callable[[Event, Template, Any, Any], None],
+    variables: Optional[Dict[str, Any]] = None,
+) -> TrackTemplateResultInfo:
+    """Render a template each time a state it read changes.
+
+    The action is called with the state changed event, the template, and the
+    previous and new results. A result is the rendered string or the
+    TemplateError raised by the render. The template is rendered once when
+    tracking starts, the result is available as last_result of the returned
+    tracker. Call async_remove on the tracker to stop tracking.
+    """
+    info = TrackTemplateResultInfo(hass, template, action, variables)
+    info.async_setup()
+    return info
+
+
 @callback
 @bind_hass
 def async_track_same_state(
@@ -232,26 +512,11 @@ def async_track_point_in_utc_time(
     point_in_time = dt_util.as_utc(point_in_time)
 
     @callback
-    def point_in_time_listener(event: Event) -> None:
-        """Listen for matching time_changed events."""
-        now = event.data[ATTR_NOW]
-
-        if now < point_in_time or hasattr(point_in_time_listener, "run"):
-            return
-
-        # Set variable so that we will never run twice.
-        # Because the event bus might have to wait till a thread comes
-        # available to execute this listener it might occur that the
-        # listener gets lined up twice to be executed. This will make
-        # sure the second time it does nothing.
-        setattr(point_in_time_listener, "run", True)
-        async_unsub()
-
+    def point_in_time_listener(now: datetime) -> None:
+        """Run the action once the point in time has been reached."""
         hass.async_run_job(action, now)
 
-    async_unsub = hass.bus.async_listen(EVENT_TIME_CHANGED, point_in_time_listener)
-
-    return async_unsub
+    return hass.scheduler.async_schedule(point_in_time, point_in_time_listener).cancel
 
 
 track_point_in_utc_time = threaded_listener_factory(async_track_point_in_utc_time)
@@ -416,42 +681,54 @@ def async_track_utc_time_change(
     matching_minutes = dt_util.parse_time_expression(minute, 0, 59)
     matching_hours = dt_util.parse_time_expression(hour, 0, 23)
 
-    next_time = None
-
-    def calculate_next(now: datetime) -> None:
-        """Calculate and set the next time the trigger should fire."""
-        nonlocal next_time
+    handle = None
 
+    def calculate_next(now: datetime) -> datetime:
+        """Calculate the next time the trigger should fire."""
         localized_now = dt_util.as_local(now) if local else now
-        next_time = dt_util.find_next_time_expression_time(
+        return dt_util.find_next_time_expression_time(
             localized_now, matching_seconds, matching_minutes, matching_hours
         )
 
-    # Make sure rolling back the clock doesn't prevent the timer from
-    # triggering.
-    last_now: Optional[datetime] = None
-
     @callback
-    def pattern_time_change_listener(event: Event) -> None:
-        """Listen for matching time_changed events."""
-        nonlocal next_time, last_now
-
-        now = event.data[ATTR_NOW]
+    def schedule(next_time: datetime) -> None:
+        """Schedule the next run of the action."""
+        nonlocal handle
+        handle = hass.scheduler.async_schedule(
+            next_time, pattern_time_change_listener, calculate_listener
+        )
 
-        if last_now is None or now < last_now:
-            # Time rolled back or next time not yet calculated
-            calculate_next(now)
+    @callback
+    def pattern_time_change_listener(now: datetime) -> None:
+        """Run the action when the next matching time has been reached."""
+        hass.async_run_job(action, dt_util.as_local(now) if local else now)
+        schedule(calculate_next(now + timedelta(seconds=1)))
 
-        last_now = now
+    @callback
+    def calculate_listener(now: datetime) -> None:
+        """Calculate the next time based on the current time tick."""
+        next_time = calculate_next(now)
 
         if next_time <= now:
-            hass.async_run_job(action, dt_util.as_local(now) if local else now)
-            calculate_next(now + timedelta(seconds=1))
+            pattern_time_change_listener(now)
+        else:
+            schedule(next_time)
+
+    # The next time is calculated on the first time tick and again if the
+    # system time abruptly jumps backwards, so rolling back the clock doesn't
+    # prevent the timer from triggering.
+    handle = hass.scheduler.async_schedule(
+        datetime.min.replace(tzinfo=dt_util.UTC),
+        calculate_listener,
+        calculate_listener,
+    )
 
-    # We can't use async_track_point_in_utc_time here because it would
-    # break in the case that the system time abruptly jumps backwards.
-    # Our custom last_now logic takes care of resolving that scenario.
-    return hass.bus.async_listen(EVENT_TIME_CHANGED, pattern_time_change_listener)
+    @callback
+    def remove_listener() -> None:
+        """Remove the pattern listener."""
+        handle.cancel()
+
+    return remove_listener
 
 
 track_utc_time_change = threaded_listener_factory(async_track_utc_time_change)
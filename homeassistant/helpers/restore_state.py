@@ -1,12 +1,20 @@
 """Support for restoring entity states on startup."""
 import asyncio
+from contextlib import suppress
 from datetime import datetime, timedelta
+import json
 import logging
+import os
 from typing import Any, Dict, List, Optional, Set
 
-from homeassistant.const import EVENT_HOMEASSISTANT_START, EVENT_HOMEASSISTANT_STOP
+from homeassistant.const import (
+    EVENT_HOMEASSISTANT_START,
+    EVENT_HOMEASSISTANT_STOP,
+    EVENT_STATE_CHANGED,
+)
 from homeassistant.core import (
     CoreState,
+    Event,
     HomeAssistant,
     State,
     callback,
@@ -30,9 +38,14 @@ _LOGGER = logging.getLogger(__name__)
 STORAGE_KEY = "core.restore_state"
 STORAGE_VERSION = 1
 
-# How long between periodically saving the current states to disk
+# How long between periodically saving the changed states to disk
 STATE_DUMP_INTERVAL = timedelta(minutes=15)
 
+# The changed states are appended to this file between full dumps
+JOURNAL_SUFFIX = ".journal"
+# Minimum number of journal lines before the states are dumped in full
+JOURNAL_MIN_COMPACT_LINES = 1000
+
 # How long should a saved state be preserved if the entity no longer exists
 STATE_EXPIRATION = timedelta(days=7)
 
@@ -89,7 +102,17 @@ class RestoreStateData:
                         for item in stored_states
                         if valid_entity_id(item["state"]["entity_id"])
                     }
-                    _LOGGER.debug("Created cache with %s", list(data.last_states))
+
+                try:
+                    journal = await hass.async_add_executor_job(
+                        _read_journal, data.journal_path
+                    )
+                except OSError as exc:
+                    _LOGGER.error("Error loading changed states", exc_info=exc)
+                    journal = []
+
+                data.async_apply_journal(journal)
+                _LOGGER.debug("Created cache with %s", list(data.last_states))
 
                 if hass.state == CoreState.running:
                     data.async_setup_dump()
@@ -114,6 +137,33 @@ class RestoreStateData:
         )
         self.last_states: Dict[str, StoredState] = {}
         self.entity_ids: Set[str] = set()
+        # Entities of which the state changed since the last dump
+        self._dirty_entity_ids: Set[str] = set()
+        self._journal_lines = 0
+        self._dumped_states = 0
+        self._dump_lock = asyncio.Lock()
+
+    @property
+    def journal_path(self) -> str:
+        """Return the path of the journal of changed states."""
+        return f"{self.store.path}{JOURNAL_SUFFIX}"
+
+    @callback
+    def async_apply_journal(self, journal: List[Dict]) -> None:
+        """Update the last states with the states read from the journal."""
+        for item in journal:
+            entity_id = item["state"]["entity_id"]
+            if not valid_entity_id(entity_id):
+                continue
+
+            stored_state = StoredState.from_dict(item)
+            last_state = self.last_states.get(entity_id)
+            # Lines of a journal that was not removed after the last full
+            # dump are older than the dumped states
+            if last_state is None or stored_state.last_seen >= last_state.last_seen:
+                self.last_states[entity_id] = stored_state
+
+        self._journal_lines = len(journal)
 
     @callback
     def async_get_stored_states(self) -> List[StoredState]:
@@ -157,18 +207,87 @@ class RestoreStateData:
 
         return stored_states
 
+    @callback
+    def async_get_changed_stored_states(self) -> List[StoredState]:
+        """Get the states of the entities that changed since the last dump."""
+        now = dt_util.utcnow()
+        stored_states = []
+
+        for entity_id in self._dirty_entity_ids:
+            state = self.hass.states.get(entity_id)
+
+            if (
+                entity_id in self.entity_ids
+                and state is not None
+                and not state.attributes.get(entity_registry.ATTR_RESTORED)
+            ):
+                stored_states.append(StoredState(state, now))
+            elif entity_id in self.last_states:
+                # The entity was removed during this run
+                stored_states.append(self.last_states[entity_id])
+
+        return stored_states
+
     async def async_dump_states(self) -> None:
         """Save the current state machine to storage."""
         _LOGGER.debug("Dumping states")
-        try:
-            await self.store.async_save(
-                [
-                    stored_state.as_dict()
-                    for stored_state in self.async_get_stored_states()
-                ]
-            )
-        except HomeAssistantError as exc:
-            _LOGGER.error("Error saving current states", exc_info=exc)
+        async with self._dump_lock:
+            dirty_entity_ids = self._dirty_entity_ids
+            self._dirty_entity_ids = set()
+            stored_states = self.async_get_stored_states()
+
+            try:
+                await self.store.async_save(
+                    [stored_state.as_dict() for stored_state in stored_states]
+                )
+            except HomeAssistantError as exc:
+                _LOGGER.error("Error saving current states", exc_info=exc)
+                self._dirty_entity_ids.update(dirty_entity_ids)
+                return
+
+            self._journal_lines = 0
+            self._dumped_states = len(stored_states)
+
+            try:
+                await self.hass.async_add_executor_job(
+                    _remove_journal, self.journal_path
+                )
+            except OSError as exc:
+                _LOGGER.error("Error removing changed states", exc_info=exc)
+
+    async def async_dump_changed_states(self) -> None:
+        """Append the states changed since the last dump to the journal.
+
+        All states are dumped instead once the journal would hold more lines
+        than the last full dump held states.
+        """
+        if self._journal_lines + len(self._dirty_entity_ids) > max(
+            self._dumped_states, JOURNAL_MIN_COMPACT_LINES
+        ):
+            await self.async_dump_states()
+            return
+
+        _LOGGER.debug("Dumping %s changed states", len(self._dirty_entity_ids))
+        async with self._dump_lock:
+            dirty_entity_ids = self._dirty_entity_ids
+            stored_states = self.async_get_changed_stored_states()
+            self._dirty_entity_ids = set()
+
+            if not stored_states:
+                return
+
+            try:
+                await self.hass.async_add_executor_job(
+                    _append_journal,
+                    self.journal_path,
+                    [stored_state.as_dict() for stored_state in stored_states],
+                )
+            except (OSError, TypeError, ValueError) as exc:
+                _LOGGER.error("Error saving changed states", exc_info=exc)
+                self._dirty_entity_ids.update(dirty_entity_ids)
+                return
+
+            self._journal_lines += len(stored_states)
 
     @callback
     def async_setup_dump(self, *args: Any) -> None:
@@ -177,13 +296,26 @@ class RestoreStateData:
         def _async_dump_states(*_: Any) -> None:
             self.hass.async_create_task(self.async_dump_states())
 
+        def _async_dump_changed_states(*_: Any) -> None:
+            self.hass.async_create_task(self.async_dump_changed_states())
+
+        @callback
+        def _async_state_changed(event: Event) -> None:
+            entity_id = event.data["entity_id"]
+            if entity_id in self.entity_ids:
+                self._dirty_entity_ids.add(entity_id)
+
+        self.hass.bus.async_listen(EVENT_STATE_CHANGED, _async_state_changed)
+
         # Dump the initial states now. This helps minimize the risk of having
         # old states loaded by overwriting the last states once Home Assistant
         # has started and the old states have been read.
         _async_dump_states()
 
-        # Dump states periodically
-        async_track_time_interval(self.hass, _async_dump_states, STATE_DUMP_INTERVAL)
+        # Dump changed states periodically
+        async_track_time_interval(
+            self.hass, _async_dump_changed_states, STATE_DUMP_INTERVAL
+        )
 
         # Dump states when stopping hass
         self.hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_dump_states)
@@ -206,10 +338,44 @@ class RestoreStateData:
             state = State.from_dict(_encode_complex(state.as_dict()))
         if state is not None:
             self.last_states[entity_id] = StoredState(state, dt_util.utcnow())
+            self._dirty_entity_ids.add(entity_id)
 
         self.entity_ids.remove(entity_id)
 
 
+def _read_journal(path: str) -> List[Dict]:
+    """Read the stored states appended to a journal."""
+    if not os.path.isfile(path):
+        return []
+
+    journal = []
+    with open(path, encoding="utf-8") as fdesc:
+        for line in fdesc:
+            try:
+                journal.append(json.loads(line))
+            except ValueError:
+                # The line was not completely written
+                _LOGGER.warning("Skipping invalid line in %s", path)
+
+    return journal
+
+
+def _append_journal(path: str, journal: List[Dict]) -> None:
+    """Append stored states to a journal, one JSON object per line."""
+    lines = "".join(
+        json.dumps(item, cls=JSONEncoder, separators=(",", ":")) + "\n"
+        for item in journal
+    )
+    with open(path, "a", encoding="utf-8") as fdesc:
+        fdesc.write(lines)
+
+
+def _remove_journal(path: str) -> None:
+    """Remove a journal once its states are dumped in full."""
+    with suppress(FileNotFoundError):
+        os.remove(path)
+
+
 def _encode(value):
     """Little helper to JSON encode a value."""
     try:
@@ -1,5 +1,6 @@
 """Template helper methods for rendering strings with Home Assistant data."""
 import base64
+from collections import OrderedDict
 from datetime import datetime
 from functools import wraps
 import json
@@ -7,7 +8,8 @@ import logging
 import math
 import random
 import re
-from typing import Any, Dict, Iterable, List, Optional, Union
+import threading
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Union
 
 import jinja2
 from jinja2 import contextfilter, contextfunction
@@ -48,6 +50,9 @@ _RE_GET_ENTITIES = re.compile(
 )
 _RE_JINJA_DELIMITERS = re.compile(r"\{%|\{\{")
 
+# Number of compiled templates kept by each template environment
+COMPILED_CACHE_SIZE = 1024
+
 
 @bind_hass
 def attach(hass, obj):
@@ -139,6 +144,22 @@ class RenderInfo:
             or entity_id in self._entities
         )
 
+    @property
+    def all_states(self) -> bool:
+        """Return if the render iterated over all states."""
+        return self._all_states
+
+    @property
+    def domains(self) -> FrozenSet[str]:
+        """Return the domains whose states were iterated during the render."""
+        # Domains are dropped when frozen if all states were iterated
+        return getattr(self, "_domains", frozenset())
+
+    @property
+    def entities(self) -> FrozenSet[str]:
+        """Return the entities whose state was read during the render."""
+        return self._entities
+
     @property
     def result(self) -> str:
         """Results of the template computation."""
@@ -181,6 +202,11 @@ class Template:
             ret = self.hass.data[_ENVIRONMENT] = TemplateEnvironment(self.hass)
         return ret
 
+    @property
+    def is_static(self) -> bool:
+        """Return if the template has no Jinja syntax and renders as is."""
+        return _RE_JINJA_DELIMITERS.search(self.template) is None
+
     def ensure_valid(self):
         """Return if template is valid."""
         if self._compiled_code is not None:
@@ -257,7 +283,8 @@ class Template:
     ):
         """Render template with value exposed.
 
-        If valid JSON will expose value_json too.
+        If valid JSON will expose value_json too. The JSON is not decoded if
+        the variables already contain value_json.
 
         This method must be run in the event loop.
         """
@@ -267,10 +294,11 @@ class Template:
         variables = dict(variables or {})
         variables["value"] = value
 
-        try:
-            variables["value_json"] = json.loads(value)
-        except (ValueError, TypeError):
-            pass
+        if "value_json" not in variables:
+            try:
+                variables["value_json"] = json.loads(value)
+            except (ValueError, TypeError):
+                pass
 
         try:
             return self._compiled.render(variables).strip()
@@ -919,6 +947,10 @@ class TemplateEnvironment(ImmutableSandboxedEnvironment):
         """Initialise template environment."""
         super().__init__()
         self.hass = hass
+        self._compiled_cache: "OrderedDict[str, Any]" = OrderedDict()
+        self._compiled_cache_lock = threading.Lock()
+        self.compiled_cache_hits = 0
+        self.compiled_cache_misses = 0
         self.filters["round"] = forgiving_round
         self.filters["multiply"] = multiply
         self.filters["log"] = logarithm
@@ -994,6 +1026,38 @@ class TemplateEnvironment(ImmutableSandboxedEnvironment):
         self.globals["state_attr"] = hassfunction(state_attr)
         self.globals["states"] = AllStates(hass)
 
+    def compile(self, source, name=None, filename=None, raw=False, defer_init=False):
+        """Compile a template source, reusing the code of identical sources.
+
+        Many templates share the same source, like the value templates of MQTT
+        discovered entities, so the compiled code is kept in an LRU cache.
+        """
+        if (
+            name is not None
+            or filename is not None
+            or raw
+            or defer_init
+            or not isinstance(source, str)
+        ):
+            return super().compile(source, name, filename, raw, defer_init)
+
+        with self._compiled_cache_lock:
+            code = self._compiled_cache.get(source)
+            if code is not None:
+                self._compiled_cache.move_to_end(source)
+                self.compiled_cache_hits += 1
+                return code
+
+        code = super().compile(source)
+
+        with self._compiled_cache_lock:
+            self.compiled_cache_misses += 1
+            self._compiled_cache[source] = code
+            if len(self._compiled_cache) > COMPILED_CACHE_SIZE:
+                self._compiled_cache.popitem(last=False)
+
+        return code
+
     def is_safe_callable(self, obj):
         """Test if callback is safe."""
         return isinstance(obj, AllStates) or super().is_safe_callable(obj)
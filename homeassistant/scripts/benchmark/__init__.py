@@ -8,7 +8,12 @@ from timeit import default_timer as timer
 from typing import Callable, Dict
 
 from homeassistant import core
-from homeassistant.const import ATTR_NOW, EVENT_STATE_CHANGED, EVENT_TIME_CHANGED
+from homeassistant.const import (
+    ATTR_NOW,
+    EVENT_STATE_CHANGED,
+    EVENT_TIME_CHANGED,
+    MATCH_ALL,
+)
 from homeassistant.util import dt as dt_util
 
 # mypy: allow-untyped-calls, allow-untyped-defs, no-check-untyped-defs
@@ -67,11 +72,51 @@ async def async_million_events(hass):
 
     hass.bus.async_listen(event_name, listener)
 
+    start = timer()
+
     for _ in range(10 ** 6):
         hass.bus.async_fire(event_name)
 
+    await event.wait()
+
+    return timer() - start
+
+
+@benchmark
+async def async_million_events_mixed_listeners(hass):
+    """Run a million events through callback, coroutine and match all listeners."""
+    count = 0
+    event_name = "benchmark_event"
+    event = asyncio.Event()
+
+    @core.callback
+    def listener(_):
+        """Handle event."""
+        nonlocal count
+        count += 1
+
+        if count == 3 * 10 ** 6:
+            event.set()
+
+    async def async_listener(event):
+        """Handle event in a coroutine."""
+        listener(event)
+
+    @core.callback
+    def match_all_listener(event):
+        """Handle all events."""
+        if event.event_type == event_name:
+            listener(event)
+
+    hass.bus.async_listen(event_name, listener)
+    hass.bus.async_listen(event_name, async_listener)
+    hass.bus.async_listen(MATCH_ALL, match_all_listener)
+
     start = timer()
 
+    for _ in range(10 ** 6):
+        hass.bus.async_fire(event_name)
+
     await event.wait()
 
     return timer() - start
@@ -138,6 +183,47 @@ async def async_million_state_changed_helper(hass):
     return timer() - start
 
 
+@benchmark
+async def async_million_state_writes(hass):
+    """Write a million states of a thousand entities."""
+    entity_ids = [f"sensor.benchmark_{idx}" for idx in range(1000)]
+    attributes = {"unit_of_measurement": "W", "friendly_name": "Benchmark"}
+
+    start = timer()
+
+    for value in range(1000):
+        for entity_id in entity_ids:
+            hass.states.async_set(entity_id, value, attributes)
+
+    return timer() - start
+
+
+@benchmark
+async def mqtt_topic_matching(hass):
+    """Match MQTT messages against 10k subscriptions."""
+    # pylint: disable=import-outside-toplevel
+    from homeassistant.components.mqtt.topic_trie import TopicTrie
+
+    trie = TopicTrie()
+    devices = 2500
+
+    for idx in range(devices):
+        trie.add(f"zigbee2mqtt/device_{idx}", idx)
+        trie.add(f"zigbee2mqtt/device_{idx}/availability", idx)
+        trie.add(f"homeassistant/+/device_{idx}/config", idx)
+        trie.add(f"tele/device_{idx}/#", idx)
+
+    topics = [f"zigbee2mqtt/device_{idx}" for idx in range(devices)]
+
+    start = timer()
+
+    for _ in range(40):
+        for topic in topics:
+            trie.match(topic)
+
+    return timer() - start
+
+
 @benchmark
 @asyncio.coroutine
 def logbook_filtering_state(hass):
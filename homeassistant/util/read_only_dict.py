@@ -0,0 +1,39 @@
+"""Read only dictionary."""
+import copy
+from typing import Any
+
+
+def _readonly(*args: Any, **kwargs: Any) -> Any:
+    """Raise an exception when a read only dict is modified."""
+    raise RuntimeError("Cannot modify ReadOnlyDict")
+
+
+class ReadOnlyDict(dict):
+    """Read only version of dict that is compatible with dict types.
+
+    Copies of a read only dict are regular dicts.
+    """
+
+    __setitem__ = _readonly
+    __delitem__ = _readonly
+    pop = _readonly
+    popitem = _readonly
+    clear = _readonly
+    update = _readonly
+    setdefault = _readonly
+
+    def copy(self) -> dict:
+        """Return a regular dict with the same items."""
+        return dict(self)
+
+    def __copy__(self) -> dict:
+        """Return a regular dict with the same items."""
+        return dict(self)
+
+    def __deepcopy__(self, memo: dict) -> dict:
+        """Return a deep copy as a regular dict."""
+        return copy.deepcopy(dict(self), memo)
+
+    def __reduce__(self) -> Any:
+        """Pickle as a regular dict."""
+        return (dict, (dict(self),))
@@ -0,0 +1,13 @@
+"""Helpers to generate ULID-like identifiers."""
+from random import getrandbits
+import time
+
+
+def ulid_hex() -> str:
+    """Return a ULID-like identifier of 32 hex characters.
+
+    The first 48 bits are the time in milliseconds, so identifiers sort by
+    the time they were created. The other 80 bits are random. Generating
+    one is a lot cheaper than a uuid4.
+    """
+    return "%012x%020x" % (int(time.time() * 1000), getrandbits(80))
@@ -805,6 +805,30 @@ def init_recorder_component(hass, add_config=None):
     _LOGGER.info("In-memory recorder successfully started")
 
 
+def mock_history_loader(fake_states):
+    """Mock the history loader to return the states per entity_id.
+
+    The states at a point in time are not known.
+    """
+    # pylint: disable=import-outside-toplevel
+    from homeassistant.components.history.loader import HistoryLoader
+
+    async def get_states(loader, entity_id, *args, **kwargs):
+        """Return the fake states of the entity."""
+        return fake_states.get(entity_id, [])
+
+    async def get_state_at(loader, entity_id, utc_point_in_time):
+        """Return no state."""
+        return None
+
+    return patch.multiple(
+        HistoryLoader,
+        async_states_during_period=get_states,
+        async_last_states=get_states,
+        async_state_at=get_state_at,
+    )
+
+
 def mock_restore_cache(hass, states):
     """Mock the DATA_RESTORE_CACHE."""
     key = restore_state.DATA_RESTORE_STATE_TASK
@@ -813,7 +837,7 @@ def mock_restore_cache(hass, states):
 
     last_states = {}
     for state in states:
-        restored_state = state.as_dict()
+        restored_state = dict(state.as_dict())
         restored_state["attributes"] = json.loads(
             json.dumps(restored_state["attributes"], cls=JSONEncoder)
         )
@@ -988,6 +1012,20 @@ def mock_storage(data=None):
         # To ensure that the data can be serialized
         data[store.key] = json.loads(json.dumps(data_to_write, cls=store._encoder))
 
+    def mock_read_journal(path):
+        """Mock version of reading a restore state journal."""
+        return data.get(os.path.basename(path), [])
+
+    def mock_append_journal(path, journal):
+        """Mock version of appending to a restore state journal."""
+        data.setdefault(os.path.basename(path), []).extend(
+            json.loads(json.dumps(journal, cls=JSONEncoder))
+        )
+
+    def mock_remove_journal(path):
+        """Mock version of removing a restore state journal."""
+        data.pop(os.path.basename(path), None)
+
     with patch(
         "homeassistant.helpers.storage.Store._async_load",
         side_effect=mock_async_load,
@@ -996,6 +1034,15 @@ def mock_storage(data=None):
         "homeassistant.helpers.storage.Store._write_data",
         side_effect=mock_write_data,
         autospec=True,
+    ), patch(
+        "homeassistant.helpers.restore_state._read_journal",
+        side_effect=mock_read_journal,
+    ), patch(
+        "homeassistant.helpers.restore_state._append_journal",
+        side_effect=mock_append_journal,
+    ), patch(
+        "homeassistant.helpers.restore_state._remove_journal",
+        side_effect=mock_remove_journal,
     ):
         yield data
 
@@ -1,7 +1,6 @@
 """The test for the data filter sensor platform."""
 from datetime import timedelta
 import unittest
-from unittest.mock import patch
 
 from homeassistant.components.filter.sensor import (
     LowPassFilter,
@@ -19,6 +18,7 @@ from tests.common import (
     assert_setup_component,
     get_test_home_assistant,
     init_recorder_component,
+    mock_history_loader,
 )
 
 
@@ -116,26 +116,19 @@ class TestFilterSensor(unittest.TestCase):
                 ]
             }
 
-        with patch(
-            "homeassistant.components.history.state_changes_during_period",
-            return_value=fake_states,
-        ):
-            with patch(
-                "homeassistant.components.history.get_last_state_changes",
-                return_value=fake_states,
-            ):
-                with assert_setup_component(1, "sensor"):
-                    assert setup_component(self.hass, "sensor", config)
-
-                for value in self.values:
-                    self.hass.states.set(config["sensor"]["entity_id"], value.state)
-                    self.hass.block_till_done()
-
-                state = self.hass.states.get("sensor.test")
-                if missing:
-                    assert "18.05" == state.state
-                else:
-                    assert "17.05" == state.state
+        with mock_history_loader(fake_states):
+            with assert_setup_component(1, "sensor"):
+                assert setup_component(self.hass, "sensor", config)
+
+            for value in self.values:
+                self.hass.states.set(config["sensor"]["entity_id"], value.state)
+                self.hass.block_till_done()
+
+            state = self.hass.states.get("sensor.test")
+            if missing:
+                assert "18.05" == state.state
+            else:
+                assert "17.05" == state.state
 
     def test_chain_history_missing(self):
         """Test if filter chaining works when recorder is enabled but the source is not recorded."""
@@ -164,20 +157,13 @@ class TestFilterSensor(unittest.TestCase):
                 ha.State("sensor.test_monitored", 18.2, last_changed=t_2),
             ]
         }
-        with patch(
-            "homeassistant.components.history.state_changes_during_period",
-            return_value=fake_states,
-        ):
-            with patch(
-                "homeassistant.components.history.get_last_state_changes",
-                return_value=fake_states,
-            ):
-                with assert_setup_component(1, "sensor"):
-                    assert setup_component(self.hass, "sensor", config)
+        with mock_history_loader(fake_states):
+            with assert_setup_component(1, "sensor"):
+                assert setup_component(self.hass, "sensor", config)
 
-                self.hass.block_till_done()
-                state = self.hass.states.get("sensor.test")
-                assert "18.0" == state.state
+            self.hass.block_till_done()
+            state = self.hass.states.get("sensor.test")
+            assert "18.0" == state.state
 
     def test_outlier(self):
         """Test if outlier filter works."""
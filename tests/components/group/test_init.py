@@ -16,7 +16,9 @@ from homeassistant.const import (
     STATE_ON,
     STATE_UNKNOWN,
 )
+from homeassistant.helpers.event import async_state_change_tracker_info
 from homeassistant.setup import async_setup_component, setup_component
+from homeassistant.util.async_ import run_callback_threadsafe
 
 from tests.common import assert_setup_component, get_test_home_assistant
 from tests.components.group import common
@@ -415,7 +417,12 @@ class TestComponentsGroup(unittest.TestCase):
             "group.second_group",
             "group.test_group",
         ]
-        assert self.hass.bus.listeners["state_changed"] == 3
+        assert (
+            run_callback_threadsafe(
+                self.hass.loop, async_state_change_tracker_info, self.hass
+            ).result()["indexed"]
+            == 3
+        )
 
         with patch(
             "homeassistant.config.load_yaml_config_file",
@@ -436,7 +443,12 @@ class TestComponentsGroup(unittest.TestCase):
             "group.all_tests",
             "group.hello",
         ]
-        assert self.hass.bus.listeners["state_changed"] == 2
+        assert (
+            run_callback_threadsafe(
+                self.hass.loop, async_state_change_tracker_info, self.hass
+            ).result()["indexed"]
+            == 2
+        )
 
     def test_changing_group_visibility(self):
         """Test that a group can be hidden and shown."""
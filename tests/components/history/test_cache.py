@@ -0,0 +1,137 @@
+"""The tests for the history cache of recent states."""
+from datetime import timedelta
+from unittest.mock import patch
+
+from homeassistant.components import history, recorder
+from homeassistant.components.history.cache import RecentStatesCache
+from homeassistant.setup import async_setup_component
+import homeassistant.util.dt as dt_util
+
+from tests.common import init_recorder_component
+
+
+def _set_state(hass, entity_id, state, point_in_time, attributes=None):
+    """Set a state at a point in time."""
+    with patch("homeassistant.core.dt_util.utcnow", return_value=point_in_time):
+        hass.states.async_set(entity_id, state, attributes)
+
+
+async def test_get_significant_states(hass):
+    """Test the cache returns the same states as the database."""
+    await hass.async_add_job(init_recorder_component, hass)
+    assert await async_setup_component(
+        hass, "history", {"history": {"cache": {"max_states": 10}}}
+    )
+    cache = hass.data[history.DATA_CACHE]
+    now = dt_util.utcnow()
+
+    _set_state(hass, "sensor.power", "10", now + timedelta(seconds=1))
+    _set_state(hass, "sensor.power", "20", now + timedelta(seconds=2))
+    _set_state(hass, "sensor.power", "20", now + timedelta(seconds=3), {"unit": "W"})
+    _set_state(hass, "light.kitchen", "on", now + timedelta(seconds=3))
+    _set_state(hass, "light.hidden", "on", now + timedelta(seconds=3), {"hidden": 1})
+    _set_state(hass, "zone.home", "zoning", now + timedelta(seconds=3))
+    _set_state(hass, "sensor.power", "30", now + timedelta(seconds=4))
+    await hass.async_block_till_done()
+    await hass.async_add_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    filters = history.Filters()
+    for args in (
+        (now, None, None),
+        (now + timedelta(seconds=2.5), None, None),
+        (now + timedelta(seconds=2.5), now + timedelta(seconds=3.5), None),
+        (now + timedelta(seconds=1.5), None, ["sensor.power", "light.kitchen"]),
+    ):
+        expected = await hass.async_add_job(
+            history.get_significant_states, hass, *args, filters
+        )
+        assert cache.async_get_significant_states(*args, filters) == expected
+
+    assert cache.hits == 4
+    assert cache.misses == 0
+
+    # Older than the cache
+    assert cache.async_get_significant_states(now - timedelta(seconds=1), None) is None
+    assert cache.misses == 1
+    assert cache.hit_rate == 0.8
+
+
+async def test_cache_evicts_old_states(hass):
+    """Test only the last states of each entity are kept."""
+    cache = RecentStatesCache(hass, 2)
+    cache.async_start()
+    now = dt_util.utcnow()
+
+    for seconds, state in ((1, "1"), (2, "2"), (3, "3")):
+        _set_state(hass, "sensor.power", state, now + timedelta(seconds=seconds))
+    _set_state(hass, "light.kitchen", "on", now + timedelta(seconds=1))
+    await hass.async_block_till_done()
+
+    assert (
+        cache.async_get_significant_states(
+            now + timedelta(seconds=1.5), entity_ids=["sensor.power"]
+        )
+        is None
+    )
+    assert cache.async_get_significant_states(
+        now + timedelta(seconds=1.5), entity_ids=["light.kitchen"]
+    ) == {"light.kitchen": [hass.states.get("light.kitchen")]}
+
+    result = cache.async_get_significant_states(now + timedelta(seconds=2))
+    assert [state.state for state in result["sensor.power"]] == ["2", "3"]
+    assert result["sensor.power"][0].last_updated == now + timedelta(seconds=2)
+
+    cache.async_stop()
+    _set_state(hass, "sensor.power", "4", now + timedelta(seconds=4))
+    await hass.async_block_till_done()
+    result = cache.async_get_significant_states(now + timedelta(seconds=2))
+    assert [state.state for state in result["sensor.power"]] == ["2", "3"]
+
+
+async def test_cache_keeps_one_state(hass):
+    """Test the cache keeps working with room for a single state."""
+    cache = RecentStatesCache(hass, 1)
+    cache.async_start()
+    now = dt_util.utcnow()
+
+    for seconds, state in ((1, "1"), (2, "2"), (3, "3")):
+        _set_state(hass, "sensor.power", state, now + timedelta(seconds=seconds))
+    await hass.async_block_till_done()
+
+    assert cache.async_get_significant_states(now + timedelta(seconds=2.5)) is None
+    result = cache.async_get_significant_states(now + timedelta(seconds=3))
+    assert [state.state for state in result["sensor.power"]] == ["3"]
+
+
+async def test_cache_skips_excluded_entities(hass):
+    """Test the cache holds no states the recorder does not record."""
+    config = {"exclude": {"entities": ["sensor.excluded", "sensor.excluded_later"]}}
+    await hass.async_add_job(init_recorder_component, hass, config)
+    hass.states.async_set("sensor.excluded", "1")
+    hass.states.async_set("sensor.power", "10")
+    assert await async_setup_component(
+        hass, "history", {"history": {"cache": {"max_states": 10}}}
+    )
+    start = dt_util.utcnow()
+    hass.states.async_set("sensor.excluded_later", "1")
+    await hass.async_block_till_done()
+
+    result = hass.data[history.DATA_CACHE].async_get_significant_states(start)
+    assert list(result) == ["sensor.power"]
+
+
+async def test_fetch_period_api_uses_cache(hass, hass_client):
+    """Test the fetch period view answers recent periods from the cache."""
+    await hass.async_add_job(init_recorder_component, hass)
+    assert await async_setup_component(hass, "history", {"history": {"cache": {}}})
+    start = dt_util.utcnow()
+    hass.states.async_set("sensor.power", "10")
+    client = await hass_client()
+
+    response = await client.get(
+        f"/api/history/period/{start.isoformat()}",
+        params={"filter_entity_id": "sensor.power"},
+    )
+    assert response.status == 200
+    assert [state["state"] for state in (await response.json())[0]] == ["10"]
+    assert hass.data[history.DATA_CACHE].hits == 1
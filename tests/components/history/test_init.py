@@ -4,7 +4,11 @@ from datetime import timedelta
 import unittest
 from unittest.mock import patch, sentinel
 
+import pytest
+
 from homeassistant.components import history, recorder
+from homeassistant.components.recorder.models import States
+from homeassistant.components.recorder.util import session_scope
 import homeassistant.core as ha
 from homeassistant.setup import async_setup_component, setup_component
 import homeassistant.util.dt as dt_util
@@ -526,6 +530,102 @@ class TestComponentHistory(unittest.TestCase):
         )
         assert list(hist.keys()) == entity_ids
 
+    def test_get_significant_states_with_statistics(self):
+        """Test numeric entities are represented by their statistics."""
+        self.init_recorder()
+        start = dt_util.utcnow().replace(minute=0, second=0, microsecond=0)
+        start -= timedelta(days=3)
+
+        def set_state(entity_id, state, point_in_time):
+            """Set the state at a point in time."""
+            with patch(
+                "homeassistant.components.recorder.dt_util.utcnow",
+                return_value=point_in_time,
+            ):
+                self.hass.states.set(entity_id, state, {"unit_of_measurement": "W"})
+                self.hass.block_till_done()
+
+        for hour in range(3):
+            for minute in (10, 20):
+                set_state(
+                    "sensor.power",
+                    hour * 100 + minute,
+                    start + timedelta(hours=hour, minutes=minute),
+                )
+        set_state("switch.test", "on", start + timedelta(minutes=15))
+        set_state("switch.test", "off", start + timedelta(minutes=25))
+        self.wait_recording_done()
+
+        hist = history.get_significant_states_with_statistics(
+            self.hass, start, start + timedelta(days=2), filters=history.Filters()
+        )
+        assert [state.state for state in hist["switch.test"]] == ["on", "off"]
+        # The range is within the kept days, use 5-minute statistics
+        assert [
+            (state.last_updated - start, state.state) for state in hist["sensor.power"]
+        ] == [
+            (timedelta(minutes=10), "10.0"),
+            (timedelta(minutes=20), "20.0"),
+            (timedelta(hours=1, minutes=10), "110.0"),
+            (timedelta(hours=1, minutes=20), "120.0"),
+            (timedelta(hours=2, minutes=10), "210.0"),
+            (timedelta(hours=2, minutes=20), "220.0"),
+        ]
+        assert hist["sensor.power"][0].attributes == {"unit_of_measurement": "W"}
+
+        hist = history.get_significant_states_with_statistics(
+            self.hass,
+            start - timedelta(days=10),
+            start + timedelta(days=2),
+            ["sensor.power", "switch.test"],
+        )
+        assert list(hist) == ["sensor.power", "switch.test"]
+        assert [state.state for state in hist["sensor.power"]] == [
+            "15.0",
+            "115.0",
+            "215.0",
+        ]
+
+    def test_get_significant_states_before_statistics(self):
+        """Test states before the first statistics and gaps are kept."""
+        self.init_recorder()
+        instance = self.hass.data[recorder.DATA_INSTANCE]
+        start = dt_util.utcnow().replace(minute=0, second=0, microsecond=0)
+        start -= timedelta(days=3)
+
+        def set_state(state, point_in_time):
+            """Set the state at a point in time."""
+            with patch(
+                "homeassistant.components.recorder.dt_util.utcnow",
+                return_value=point_in_time,
+            ):
+                self.hass.states.set("sensor.power", state)
+                self.hass.block_till_done()
+
+        # Recorded before statistics were compiled
+        with patch.object(instance.statistics, "process_events"):
+            set_state("5", start + timedelta(minutes=10))
+            set_state("7", start + timedelta(minutes=20))
+            self.wait_recording_done()
+
+        set_state("110", start + timedelta(hours=1, minutes=10))
+        set_state("unavailable", start + timedelta(hours=1, minutes=20))
+        set_state("130", start + timedelta(hours=1, minutes=40))
+        self.wait_recording_done()
+
+        hist = history.get_significant_states_with_statistics(
+            self.hass, start, start + timedelta(days=2), ["sensor.power"]
+        )
+        assert [
+            (state.last_updated - start, state.state) for state in hist["sensor.power"]
+        ] == [
+            (timedelta(minutes=10), "5"),
+            (timedelta(minutes=20), "7"),
+            (timedelta(hours=1, minutes=10), "110.0"),
+            (timedelta(hours=1, minutes=20), "unavailable"),
+            (timedelta(hours=1, minutes=40), "130.0"),
+        ]
+
     def check_significant_states(self, zero, four, states, config):
         """Check if significant states are retrieved."""
         filters = history.Filters()
@@ -650,3 +750,155 @@ async def test_fetch_period_api_with_include_order(hass, hass_client):
         params={"filter_entity_id": "non.existing,something.else"},
     )
     assert response.status == 200
+
+
+async def test_fetch_period_api_with_statistics(hass, hass_client):
+    """Test the fetch period view serves long periods from statistics."""
+    await hass.async_add_job(init_recorder_component, hass)
+    await async_setup_component(hass, "history", {})
+    hass.states.async_set("sensor.power", "10")
+    hass.states.async_set("sensor.power", "20")
+    await hass.async_add_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+    client = await hass_client()
+    now = dt_util.utcnow()
+    response = await client.get(
+        "/api/history/period/{}".format((now - timedelta(days=10)).isoformat()),
+        params={
+            "filter_entity_id": "sensor.power",
+            "end_time": (now + timedelta(hours=1)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        },
+    )
+    assert response.status == 200
+    result = await response.json()
+    assert [state["state"] for state in result[0]] == ["15.0"]
+
+
+async def test_fetch_period_api_stream(hass, hass_client):
+    """Test the fetch period view streams the same states."""
+    await hass.async_add_job(init_recorder_component, hass)
+    await async_setup_component(hass, "history", {})
+    start = dt_util.utcnow()
+    hass.states.async_set("sensor.power", "10")
+    hass.states.async_set("light.kitchen", "on")
+    hass.states.async_set("sensor.power", "20")
+    hass.states.async_set("sensor.power", "30")
+    await hass.async_add_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+    client = await hass_client()
+    url = "/api/history/period/{}".format(start.isoformat())
+
+    response = await client.get(url)
+    assert response.status == 200
+    expected = sorted(await response.json(), key=lambda states: states[0]["entity_id"])
+
+    with patch("homeassistant.components.history.STREAM_BATCH_SIZE", 2):
+        response = await client.get(url, params={"stream": ""})
+    assert response.status == 200
+    assert response.content_type == "application/json"
+    result = await response.json()
+    assert result == expected
+    assert [state["state"] for state in result[1]] == ["10", "20", "30"]
+
+    # Only the states at the start of the period
+    end = dt_util.utcnow()
+    response = await client.get(
+        "/api/history/period/{}".format(end.isoformat()), params={"stream": ""}
+    )
+    assert response.status == 200
+    result = sorted(await response.json(), key=lambda states: states[0]["entity_id"])
+    assert [[state["state"] for state in states] for states in result] == [
+        ["on"],
+        ["30"],
+    ]
+
+
+async def test_fetch_period_api_minimal_response(hass, hass_client):
+    """Test the fetch period view with only the minimal states."""
+    await hass.async_add_job(init_recorder_component, hass)
+    await async_setup_component(hass, "history", {})
+    hass.states.async_set("light.hidden", "on", {"hidden": True})
+    start = dt_util.utcnow()
+    hass.states.async_set("sensor.power", "10", {"unit_of_measurement": "W"})
+    hass.states.async_set("sensor.power", "20", {"unit_of_measurement": "W"})
+    hass.states.async_set("light.hidden", "off", {"hidden": True})
+    await hass.async_add_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+    client = await hass_client()
+    url = "/api/history/period/{}".format(start.isoformat())
+
+    response = await client.get(url)
+    expected = await response.json()
+
+    response = await client.get(url, params={"minimal_response": ""})
+    assert response.status == 200
+    assert response.content_type == "application/json"
+    assert await response.json() == [
+        [
+            {
+                "entity_id": state["entity_id"],
+                "state": state["state"],
+                "last_changed": state["last_changed"],
+            }
+            for state in states
+        ]
+        for states in expected
+    ]
+
+    response = await client.get(
+        url, params={"minimal_response": "", "include_attributes": ""}
+    )
+    assert await response.json() == [
+        [
+            {
+                "entity_id": state["entity_id"],
+                "state": state["state"],
+                "last_changed": state["last_changed"],
+                "attributes": state["attributes"],
+            }
+            for state in states
+        ]
+        for states in expected
+    ]
+
+    response = await client.get(
+        url, params={"minimal_response": "", "include_attributes": "", "stream": ""}
+    )
+    assert [
+        [state["state"] for state in states] for states in await response.json()
+    ] == [["10", "20"]]
+
+
+@pytest.mark.parametrize(
+    "included_domains,included_entities,excluded_domains,excluded_entities",
+    [
+        ([], [], [], []),
+        (["light"], ["switch.one"], [], []),
+        ([], ["switch.one"], ["light"], ["switch.two"]),
+        (["light"], ["switch.one"], ["switch"], []),
+        (["light"], [], ["switch"], ["light.hall"]),
+        ([], ["switch.one"], [], ["light.hall"]),
+    ],
+)
+async def test_filters_matches(
+    hass, included_domains, included_entities, excluded_domains, excluded_entities
+):
+    """Test the filters match the entities of the filtered query."""
+    await hass.async_add_job(init_recorder_component, hass)
+    entity_ids = ["switch.one", "switch.two", "light.kitchen", "light.hall", "zone.a"]
+    for entity_id in entity_ids:
+        hass.states.async_set(entity_id, "on")
+    await hass.async_block_till_done()
+    await hass.async_add_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    filters = history.Filters()
+    filters.included_domains = included_domains
+    filters.included_entities = included_entities
+    filters.excluded_domains = excluded_domains
+    filters.excluded_entities = excluded_entities
+
+    def filtered_entity_ids():
+        with session_scope(hass=hass) as session:
+            query = filters.apply(session.query(States.entity_id))
+            return {row.entity_id for row in query}
+
+    assert await hass.async_add_job(filtered_entity_ids) == {
+        entity_id for entity_id in entity_ids if filters.matches(entity_id)
+    }
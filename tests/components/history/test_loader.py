@@ -0,0 +1,121 @@
+"""The tests for the batched history loader."""
+import asyncio
+from datetime import timedelta
+from unittest.mock import patch
+
+from homeassistant.components import recorder
+from homeassistant.components.history.loader import async_get_loader
+from homeassistant.components.recorder.models import RecorderRuns
+from homeassistant.components.recorder.util import session_scope
+import homeassistant.util.dt as dt_util
+
+from tests.common import init_recorder_component
+
+
+def _set_state(hass, entity_id, state, point_in_time, attributes=None):
+    """Set a state at a point in time."""
+    with patch("homeassistant.core.dt_util.utcnow", return_value=point_in_time):
+        hass.states.async_set(entity_id, state, attributes)
+
+
+async def test_batched_requests(hass):
+    """Test requests made at the same time are answered with a query per kind.
+
+    The states at different points in time are answered by a single query too.
+    """
+    await hass.async_add_job(init_recorder_component, hass)
+    now = dt_util.utcnow()
+
+    for entity_id in ("sensor.one", "sensor.two"):
+        _set_state(hass, entity_id, "1", now + timedelta(seconds=1))
+        _set_state(hass, entity_id, "2", now + timedelta(seconds=2))
+        _set_state(hass, entity_id, "2", now + timedelta(seconds=3), {"unit": "W"})
+        _set_state(hass, entity_id, "3", now + timedelta(seconds=4))
+    await hass.async_block_till_done()
+    await hass.async_add_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    loader = async_get_loader(hass)
+    assert async_get_loader(hass) is loader
+
+    results = await asyncio.gather(
+        loader.async_states_during_period("sensor.one", now + timedelta(seconds=1)),
+        loader.async_states_during_period(
+            "sensor.two", now, now + timedelta(seconds=3.5), changes_only=False
+        ),
+        loader.async_last_states("sensor.one", 2),
+        loader.async_last_states(
+            "sensor.two", 3, now + timedelta(seconds=2), changes_only=False
+        ),
+        loader.async_last_states("sensor.missing", 2),
+        loader.async_state_at("sensor.one", now + timedelta(seconds=2.5)),
+        loader.async_state_at("sensor.two", now + timedelta(seconds=3.5)),
+        loader.async_state_at("sensor.two", now + timedelta(seconds=1.5)),
+        loader.async_state_at("sensor.missing", now + timedelta(seconds=2.5)),
+    )
+
+    assert loader.queries == 3
+    assert [
+        [(state.state, state.attributes) for state in states] for states in results[:5]
+    ] == [
+        [("2", {}), ("3", {})],
+        [("1", {}), ("2", {}), ("2", {"unit": "W"})],
+        [("2", {}), ("3", {})],
+        [("2", {}), ("2", {"unit": "W"}), ("3", {})],
+        [],
+    ]
+    assert results[5].entity_id == "sensor.one"
+    assert results[5].state == "2"
+    assert results[6].entity_id == "sensor.two"
+    assert results[6].state == "2"
+    assert results[6].attributes == {"unit": "W"}
+    assert results[7].state == "1"
+    assert results[8] is None
+
+
+async def test_failed_requests(hass):
+    """Test a failing query is raised to all requesters."""
+    await hass.async_add_job(init_recorder_component, hass)
+    loader = async_get_loader(hass)
+
+    with patch(
+        "homeassistant.components.history.loader.execute", side_effect=ValueError
+    ):
+        results = await asyncio.gather(
+            loader.async_last_states("sensor.one", 2),
+            loader.async_last_states("sensor.two", 2),
+            return_exceptions=True,
+        )
+
+    assert [type(result) for result in results] == [ValueError, ValueError]
+
+
+async def test_state_at_earlier_run(hass):
+    """Test the states at points in earlier recorder runs."""
+    await hass.async_add_job(init_recorder_component, hass)
+    instance = hass.data[recorder.DATA_INSTANCE]
+    now = dt_util.utcnow()
+
+    _set_state(hass, "sensor.one", "1", now + timedelta(seconds=1))
+    _set_state(hass, "sensor.one", "2", now + timedelta(seconds=3))
+    await hass.async_block_till_done()
+    await hass.async_add_job(instance.block_till_done)
+
+    def add_run():
+        """Add a finished run covering the states."""
+        with session_scope(hass=hass) as session:
+            session.add(
+                RecorderRuns(start=now, end=now + timedelta(seconds=5), created=now)
+            )
+
+    await hass.async_add_job(add_run)
+
+    loader = async_get_loader(hass)
+    with patch.object(instance, "recording_start", now + timedelta(days=1)):
+        results = await asyncio.gather(
+            loader.async_state_at("sensor.one", now + timedelta(seconds=2)),
+            loader.async_state_at("sensor.one", now + timedelta(seconds=4)),
+            loader.async_state_at("sensor.one", now + timedelta(seconds=6)),
+        )
+
+    assert loader.queries == 2
+    assert [state and state.state for state in results] == ["1", "2", None]
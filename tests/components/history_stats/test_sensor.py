@@ -7,14 +7,22 @@ from unittest.mock import patch
 import pytest
 import pytz
 
-from homeassistant.components.history_stats.sensor import HistoryStatsSensor
+from homeassistant.components.history.loader import HistoryLoader
+from homeassistant.components.history_stats.sensor import (
+    HistoryStatsSensor,
+    HistoryStatsWindow,
+)
 from homeassistant.const import STATE_UNKNOWN
 import homeassistant.core as ha
 from homeassistant.helpers.template import Template
 from homeassistant.setup import setup_component
 import homeassistant.util.dt as dt_util
 
-from tests.common import get_test_home_assistant, init_recorder_component
+from tests.common import (
+    get_test_home_assistant,
+    init_recorder_component,
+    mock_history_loader,
+)
 
 
 class TestHistoryStatsSensor(unittest.TestCase):
@@ -136,21 +144,56 @@ class TestHistoryStatsSensor(unittest.TestCase):
         assert sensor3._type == "count"
         assert sensor4._type == "ratio"
 
-        with patch(
-            "homeassistant.components.history.state_changes_during_period",
-            return_value=fake_states,
-        ):
-            with patch("homeassistant.components.history.get_state", return_value=None):
-                sensor1.update()
-                sensor2.update()
-                sensor3.update()
-                sensor4.update()
+        for sensor in (sensor1, sensor2, sensor3, sensor4):
+            sensor.hass = self.hass
+
+        with mock_history_loader(fake_states):
+            sensor1.update()
+            sensor2.update()
+            sensor3.update()
+            sensor4.update()
 
         assert sensor1.state == 0.5
         assert sensor2.state is None
         assert sensor3.state == 2
         assert sensor4.state == 50
 
+    def test_measure_on_at_start(self):
+        """Test being on at the start of the period counts as turning on."""
+        now = dt_util.utcnow()
+        t0 = now - timedelta(minutes=40)
+        t1 = now - timedelta(minutes=20)
+
+        # Start     t0        t1        End
+        # |--20min--|--20min--|--20min--|
+        # |---on----|---off---|---on----|
+
+        fake_states = {
+            "binary_sensor.test_id": [
+                ha.State("binary_sensor.test_id", "off", last_changed=t0),
+                ha.State("binary_sensor.test_id", "on", last_changed=t1),
+            ]
+        }
+
+        async def get_state_at(loader, entity_id, utc_point_in_time):
+            """Return the state at the start of the period."""
+            return ha.State(entity_id, "on", last_changed=utc_point_in_time)
+
+        start = Template(str((now - timedelta(hours=1)).timestamp()), self.hass)
+        end = Template(str(now.timestamp()), self.hass)
+        sensor = HistoryStatsSensor(
+            self.hass, "binary_sensor.test_id", "on", start, end, None, "count", "Test"
+        )
+        sensor.hass = self.hass
+
+        with mock_history_loader(fake_states), patch.object(
+            HistoryLoader, "async_state_at", new=get_state_at
+        ):
+            sensor.update()
+
+        assert sensor.count == 2
+        assert round(sensor.value, 2) == 0.67
+
     def test_wrong_date(self):
         """Test when start or end value is not a timestamp or a date."""
         good = Template("{{ now() }}", self.hass)
@@ -253,6 +296,73 @@ class TestHistoryStatsSensor(unittest.TestCase):
         with pytest.raises(TypeError):
             setup_component(self.hass, "sensor", config)()
 
+    def test_measure_incremental(self):
+        """Test state changes are added to the window without loading history."""
+        now = dt_util.utcnow()
+        t0 = now - timedelta(minutes=40)
+        t1 = now - timedelta(minutes=20)
+
+        fake_states = {
+            "binary_sensor.test_id": [
+                ha.State("binary_sensor.test_id", "on", last_changed=t0),
+                ha.State("binary_sensor.test_id", "off", last_changed=t1),
+            ]
+        }
+        loaded = []
+
+        async def get_states(loader, entity_id, *args, **kwargs):
+            """Return the fake states and count the loads."""
+            loaded.append(entity_id)
+            return fake_states[entity_id]
+
+        start = Template(str((now - timedelta(hours=1)).timestamp()), self.hass)
+        end = Template(str((now + timedelta(hours=1)).timestamp()), self.hass)
+        sensor = HistoryStatsSensor(
+            self.hass, "binary_sensor.test_id", "on", start, end, None, "time", "Test"
+        )
+        sensor.hass = self.hass
+        sensor.entity_id = "sensor.test"
+
+        with mock_history_loader(fake_states), patch.object(
+            HistoryLoader, "async_states_during_period", new=get_states
+        ):
+            with patch("homeassistant.util.dt.now", return_value=now):
+                self.hass.start()
+                self.hass.block_till_done()
+
+            assert self.hass.states.get("sensor.test").state == "0.33"
+
+            # Turned on again, measured until the end of the period moves
+            with patch(
+                "homeassistant.util.dt.now", return_value=now + timedelta(minutes=30)
+            ):
+                with patch(
+                    "homeassistant.core.dt_util.utcnow",
+                    return_value=now + timedelta(minutes=10),
+                ):
+                    self.hass.states.set("binary_sensor.test_id", "on")
+                self.hass.block_till_done()
+
+            assert self.hass.states.get("sensor.test").state == "0.67"
+            assert loaded == ["binary_sensor.test_id"]
+
+    def test_window_trim(self):
+        """Test moving the start of the window forward."""
+        window = HistoryStatsWindow(0, True)
+        window.add(10, False)
+        window.add(20, True)
+        window.add(30, False)
+        assert window.totals(40) == (20, 2)
+
+        window.trim(15)
+        assert window.totals(40) == (10, 1)
+
+        window.trim(35)
+        assert window.totals(40) == (0, 0)
+
+        window.add(38, True)
+        assert window.totals(40) == (2, 1)
+
     def init_recorder(self):
         """Initialize the recorder."""
         init_recorder_component(self.hass)
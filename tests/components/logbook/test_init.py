@@ -3,6 +3,7 @@
 from datetime import datetime, timedelta
 import logging
 import unittest
+from unittest.mock import patch
 
 import pytest
 import voluptuous as vol
@@ -15,6 +16,8 @@ from homeassistant.components.homekit.const import (
     DOMAIN as DOMAIN_HOMEKIT,
     EVENT_HOMEKIT_CHANGED,
 )
+from homeassistant.components.recorder.models import States
+from homeassistant.components.recorder.util import session_scope
 from homeassistant.const import (
     ATTR_ENTITY_ID,
     ATTR_HIDDEN,
@@ -33,7 +36,11 @@ import homeassistant.core as ha
 from homeassistant.setup import async_setup_component, setup_component
 import homeassistant.util.dt as dt_util
 
-from tests.common import get_test_home_assistant, init_recorder_component
+from tests.common import (
+    async_fire_time_changed,
+    get_test_home_assistant,
+    init_recorder_component,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -1484,3 +1491,240 @@ async def test_humanify_script_started_event(hass):
     assert event2["domain"] == "script"
     assert event2["message"] == "started"
     assert event2["entity_id"] == "script.bye"
+
+
+async def test_logbook_view_pages(hass, hass_client):
+    """Test the logbook view returns the entries in pages."""
+    await hass.async_add_job(init_recorder_component, hass)
+    await async_setup_component(hass, "logbook", {})
+    await hass.async_add_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+    start = datetime(2020, 1, 1, 10, tzinfo=dt_util.UTC)
+
+    for minutes, message in ((1, "one"), (2, "two"), (20, "three"), (40, "four")):
+        with patch(
+            "homeassistant.util.dt.utcnow",
+            return_value=start + timedelta(minutes=minutes),
+        ):
+            logbook.async_log_entry(hass, "Alarm", message, "switch")
+            await hass.async_block_till_done()
+    await hass.async_add_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    client = await hass_client()
+    url = "/api/logbook/{}".format(start.isoformat())
+    pages = []
+    cursor = None
+    while True:
+        params = {"limit": 1}
+        if cursor is not None:
+            params["cursor"] = cursor
+        response = await client.get(url, params=params)
+        assert response.status == 200
+        page = await response.json()
+        pages.append([entry["message"] for entry in page["entries"]])
+        cursor = page["cursor"]
+        if cursor is None:
+            break
+
+    # Entries grouped by the logbook are not split over pages
+    assert pages == [["one", "two"], ["three"], ["four"]]
+
+    response = await client.get(url, params={"limit": "many"})
+    assert response.status == 400
+    response = await client.get(url, params={"limit": 0})
+    assert response.status == 400
+    response = await client.get(url, params={"limit": -1})
+    assert response.status == 400
+    response = await client.get(url, params={"limit": 1, "cursor": "invalid"})
+    assert response.status == 400
+
+
+async def test_get_events_filters_continuous_sensors(hass):
+    """Test the sensor values with a unit are filtered by the query."""
+    await hass.async_add_job(init_recorder_component, hass)
+    for state in ("10", "20"):
+        hass.states.async_set("sensor.power", state, {"unit_of_measurement": "W"})
+        hass.states.async_set("sensor.mode", state)
+    await hass.async_block_till_done()
+    await hass.async_add_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    def get_events():
+        with session_scope(hass=hass) as session:
+            query = logbook._events_query(
+                session,
+                {},
+                dt_util.utcnow() - timedelta(hours=1),
+                dt_util.utcnow() + timedelta(hours=1),
+            )
+            return [row.Events.to_native(row.States) for row in query]
+
+    events = await hass.async_add_job(get_events)
+    assert [
+        (event.data["entity_id"], event.data["new_state"]["state"])
+        for event in events
+        if event.event_type == EVENT_STATE_CHANGED
+    ] == [("sensor.mode", "10"), ("sensor.mode", "20")]
+
+
+@pytest.mark.parametrize(
+    "config",
+    [
+        {},
+        {"include": {"domains": ["switch"], "entities": ["light.kitchen"]}},
+        {"exclude": {"domains": ["switch"], "entities": ["light.kitchen"]}},
+        {
+            "include": {"domains": ["light"], "entities": ["switch.one"]},
+            "exclude": {"entities": ["light.kitchen"]},
+        },
+        {
+            "include": {"entities": ["switch.one"]},
+            "exclude": {"domains": ["switch"], "entities": ["light.kitchen"]},
+        },
+        {
+            "include": {"entities": ["switch.one"]},
+            "exclude": {"entities": ["light.kitchen"]},
+        },
+    ],
+)
+async def test_entities_filter_clause(hass, config):
+    """Test the SQL filter matches the entity filter of the config."""
+    await hass.async_add_job(init_recorder_component, hass)
+    entity_ids = ["switch.one", "switch.two", "light.kitchen", "light.hall"]
+    for entity_id in entity_ids:
+        hass.states.async_set(entity_id, STATE_ON)
+    await hass.async_block_till_done()
+    await hass.async_add_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    config = logbook.CONFIG_SCHEMA({logbook.DOMAIN: config})[logbook.DOMAIN]
+    entities_filter = logbook._generate_filter_from_config(config)
+    clause = logbook._entities_filter_clause(config)
+
+    def filtered_entity_ids():
+        with session_scope(hass=hass) as session:
+            query = session.query(States.entity_id)
+            if clause is not None:
+                query = query.filter(clause)
+            return {row.entity_id for row in query}
+
+    assert await hass.async_add_job(filtered_entity_ids) == {
+        entity_id for entity_id in entity_ids if entities_filter(entity_id)
+    }
+
+
+async def test_subscribe_logbook(hass, hass_ws_client):
+    """Test the logbook backlog is sent and then the new entries."""
+    await hass.async_add_job(init_recorder_component, hass)
+    await async_setup_component(hass, "logbook", {})
+    hass.states.async_set("switch.test", STATE_OFF)
+    hass.states.async_set("switch.test", STATE_ON)
+    await hass.async_block_till_done()
+
+    client = await hass_ws_client(hass)
+    await client.send_json(
+        {
+            "id": 5,
+            "type": "logbook/subscribe",
+            "start_time": (dt_util.utcnow() - timedelta(hours=1)).isoformat(),
+        }
+    )
+
+    msg = await client.receive_json()
+    assert msg["success"]
+
+    msg = await client.receive_json()
+    assert msg["id"] == 5
+    assert [
+        (entry["entity_id"], entry["message"]) for entry in msg["event"]["entries"]
+    ] == [("switch.test", "turned on")]
+
+    # Continuous sensor values are not sent
+    hass.states.async_set("sensor.power", "10", {"unit_of_measurement": "W"})
+    hass.states.async_set("sensor.power", "20", {"unit_of_measurement": "W"})
+    hass.states.async_set("switch.test", STATE_OFF)
+
+    msg = await client.receive_json()
+    assert msg["id"] == 5
+    assert [
+        (entry["entity_id"], entry["message"]) for entry in msg["event"]["entries"]
+    ] == [("switch.test", "turned off")]
+
+    logbook.async_log_entry(hass, "Alarm", "is triggered", "switch", "switch.test")
+
+    msg = await client.receive_json()
+    assert [entry["message"] for entry in msg["event"]["entries"]] == ["is triggered"]
+
+
+async def test_subscribe_logbook_groups_sensor_entries(hass, hass_ws_client):
+    """Test the live sensor entries are grouped like the backlog."""
+    await hass.async_add_job(init_recorder_component, hass)
+    await async_setup_component(hass, "logbook", {})
+    hass.states.async_set("sensor.mode", "idle")
+    hass.states.async_set("switch.test", STATE_OFF)
+    await hass.async_block_till_done()
+    client = await hass_ws_client(hass)
+    await client.send_json({"id": 5, "type": "logbook/subscribe"})
+    assert (await client.receive_json())["success"]
+    await client.receive_json()
+
+    group_start = dt_util.utcnow().replace(minute=0, second=0, microsecond=0)
+    for minutes, state in ((1, "low"), (2, "high")):
+        with patch(
+            "homeassistant.core.dt_util.utcnow",
+            return_value=group_start + timedelta(minutes=minutes),
+        ):
+            hass.states.async_set("sensor.mode", state)
+    hass.states.async_set("switch.test", STATE_ON)
+
+    # The other entries are sent right away
+    msg = await client.receive_json()
+    assert [
+        (entry["entity_id"], entry["message"]) for entry in msg["event"]["entries"]
+    ] == [("switch.test", "turned on")]
+
+    # Only the last sensor entry of the group is sent at the end of the group
+    async_fire_time_changed(hass, group_start + timedelta(minutes=15))
+    msg = await client.receive_json()
+    assert [
+        (entry["entity_id"], entry["message"]) for entry in msg["event"]["entries"]
+    ] == [("sensor.mode", "changed to high")]
+
+    # A sensor entry of a later group sends the held one first
+    for minutes, state in ((16, "low"), (31, "high")):
+        with patch(
+            "homeassistant.core.dt_util.utcnow",
+            return_value=group_start + timedelta(minutes=minutes),
+        ):
+            hass.states.async_set("sensor.mode", state)
+    msg = await client.receive_json()
+    assert [entry["message"] for entry in msg["event"]["entries"]] == ["changed to low"]
+
+
+async def test_subscribe_logbook_invalid_start_time(hass, hass_ws_client):
+    """Test subscribing to the logbook with an invalid start time."""
+    await hass.async_add_job(init_recorder_component, hass)
+    await async_setup_component(hass, "logbook", {})
+
+    client = await hass_ws_client(hass)
+    await client.send_json(
+        {"id": 5, "type": "logbook/subscribe", "start_time": "invalid"}
+    )
+
+    msg = await client.receive_json()
+    assert not msg["success"]
+    assert msg["error"]["code"] == "invalid_start_time"
+
+
+async def test_subscribe_logbook_recorder_busy(hass, hass_ws_client, caplog):
+    """Test the backlog is sent when the recorder does not commit in time."""
+    await hass.async_add_job(init_recorder_component, hass)
+    await async_setup_component(hass, "logbook", {})
+
+    client = await hass_ws_client(hass)
+    with patch.object(
+        hass.data[recorder.DATA_INSTANCE], "commit_queued_events", return_value=False
+    ) as mock_commit:
+        await client.send_json({"id": 5, "type": "logbook/subscribe"})
+        msg = await client.receive_json()
+
+    assert msg["success"]
+    assert mock_commit.mock_calls[0][1] == (logbook.BACKLOG_COMMIT_TIMEOUT,)
+    assert "the backlog may miss them" in caplog.text
@@ -16,6 +16,7 @@ from homeassistant.const import (
 )
 from homeassistant.core import callback
 from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers import template
 from homeassistant.setup import async_setup_component
 from homeassistant.util.dt import utcnow
 
@@ -493,6 +494,44 @@ class TestMQTTCallbacks(unittest.TestCase):
         assert self.calls[0][0].topic == topic
         assert self.calls[0][0].payload == payload
 
+    def test_subscribers_share_message(self):
+        """Test subscribers with the same encoding share the decoded message."""
+        topic = "test-topic"
+
+        mqtt.subscribe(self.hass, topic, self.record_calls)
+        mqtt.subscribe(self.hass, topic, self.record_calls)
+        mqtt.subscribe(self.hass, topic, self.record_calls, encoding=None)
+
+        fire_mqtt_message(self.hass, topic, '{"temperature": 21}')
+        self.hass.block_till_done()
+        assert len(self.calls) == 3
+        assert self.calls[0][0] is self.calls[1][0]
+        assert self.calls[2][0].payload == b'{"temperature": 21}'
+
+        with mock.patch("homeassistant.components.mqtt.models.json.loads") as loads:
+            loads.return_value = {"temperature": 21}
+            assert self.calls[0][0].template_variables == {
+                "value_json": {"temperature": 21}
+            }
+            assert self.calls[1][0].template_variables == {
+                "value_json": {"temperature": 21}
+            }
+        assert len(loads.mock_calls) == 1
+
+    def test_template_variables_of_invalid_json(self):
+        """Test value_json is undefined for payloads that are not JSON."""
+        message = mqtt.Message("test-topic", "ON", 0, False)
+        tpl = template.Template(
+            "{{ value_json.state if value_json is defined else value }}", self.hass
+        )
+
+        assert (
+            tpl.async_render_with_possible_json_value(
+                message.payload, variables=message.template_variables
+            )
+            == "ON"
+        )
+
     def test_mqtt_failed_connection_results_in_disconnect(self):
         """Test if connection failure leads to disconnect."""
         for result_code in range(1, 6):
@@ -0,0 +1,71 @@
+"""The tests for the MQTT topic trie."""
+import pytest
+
+from homeassistant.components.mqtt.topic_trie import TopicTrie
+
+
+@pytest.mark.parametrize(
+    "topic_filter,topic,matches",
+    [
+        ("test-topic", "test-topic", True),
+        ("test-topic", "another-test-topic", False),
+        ("test/+/on", "test/bier/on", True),
+        ("test/+/on", "test/bier/off", False),
+        ("test/+/on", "test/bier", False),
+        ("test/+/on", "test//on", True),
+        ("test/#", "test/bier/on", True),
+        ("test/#", "test", True),
+        ("test/#", "other/test", False),
+        ("+/+", "hi/test", True),
+        ("+/+", "hi", False),
+        ("+/+", "hi/test/there", False),
+        ("#", "hi/test/there", True),
+        ("$test-topic/subtree/on", "$test-topic/subtree/on", True),
+        ("+/subtree/on", "$test-topic/subtree/on", False),
+        ("#", "$test-topic/subtree/on", False),
+        ("$test-topic/#", "$test-topic/subtree/on", True),
+        ("$test-topic/+/on", "$test-topic/subtree/on", True),
+    ],
+)
+def test_match(topic_filter, topic, matches):
+    """Test matching topics against filters like paho's matcher."""
+    trie = TopicTrie()
+    trie.add(topic_filter, "value")
+
+    assert trie.match(topic) == (["value"] if matches else [])
+
+
+def test_match_in_insertion_order():
+    """Test matching values are returned in the order they were added."""
+    trie = TopicTrie()
+    trie.add("home/#", 1)
+    trie.add("home/+/temperature", 2)
+    trie.add("home/kitchen/temperature", 3)
+    trie.add("home/+/temperature", 4)
+    trie.add("home/kitchen/humidity", 5)
+
+    assert trie.match("home/kitchen/temperature") == [1, 2, 3, 4]
+    assert len(trie) == 5
+
+
+def test_remove():
+    """Test removing values and pruning empty branches."""
+    trie = TopicTrie()
+    first = object()
+    second = object()
+    trie.add("home/kitchen", first)
+    trie.add("home/kitchen", second)
+    trie.add("home/kitchen/temperature", first)
+
+    trie.remove("home/kitchen", first)
+    assert trie.match("home/kitchen") == [second]
+
+    trie.remove("home/kitchen", second)
+    trie.remove("home/kitchen/temperature", first)
+    assert trie.match("home/kitchen") == []
+    assert len(trie) == 0
+    # pylint: disable=protected-access
+    assert trie._root.children == {}
+
+    with pytest.raises(KeyError):
+        trie.remove("home/kitchen", first)
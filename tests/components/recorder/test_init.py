@@ -4,13 +4,14 @@ import unittest
 from unittest.mock import patch
 
 import pytest
+from sqlalchemy import exc
 
 from homeassistant.components.recorder import Recorder
 from homeassistant.components.recorder.const import DATA_INSTANCE
-from homeassistant.components.recorder.models import Events, States
+from homeassistant.components.recorder.models import Events, StateAttributes, States
 from homeassistant.components.recorder.util import session_scope
 from homeassistant.const import MATCH_ALL
-from homeassistant.core import callback
+from homeassistant.core import CoreState, callback
 from homeassistant.setup import async_setup_component
 
 from tests.common import get_test_home_assistant, init_recorder_component
@@ -198,7 +199,14 @@ def test_recorder_setup_failure():
     ):
         setup.side_effect = ImportError("driver not found")
         rec = Recorder(
-            hass, keep_days=7, purge_interval=2, uri="sqlite://", include={}, exclude={}
+            hass,
+            keep_days=7,
+            purge_interval=2,
+            commit_interval=1,
+            commit_max_events=1000,
+            uri="sqlite://",
+            include={},
+            exclude={},
         )
         rec.start()
         rec.join()
@@ -222,3 +230,135 @@ async def test_defaults_set(hass):
     assert recorder_config is not None
     assert recorder_config["purge_keep_days"] == 10
     assert recorder_config["purge_interval"] == 1
+    assert recorder_config["commit_interval"] == 1
+    assert recorder_config["commit_max_events"] == 1000
+
+
+def test_saving_events_in_batches(hass_recorder):
+    """Test events fired together are committed in a single transaction."""
+    hass = hass_recorder({"commit_interval": 30})
+    instance = hass.data[DATA_INSTANCE]
+    commit_count = instance.commit_count
+
+    for idx in range(5):
+        hass.states.set(f"test.batch_{idx}", "on")
+    hass.block_till_done()
+    instance.block_till_done()
+
+    assert instance.commit_count == commit_count + 1
+    assert instance.last_commit_events == 5
+    assert instance.stats["queue_depth"] == 0
+    assert instance.stats["last_commit_duration"] is not None
+
+    with session_scope(hass=hass) as session:
+        assert session.query(States).count() == 5
+
+
+def test_saving_events_max_batch_size(hass_recorder):
+    """Test a batch is committed once it reaches the maximum size."""
+    hass = hass_recorder({"commit_interval": 30, "commit_max_events": 2})
+    instance = hass.data[DATA_INSTANCE]
+    commit_count = instance.commit_count
+
+    for idx in range(4):
+        hass.states.set(f"test.batch_{idx}", "on")
+    hass.block_till_done()
+    instance.block_till_done()
+
+    assert instance.commit_count == commit_count + 2
+
+    with session_scope(hass=hass) as session:
+        assert session.query(States).count() == 4
+
+
+def test_commit_queued_events(hass_recorder):
+    """Test committing the queued events without waiting for later ones."""
+    hass = hass_recorder({"commit_interval": 30})
+    instance = hass.data[DATA_INSTANCE]
+
+    hass.states.set("test.one", "on")
+    hass.block_till_done()
+    # A task that is never done would block block_till_done forever
+    with instance.queue.mutex:
+        instance.queue.unfinished_tasks += 1
+
+    assert instance.commit_queued_events(10)
+    with session_scope(hass=hass) as session:
+        assert session.query(States).count() == 1
+    instance.queue.task_done()
+
+
+def test_commit_queued_events_before_start():
+    """Test the queued events are not waited for before Home Assistant starts."""
+    hass = get_test_home_assistant()
+    hass.state = CoreState.starting
+    init_recorder_component(hass)
+    try:
+        assert not hass.data[DATA_INSTANCE].commit_queued_events(0.1)
+    finally:
+        hass.stop()
+
+
+def test_saving_events_skips_failing_event(hass_recorder):
+    """Test only the event causing a database error is lost from a batch."""
+    hass = hass_recorder({"commit_interval": 30})
+    instance = hass.data[DATA_INSTANCE]
+    add_event = instance._add_event
+
+    def add_event_failing(session, event):
+        """Fail adding the state of a single entity."""
+        if event.data.get("entity_id") == "test.bad":
+            raise exc.IntegrityError("INSERT", {}, Exception())
+        add_event(session, event)
+
+    with patch.object(
+        instance, "_add_event", side_effect=add_event_failing
+    ), patch.object(instance.statistics, "process_events") as mock_process:
+        for entity_id in ("test.one", "test.bad", "test.two"):
+            hass.states.set(entity_id, "on")
+        hass.block_till_done()
+        instance.block_till_done()
+
+    with session_scope(hass=hass) as session:
+        assert {state.entity_id for state in session.query(States)} == {
+            "test.one",
+            "test.two",
+        }
+
+    # Statistics are only compiled from the events that were written
+    assert [
+        event.data["entity_id"]
+        for call in mock_process.mock_calls
+        for event in call[1][0]
+    ] == ["test.one", "test.two"]
+
+
+def test_saving_state_shares_attributes(hass_recorder):
+    """Test states with the same attributes share their stored attributes."""
+    hass = hass_recorder()
+
+    for state in ("one", "two"):
+        for entity_id in ("test.first", "test.second"):
+            hass.states.set(entity_id, state, {"friendly_name": "Shared"})
+        hass.block_till_done()
+        hass.data[DATA_INSTANCE].block_till_done()
+    hass.states.set("test.first", "three", {"friendly_name": "Other"})
+    hass.block_till_done()
+    hass.data[DATA_INSTANCE].block_till_done()
+
+    assert len(hass.data[DATA_INSTANCE]._state_attributes_ids) == 2
+
+    with session_scope(hass=hass) as session:
+        assert session.query(StateAttributes).count() == 2
+        states = [
+            state.to_native()
+            for state in session.query(States).order_by(States.state_id)
+        ]
+
+    assert [(state.state, dict(state.attributes)) for state in states] == [
+        ("one", {"friendly_name": "Shared"}),
+        ("one", {"friendly_name": "Shared"}),
+        ("two", {"friendly_name": "Shared"}),
+        ("two", {"friendly_name": "Shared"}),
+        ("three", {"friendly_name": "Other"}),
+    ]
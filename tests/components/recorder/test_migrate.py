@@ -1,9 +1,10 @@
 """The tests for the Recorder component."""
 # pylint: disable=protected-access
+import json
 from unittest.mock import call, patch
 
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect
 from sqlalchemy.pool import StaticPool
 
 from homeassistant.bootstrap import async_setup_component
@@ -76,3 +77,72 @@ def test_forgiving_add_index():
     engine = create_engine("sqlite://", poolclass=StaticPool)
     models.Base.metadata.create_all(engine)
     migration._create_index(engine, "states", "ix_states_context_id")
+
+
+def test_create_statistics_table():
+    """Test the statistics table is created for schema version 8."""
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    models_original.Base.metadata.create_all(engine)
+    assert "statistics" not in inspect(engine).get_table_names()
+
+    migration._apply_update(engine, 8, 7)
+    # Creating the table again is forgiven
+    migration._apply_update(engine, 8, 7)
+
+    inspector = inspect(engine)
+    assert {column["name"] for column in inspector.get_columns("statistics")} == {
+        "id",
+        "domain",
+        "entity_id",
+        "period",
+        "start",
+        "min",
+        "mean",
+        "max",
+        "last",
+        "count",
+    }
+    assert [index["name"] for index in inspector.get_indexes("statistics")] == [
+        "ix_statistics_entity_id_period_start"
+    ]
+
+
+def test_slim_state_changed_events():
+    """Test the states are removed from the recorded state_changed events."""
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    models.Base.metadata.create_all(engine)
+    full_data = {
+        "entity_id": "light.kitchen",
+        "old_state": {"entity_id": "light.kitchen", "state": "off", "attributes": {}},
+        "new_state": {"entity_id": "light.kitchen", "state": "on", "attributes": {}},
+    }
+    for event_type, data in (
+        ("state_changed", full_data),
+        ("state_changed", dict(full_data, old_state=None)),
+        ("state_changed", dict(full_data, new_state=None)),
+        ("state_changed", {"entity_id": "light.kitchen", "old_state": None}),
+        ("call_service", {"domain": "light"}),
+    ):
+        engine.execute(
+            "INSERT INTO events (event_type, event_data) VALUES (?, ?)",
+            event_type,
+            json.dumps(data),
+        )
+
+    with patch.object(migration, "MIGRATION_BATCH_SIZE", 2):
+        migration._apply_update(engine, 10, 9)
+
+    assert [
+        json.loads(row[0])
+        for row in engine.execute("SELECT event_data FROM events ORDER BY event_id")
+    ] == [
+        {"entity_id": "light.kitchen", "old_state": {"state": "off"}},
+        {"entity_id": "light.kitchen", "old_state": None},
+        {
+            "entity_id": "light.kitchen",
+            "old_state": {"state": "off"},
+            "new_state": None,
+        },
+        {"entity_id": "light.kitchen", "old_state": None},
+        {"domain": "light"},
+    ]
@@ -1,11 +1,18 @@
 """The tests for the Recorder component."""
 from datetime import datetime
+import json
 import unittest
 
 from sqlalchemy import create_engine
 from sqlalchemy.orm import scoped_session, sessionmaker
 
-from homeassistant.components.recorder.models import Base, Events, RecorderRuns, States
+from homeassistant.components.recorder.models import (
+    Base,
+    Events,
+    RecorderRuns,
+    StateAttributes,
+    States,
+)
 from homeassistant.const import EVENT_STATE_CHANGED
 import homeassistant.core as ha
 from homeassistant.util import dt
@@ -44,6 +51,46 @@ class TestEvents(unittest.TestCase):
         event = ha.Event("test_event", {"some_data": 15})
         assert event == Events.from_event(event).to_native()
 
+    def test_from_state_changed_event(self):
+        """Test the states of a state_changed event are not stored twice."""
+        old_state = ha.State("sensor.temperature", "17", {"unit_of_measurement": "°C"})
+        new_state = ha.State("sensor.temperature", "18", {"unit_of_measurement": "°C"})
+        event = ha.Event(
+            EVENT_STATE_CHANGED,
+            {
+                "entity_id": "sensor.temperature",
+                "old_state": old_state,
+                "new_state": new_state,
+            },
+            context=new_state.context,
+        )
+        db_event = Events.from_event(event)
+
+        assert json.loads(db_event.event_data) == {
+            "entity_id": "sensor.temperature",
+            "old_state": {"state": "17"},
+        }
+
+        db_state = States.from_event(event)
+        db_state.attributes = json.dumps(dict(new_state.attributes))
+        native = db_event.to_native(db_state)
+        assert native.data["old_state"] == {"state": "17"}
+        assert native.data["new_state"] == new_state.as_dict()
+
+    def test_from_state_changed_event_to_delete_state(self):
+        """Test the removal of an entity is kept in the event data."""
+        event = ha.Event(
+            EVENT_STATE_CHANGED,
+            {"entity_id": "sensor.temperature", "old_state": None, "new_state": None},
+        )
+        native = Events.from_event(event).to_native()
+
+        assert native.data == {
+            "entity_id": "sensor.temperature",
+            "old_state": None,
+            "new_state": None,
+        }
+
 
 class TestStates(unittest.TestCase):
     """Test States model."""
@@ -60,6 +107,21 @@ class TestStates(unittest.TestCase):
         )
         assert state == States.from_event(event).to_native()
 
+    def test_from_event_with_attributes(self):
+        """Test converting event to db state with shared attributes."""
+        state = ha.State("sensor.temperature", "18", {"unit_of_measurement": "°C"})
+        event = ha.Event(
+            EVENT_STATE_CHANGED,
+            {"entity_id": "sensor.temperature", "old_state": None, "new_state": state},
+            context=state.context,
+        )
+        db_state = States.from_event(event)
+        db_state.state_attributes = StateAttributes(
+            shared_attrs=StateAttributes.shared_attrs_from_event(event)
+        )
+        assert db_state.attributes is None
+        assert state == db_state.to_native()
+
     def test_from_event_to_delete_state(self):
         """Test converting deleting state event to db state."""
         event = ha.Event(
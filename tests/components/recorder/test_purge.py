@@ -6,7 +6,7 @@ from unittest.mock import patch
 
 from homeassistant.components import recorder
 from homeassistant.components.recorder.const import DATA_INSTANCE
-from homeassistant.components.recorder.models import Events, States
+from homeassistant.components.recorder.models import Events, StateAttributes, States
 from homeassistant.components.recorder.purge import purge_old_data
 from homeassistant.components.recorder.util import session_scope
 
@@ -107,6 +107,130 @@ class TestRecorderPurge(unittest.TestCase):
             # we should only have 2 states left after purging
             assert states.count() == 2
 
+    def test_purge_old_state_attributes(self):
+        """Test deleting attributes that are only used by old states."""
+        instance = self.hass.data[DATA_INSTANCE]
+        now = datetime.now()
+        with patch(
+            "homeassistant.components.recorder.dt_util.utcnow",
+            return_value=now - timedelta(days=5),
+        ):
+            self.hass.states.set("test.purge", "old", {"name": "old"})
+            self.hass.states.set("test.shared", "old", {"name": "shared"})
+        self.hass.states.set("test.shared", "new", {"name": "shared"})
+        self.hass.states.set("test.keep", "new", {"name": "new"})
+        self.hass.block_till_done()
+        instance.block_till_done()
+
+        with session_scope(hass=self.hass) as session:
+            attributes = session.query(StateAttributes)
+            assert attributes.count() == 3
+
+            purge_old_data(instance, 4, repack=False)
+
+            assert sorted(attrs.shared_attrs for attrs in attributes) == [
+                '{"name": "new"}',
+                '{"name": "shared"}',
+            ]
+
+        # The purged attributes are stored again when they are used again
+        self.hass.states.set("test.purge", "new", {"name": "old"})
+        self.hass.block_till_done()
+        instance.block_till_done()
+
+        with session_scope(hass=self.hass) as session:
+            assert session.query(StateAttributes).count() == 3
+            state = (
+                session.query(States).filter_by(entity_id="test.purge").one()
+            ).to_native()
+            assert state.attributes == {"name": "old"}
+
+    def test_purge_in_batches(self):
+        """Test old rows are deleted in bounded batches."""
+        self._add_test_events()
+        self._add_test_states()
+        instance = self.hass.data[DATA_INSTANCE]
+
+        with patch(
+            "homeassistant.components.recorder.purge.MAX_ROWS_TO_PURGE", 2
+        ), session_scope(hass=self.hass) as session:
+            states = session.query(States)
+            events = session.query(Events).filter(Events.event_type.like("EVENT_TEST%"))
+
+            assert not purge_old_data(instance, 4, repack=False)
+            assert states.count() == 4
+            assert events.count() == 6
+
+            # The events are deleted once all old states are gone
+            assert not purge_old_data(instance, 4, repack=False)
+            assert states.count() == 2
+            assert events.count() == 6
+
+            assert not purge_old_data(instance, 4, repack=False)
+            assert events.count() == 4
+
+            assert not purge_old_data(instance, 4, repack=False)
+            assert events.count() == 2
+
+            assert purge_old_data(instance, 4, repack=False)
+            assert states.count() == 2
+            assert events.count() == 2
+
+    def test_purge_service_continues_in_batches(self):
+        """Test the purge service keeps purging until all old rows are gone."""
+        self._add_test_events()
+        self._add_test_states()
+
+        with patch("homeassistant.components.recorder.purge.MAX_ROWS_TO_PURGE", 1):
+            self.hass.services.call("recorder", "purge", {"keep_days": 4})
+            self.hass.block_till_done()
+            self.hass.data[DATA_INSTANCE].block_till_done()
+
+        with session_scope(hass=self.hass) as session:
+            assert session.query(States).count() == 2
+            assert (
+                session.query(Events)
+                .filter(Events.event_type.like("EVENT_TEST%"))
+                .count()
+                == 2
+            )
+
+    def test_purge_queued_again_after_stop(self):
+        """Test an unfinished purge does not block the queue after a stop."""
+        instance = self.hass.data[DATA_INSTANCE]
+
+        def purge_during_stop(*args):
+            """Stop the recorder while purging."""
+            instance.queue.put(None)
+            return False
+
+        with patch(
+            "homeassistant.components.recorder.purge.purge_old_data",
+            side_effect=purge_during_stop,
+        ):
+            self.hass.services.call("recorder", "purge", {"keep_days": 4})
+            self.hass.block_till_done()
+            instance.join(timeout=10)
+
+        assert not instance.is_alive()
+        # Returns once every queued task is marked done
+        instance.queue.join()
+
+    def test_repack_incrementally(self):
+        """Test SQLite databases are converted to incremental vacuuming."""
+        instance = self.hass.data[DATA_INSTANCE]
+        instance.block_till_done()
+
+        assert purge_old_data(instance, 4, repack=True)
+        assert instance.engine.execute("PRAGMA auto_vacuum").scalar() == 2
+
+        with patch("homeassistant.components.recorder.purge._LOGGER") as mock_logger:
+            assert purge_old_data(instance, 4, repack=True)
+        assert (
+            mock_logger.debug.mock_calls[-1][1][0]
+            == "Incrementally vacuuming SQL DB to free space"
+        )
+
     def test_purge_old_events(self):
         """Test deleting old events."""
         self._add_test_events()
@@ -174,6 +298,6 @@ class TestRecorderPurge(unittest.TestCase):
                 self.hass.block_till_done()
                 self.hass.data[DATA_INSTANCE].block_till_done()
                 assert (
-                    mock_logger.debug.mock_calls[3][1][0]
+                    mock_logger.debug.mock_calls[-1][1][0]
                     == "Vacuuming SQL DB to free space"
                 )
@@ -0,0 +1,118 @@
+"""The tests for the recorder statistics."""
+# pylint: disable=protected-access,redefined-outer-name
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from homeassistant.components.recorder.const import DATA_INSTANCE
+from homeassistant.components.recorder.models import Statistics
+from homeassistant.components.recorder.purge import purge_old_data
+from homeassistant.components.recorder.statistics import (
+    PERIOD_5MINUTE,
+    PERIOD_HOURLY,
+    StatisticsCompiler,
+    get_statistics,
+)
+from homeassistant.components.recorder.util import session_scope
+import homeassistant.util.dt as dt_util
+
+from tests.common import get_test_home_assistant, init_recorder_component
+
+
+@pytest.fixture
+def hass_recorder():
+    """Home Assistant fixture with in-memory recorder."""
+    hass = get_test_home_assistant()
+
+    def setup_recorder(config=None):
+        """Set up with params."""
+        init_recorder_component(hass, config)
+        hass.start()
+        hass.block_till_done()
+        hass.data[DATA_INSTANCE].block_till_done()
+        return hass
+
+    yield setup_recorder
+    hass.stop()
+
+
+def _set_states(hass, entity_id, values):
+    """Set states of an entity at the given times and wait for the recorder."""
+    for point_in_time, state in values:
+        with patch(
+            "homeassistant.components.recorder.dt_util.utcnow",
+            return_value=point_in_time,
+        ):
+            hass.states.set(entity_id, state)
+            hass.block_till_done()
+    hass.data[DATA_INSTANCE].block_till_done()
+
+
+def test_compile_statistics(hass_recorder):
+    """Test the statistics are compiled from numeric states."""
+    hass = hass_recorder()
+    start = datetime(2020, 1, 1, 10, 0, tzinfo=dt_util.UTC)
+
+    _set_states(
+        hass,
+        "sensor.power",
+        [
+            (start, "10"),
+            (start + timedelta(minutes=1), "30"),
+            (start + timedelta(minutes=2), "unavailable"),
+            (start + timedelta(minutes=6), "5"),
+        ],
+    )
+    _set_states(hass, "sensor.text", [(start, "on"), (start, "off")])
+
+    five_minute = get_statistics(hass, PERIOD_5MINUTE, start + timedelta(minutes=1))
+    assert list(five_minute) == ["sensor.power"]
+    assert [
+        (row["start"], row["min"], row["mean"], row["max"], row["last"])
+        for row in five_minute["sensor.power"]
+    ] == [(start, 10, 20, 30, 30), (start + timedelta(minutes=5), 5, 5, 5, 5)]
+
+    hourly = get_statistics(hass, PERIOD_HOURLY, start, start + timedelta(hours=1))
+    assert [
+        (row["start"], row["min"], row["mean"], row["max"], row["last"])
+        for row in hourly["sensor.power"]
+    ] == [(start, 5, 15, 30, 5)]
+
+    assert get_statistics(hass, PERIOD_HOURLY, start, entity_ids=["sensor.other"]) == {}
+
+
+def test_compile_statistics_continues_stored_period(hass_recorder):
+    """Test a new compiler continues the period stored by an earlier run."""
+    hass = hass_recorder()
+    instance = hass.data[DATA_INSTANCE]
+    start = datetime(2020, 1, 1, 10, 0, tzinfo=dt_util.UTC)
+
+    _set_states(hass, "sensor.power", [(start, "10")])
+    instance.statistics = StatisticsCompiler()
+    _set_states(hass, "sensor.power", [(start + timedelta(minutes=1), "20")])
+
+    rows = get_statistics(hass, PERIOD_5MINUTE, start)["sensor.power"]
+    assert [(row["min"], row["mean"], row["max"]) for row in rows] == [(10, 15, 20)]
+
+    with session_scope(hass=hass) as session:
+        assert session.query(Statistics).count() == 2
+
+
+def test_purge_statistics(hass_recorder):
+    """Test only the 5-minute statistics are purged."""
+    hass = hass_recorder()
+    instance = hass.data[DATA_INSTANCE]
+    now = dt_util.utcnow()
+
+    _set_states(
+        hass,
+        "sensor.power",
+        [(now - timedelta(days=11), "10"), (now - timedelta(days=5), "20")],
+    )
+
+    purge_old_data(instance, 7, repack=False)
+
+    with session_scope(hass=hass) as session:
+        assert session.query(Statistics).filter_by(period=PERIOD_5MINUTE).count() == 1
+        assert session.query(Statistics).filter_by(period=PERIOD_HOURLY).count() == 2
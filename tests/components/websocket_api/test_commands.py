@@ -199,7 +199,7 @@ async def test_get_states(hass, websocket_client):
 
     states = []
     for state in hass.states.async_all():
-        state = state.as_dict()
+        state = dict(state.as_dict())
         state["last_changed"] = state["last_changed"].isoformat()
         state["last_updated"] = state["last_updated"].isoformat()
         states.append(state)
@@ -420,6 +420,35 @@ async def test_render_template_renders_template(
     assert event == {"result": "State is: off"}
 
 
+async def test_render_template_tracks_domain(hass, websocket_client, hass_admin_user):
+    """Test a template iterating a domain is only rendered for that domain."""
+    hass.states.async_set("light.test", "on")
+
+    await websocket_client.send_json(
+        {
+            "id": 5,
+            "type": "render_template",
+            "template": "{{ states.light | selectattr('state', 'eq', 'on') | list "
+            "| count }} lights on",
+        }
+    )
+
+    msg = await websocket_client.receive_json()
+    assert msg["success"]
+
+    msg = await websocket_client.receive_json()
+    assert msg["event"] == {"result": "1 lights on"}
+
+    # Neither other domains nor unchanged results are sent
+    hass.states.async_set("switch.test", "on")
+    hass.states.async_set("light.test", "on", {"brightness": 100})
+    hass.states.async_set("light.test2", "on")
+
+    msg = await websocket_client.receive_json()
+    assert msg["id"] == 5
+    assert msg["event"] == {"result": "2 lights on"}
+
+
 async def test_render_template_with_manual_entity_ids(
     hass, websocket_client, hass_admin_user
 ):
@@ -467,3 +496,93 @@ async def test_render_template_returns_with_match_all(
     assert msg["id"] == 5
     assert msg["type"] == const.TYPE_RESULT
     assert msg["success"]
+
+
+async def test_subscribe_entities(hass, websocket_client):
+    """Test subscribe entities sends initial states and state diffs."""
+    hass.states.async_set("light.kitchen", "off", {"friendly_name": "Kitchen"})
+    hass.states.async_set("light.other", "off")
+    hass.states.async_set("sensor.temperature", "20", {"unit_of_measurement": "°C"})
+
+    await websocket_client.send_json(
+        {
+            "id": 5,
+            "type": "subscribe_entities",
+            "entity_ids": ["light.kitchen"],
+            "domains": ["sensor"],
+        }
+    )
+
+    msg = await websocket_client.receive_json()
+    assert msg["id"] == 5
+    assert msg["type"] == const.TYPE_RESULT
+    assert msg["success"]
+
+    msg = await websocket_client.receive_json()
+    assert msg["id"] == 5
+    assert msg["type"] == "event"
+    assert sorted(msg["event"]["added"]) == ["light.kitchen", "sensor.temperature"]
+    assert msg["event"]["added"]["light.kitchen"]["state"] == "off"
+
+    hass.states.async_set("light.other", "on")
+    hass.states.async_set(
+        "light.kitchen", "on", {"friendly_name": "Kitchen", "brightness": 100}
+    )
+
+    with timeout(3):
+        msg = await websocket_client.receive_json()
+
+    assert msg["id"] == 5
+    diff = msg["event"]["changed"]["light.kitchen"]
+    assert diff["state"] == "on"
+    assert diff["attributes"] == {"brightness": 100}
+    assert "attributes_removed" not in diff
+    assert diff["last_changed"] == diff["last_updated"]
+
+    hass.states.async_set("sensor.temperature", "20")
+
+    with timeout(3):
+        msg = await websocket_client.receive_json()
+
+    diff = msg["event"]["changed"]["sensor.temperature"]
+    assert "state" not in diff
+    assert "attributes" not in diff
+    assert diff["attributes_removed"] == ["unit_of_measurement"]
+
+    hass.states.async_set("sensor.humidity", "50")
+    hass.states.async_remove("light.kitchen")
+
+    with timeout(3):
+        msg = await websocket_client.receive_json()
+    assert msg["event"]["added"]["sensor.humidity"]["state"] == "50"
+
+    with timeout(3):
+        msg = await websocket_client.receive_json()
+    assert msg["event"] == {"removed": ["light.kitchen"]}
+
+
+async def test_subscribe_entities_filters_permissions(
+    hass, websocket_client, hass_admin_user
+):
+    """Test subscribe entities only sends entities the user can read."""
+    hass_admin_user.groups = []
+    hass_admin_user.mock_policy({"entities": {"entity_ids": {"light.kitchen": True}}})
+    hass.states.async_set("light.kitchen", "off")
+    hass.states.async_set("light.other", "off")
+
+    await websocket_client.send_json(
+        {"id": 5, "type": "subscribe_entities", "domains": "light"}
+    )
+
+    msg = await websocket_client.receive_json()
+    assert msg["success"]
+
+    msg = await websocket_client.receive_json()
+    assert list(msg["event"]["added"]) == ["light.kitchen"]
+
+    hass.states.async_set("light.other", "on")
+    hass.states.async_set("light.kitchen", "on")
+
+    with timeout(3):
+        msg = await websocket_client.receive_json()
+    assert list(msg["event"]["changed"]) == ["light.kitchen"]
@@ -0,0 +1,36 @@
+"""Test WebSocket API messages module."""
+import json
+from unittest.mock import patch
+
+from homeassistant.components.websocket_api import const, messages
+from homeassistant.core import Event, State
+
+
+def test_cached_event_message():
+    """Test events are serialized once for all subscriptions."""
+    event = Event(
+        "state_changed",
+        {"entity_id": "light.kitchen", "new_state": State("light.kitchen", "on")},
+    )
+
+    with patch(
+        "homeassistant.components.websocket_api.messages.const.JSON_DUMP",
+        side_effect=const.JSON_DUMP,
+    ) as mock_dump:
+        first = messages.cached_event_message(1, event)
+        second = messages.cached_event_message(2, event)
+
+    assert mock_dump.call_count == 1
+
+    assert json.loads(first) == json.loads(
+        const.JSON_DUMP(messages.event_message(1, event))
+    )
+    assert json.loads(second)["id"] == 2
+    assert json.loads(second)["event"] == json.loads(first)["event"]
+
+
+def test_cached_event_message_not_serializable():
+    """Test an event message is returned if the event can't be serialized."""
+    event = Event("test_event", {"value": float("nan")})
+
+    assert messages.cached_event_message(1, event) == messages.event_message(1, event)
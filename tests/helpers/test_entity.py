@@ -661,3 +661,77 @@ async def test_capability_attrs(hass):
     assert state is not None
     assert state.state == STATE_UNAVAILABLE
     assert state.attributes["always"] == "there"
+
+
+class CachedEntity(entity.Entity):
+    """Entity that caches its static attributes."""
+
+    cache_static_attributes = True
+    entity_id = "hello.world"
+
+    def __init__(self):
+        """Initialize the entity."""
+        self._state = "on"
+        self._icon = "mdi:one"
+        self.icon_reads = 0
+
+    @property
+    def state(self):
+        """Return the state."""
+        return self._state
+
+    @property
+    def icon(self):
+        """Return the icon."""
+        self.icon_reads += 1
+        return self._icon
+
+
+async def test_cache_static_attributes(hass):
+    """Test unchanged states of entities with cached attributes are skipped."""
+    ent = CachedEntity()
+    ent.hass = hass
+    ent.platform = MagicMock(noop_state_writes=0)
+
+    ent.async_write_ha_state()
+    state = hass.states.get("hello.world")
+    assert state.state == "on"
+    assert state.attributes["icon"] == "mdi:one"
+
+    ent.async_write_ha_state()
+    assert hass.states.get("hello.world") is state
+    assert ent.platform.noop_state_writes == 1
+
+    ent._state = "off"
+    ent._icon = "mdi:two"
+    ent.async_write_ha_state()
+    assert hass.states.get("hello.world").state == "off"
+    assert hass.states.get("hello.world").attributes["icon"] == "mdi:one"
+    assert ent.icon_reads == 1
+
+    ent.async_invalidate_static_attributes()
+    ent.async_write_ha_state()
+    assert hass.states.get("hello.world").attributes["icon"] == "mdi:two"
+    assert ent.platform.noop_state_writes == 1
+
+    # A state set by someone else is overwritten
+    hass.states.async_set("hello.world", "on")
+    ent.async_write_ha_state()
+    assert hass.states.get("hello.world").state == "off"
+    assert ent.platform.noop_state_writes == 1
+
+
+async def test_count_noop_writes(hass):
+    """Test writes that change nothing are counted for uncached entities."""
+    ent = entity.Entity()
+    ent.hass = hass
+    ent.entity_id = "hello.world"
+    ent.platform = MagicMock(noop_state_writes=0)
+
+    ent.async_write_ha_state()
+    ent.async_write_ha_state()
+    assert ent.platform.noop_state_writes == 1
+
+    with patch.object(entity.Entity, "force_update", PropertyMock(return_value=True)):
+        ent.async_write_ha_state()
+    assert ent.platform.noop_state_writes == 1
@@ -8,11 +8,12 @@ from astral import Astral
 import pytest
 
 from homeassistant.components import sun
-from homeassistant.const import MATCH_ALL
+from homeassistant.const import EVENT_STATE_CHANGED, MATCH_ALL
 import homeassistant.core as ha
 from homeassistant.core import callback
 from homeassistant.helpers.event import (
     async_call_later,
+    async_state_change_tracker_info,
     async_track_point_in_time,
     async_track_point_in_utc_time,
     async_track_same_state,
@@ -20,6 +21,7 @@ from homeassistant.helpers.event import (
     async_track_sunrise,
     async_track_sunset,
     async_track_template,
+    async_track_template_result,
     async_track_time_change,
     async_track_time_interval,
     async_track_utc_time_change,
@@ -233,6 +235,79 @@ async def test_track_template(hass):
     assert len(wildercard_runs) == 2
 
 
+async def test_track_template_result(hass):
+    """Test tracking the entities a template reads."""
+    runs = []
+    template = Template("{{ states('sensor.test') | int + 1 }}", hass)
+
+    @ha.callback
+    def refresh_listener(event, updated_template, last_result, result):
+        runs.append((event.data["entity_id"], last_result, result))
+
+    hass.states.async_set("sensor.test", "1")
+    info = async_track_template_result(hass, template, refresh_listener)
+    assert info.last_result == "2"
+    assert async_state_change_tracker_info(hass)["entities"] == 1
+
+    hass.states.async_set("sensor.other", "10")
+    await hass.async_block_till_done()
+    assert runs == []
+
+    hass.states.async_set("sensor.test", "5")
+    await hass.async_block_till_done()
+    assert runs == [("sensor.test", "2", "6")]
+
+    info.async_remove()
+    hass.states.async_set("sensor.test", "6")
+    await hass.async_block_till_done()
+    assert len(runs) == 1
+    assert EVENT_STATE_CHANGED not in hass.bus.async_listeners()
+
+
+async def test_track_template_result_updates_tracked_states(hass):
+    """Test the tracked states follow what the last render read."""
+    runs = []
+    template = Template(
+        "{% if is_state('input_boolean.all', 'on') %}"
+        "{{ states | count }}"
+        "{% elif is_state('input_boolean.domain', 'on') %}"
+        "{{ states.light | count }}"
+        "{% else %}{{ states('sensor.test') }}{% endif %}",
+        hass,
+    )
+
+    @ha.callback
+    def refresh_listener(event, updated_template, last_result, result):
+        runs.append(result)
+
+    hass.states.async_set("sensor.test", "1")
+    async_track_template_result(hass, template, refresh_listener)
+
+    # Domains are only tracked while iterated
+    hass.states.async_set("light.one", "on")
+    await hass.async_block_till_done()
+    assert runs == []
+
+    hass.states.async_set("input_boolean.domain", "on")
+    await hass.async_block_till_done()
+    assert runs == ["1"]
+    assert async_state_change_tracker_info(hass)["domains"] == 1
+
+    hass.states.async_set("light.two", "on")
+    hass.states.async_set("sensor.test", "2")
+    await hass.async_block_till_done()
+    assert runs == ["1", "2"]
+
+    hass.states.async_set("input_boolean.all", "on")
+    await hass.async_block_till_done()
+    assert runs == ["1", "2", "5"]
+    assert async_state_change_tracker_info(hass)["wildcard"] == 1
+
+    hass.states.async_set("switch.new", "on")
+    await hass.async_block_till_done()
+    assert runs == ["1", "2", "5", "6"]
+
+
 async def test_track_same_state_simple_trigger(hass):
     """Test track_same_change with trigger simple."""
     thread_runs = []
@@ -835,3 +910,46 @@ async def test_async_call_later(hass):
     assert p_action is action
     assert p_point == now + timedelta(seconds=3)
     assert remove is mock()
+
+
+async def test_track_state_change_index(hass):
+    """Test state change trackers are indexed by entity id."""
+    runs = []
+
+    unsub_light = async_track_state_change(
+        hass, ["light.Bowl", "light.bowl"], lambda *args: runs.append("light")
+    )
+    unsub_all = async_track_state_change(
+        hass, MATCH_ALL, lambda *args: runs.append("all")
+    )
+    unsub_switch = async_track_state_change(
+        hass, "switch.fan", lambda *args: runs.append("switch")
+    )
+
+    assert async_state_change_tracker_info(hass) == {
+        "indexed": 2,
+        "wildcard": 1,
+        "entities": 2,
+        "domains": 0,
+    }
+    assert hass.bus.async_listeners()[EVENT_STATE_CHANGED] == 1
+
+    hass.states.async_set("light.bowl", "on")
+    await hass.async_block_till_done()
+    assert runs == ["light", "all"]
+
+    hass.states.async_set("sensor.other", "on")
+    await hass.async_block_till_done()
+    assert runs == ["light", "all", "all"]
+
+    unsub_light()
+    unsub_all()
+    unsub_switch()
+
+    assert async_state_change_tracker_info(hass) == {
+        "indexed": 0,
+        "wildcard": 0,
+        "entities": 0,
+        "domains": 0,
+    }
+    assert EVENT_STATE_CHANGED not in hass.bus.async_listeners()
@@ -1,5 +1,5 @@
 """The tests for the Restore component."""
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from asynctest import patch
 
@@ -9,6 +9,7 @@ from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.entity import Entity
 from homeassistant.helpers.restore_state import (
     DATA_RESTORE_STATE_TASK,
+    JOURNAL_SUFFIX,
     STORAGE_KEY,
     RestoreEntity,
     RestoreStateData,
@@ -270,3 +271,93 @@ async def test_restoring_invalid_entity_id(hass, hass_storage):
 
     state = await entity.async_get_last_state()
     assert state is None
+
+
+async def test_dump_changed_states(hass, hass_storage):
+    """Test only the changed states are appended to the journal."""
+    hass.state = CoreState.not_running
+    data = await RestoreStateData.async_get_instance(hass)
+
+    for entity_id in ("input_boolean.b1", "input_boolean.b2"):
+        entity = RestoreEntity()
+        entity.hass = hass
+        entity.entity_id = entity_id
+        await entity.async_internal_added_to_hass()
+        hass.states.async_set(entity_id, "on")
+
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_START)
+    await hass.async_block_till_done()
+
+    assert len(hass_storage[STORAGE_KEY]["data"]) == 2
+    assert STORAGE_KEY + JOURNAL_SUFFIX not in hass_storage
+
+    hass.states.async_set("input_boolean.b1", "off")
+    hass.states.async_set("input_boolean.other", "off")
+    await hass.async_block_till_done()
+    await data.async_dump_changed_states()
+
+    journal = hass_storage[STORAGE_KEY + JOURNAL_SUFFIX]
+    assert [item["state"]["entity_id"] for item in journal] == ["input_boolean.b1"]
+    assert journal[0]["state"]["state"] == "off"
+
+    # Nothing changed since the last dump
+    await data.async_dump_changed_states()
+    assert len(hass_storage[STORAGE_KEY + JOURNAL_SUFFIX]) == 1
+
+    # Removed entities are journaled with their last state
+    await entity.async_remove()
+    await data.async_dump_changed_states()
+    journal = hass_storage[STORAGE_KEY + JOURNAL_SUFFIX]
+    assert [item["state"]["entity_id"] for item in journal] == [
+        "input_boolean.b1",
+        "input_boolean.b2",
+    ]
+
+    # A full dump replaces the journal
+    hass.states.async_set("input_boolean.b1", "on")
+    await hass.async_block_till_done()
+    with patch("homeassistant.helpers.restore_state.JOURNAL_MIN_COMPACT_LINES", 2):
+        await data.async_dump_changed_states()
+
+    assert STORAGE_KEY + JOURNAL_SUFFIX not in hass_storage
+    assert [
+        (item["state"]["entity_id"], item["state"]["state"])
+        for item in hass_storage[STORAGE_KEY]["data"]
+    ] == [("input_boolean.b1", "on"), ("input_boolean.b2", "on")]
+
+
+async def test_load_journal(hass, hass_storage):
+    """Test the journal is applied on top of the last full dump."""
+    dumped = dt_util.utcnow()
+    hass_storage[STORAGE_KEY] = {
+        "version": 1,
+        "key": STORAGE_KEY,
+        "data": [
+            StoredState(State("input_boolean.b1", "on"), dumped).as_dict(),
+            StoredState(State("input_boolean.b2", "on"), dumped).as_dict(),
+        ],
+    }
+    hass_storage[STORAGE_KEY + JOURNAL_SUFFIX] = [
+        # Older than the full dump
+        StoredState(
+            State("input_boolean.b1", "off"), dumped - timedelta(minutes=1)
+        ).as_dict(),
+        StoredState(
+            State("input_boolean.b2", "off"), dumped + timedelta(minutes=1)
+        ).as_dict(),
+        StoredState(
+            State("input_boolean.b3", "off"), dumped + timedelta(minutes=1)
+        ).as_dict(),
+    ]
+
+    hass.state = CoreState.not_running
+    data = await RestoreStateData.async_get_instance(hass)
+
+    assert {
+        entity_id: stored_state.state.state
+        for entity_id, stored_state in data.last_states.items()
+    } == {
+        "input_boolean.b1": "on",
+        "input_boolean.b2": "off",
+        "input_boolean.b3": "off",
+    }
@@ -692,6 +692,19 @@ def test_render_with_possible_json_value_with_invalid_json(hass):
     assert tpl.async_render_with_possible_json_value("{ I AM NOT JSON }") == ""
 
 
+def test_render_with_possible_json_value_with_decoded_json(hass):
+    """Render with possible JSON value that was already decoded."""
+    tpl = template.Template("{{ value_json.hello }}", hass)
+    with patch("homeassistant.helpers.template.json.loads") as loads:
+        assert (
+            tpl.async_render_with_possible_json_value(
+                '{"hello": "world"}', variables={"value_json": {"hello": "there"}}
+            )
+            == "there"
+        )
+    assert not loads.called
+
+
 def test_render_with_possible_json_value_with_template_error_value(hass):
     """Render with possible JSON value with template error value."""
     tpl = template.Template("{{ non_existing.variable }}", hass)
@@ -1803,3 +1816,38 @@ def test_render_complex_handling_non_template_values(hass):
     assert template.render_complex(
         {True: 1, False: template.Template("{{ hello }}", hass)}, {"hello": 2}
     ) == {True: 1, False: "2"}
+
+
+def test_compiled_code_is_cached(hass):
+    """Test templates with the same source share the compiled code."""
+    env = template.TemplateEnvironment(hass)
+    hass.data[template._ENVIRONMENT] = env
+    source = "{{ value_json.temperature }}"
+
+    first = template.Template(source, hass)
+    second = template.Template(source, hass)
+    assert first.async_render_with_possible_json_value('{"temperature": 21}') == "21"
+    assert second.async_render_with_possible_json_value('{"temperature": 22}') == "22"
+
+    assert first._compiled_code is second._compiled_code
+    assert env.compiled_cache_misses == 1
+    assert env.compiled_cache_hits == 1
+
+    with pytest.raises(TemplateError):
+        template.Template("{{ invalid", hass).ensure_valid()
+    assert env.compiled_cache_misses == 1
+
+
+def test_compiled_code_cache_evicts_least_recently_used(hass):
+    """Test the compiled code cache is limited in size."""
+    env = template.TemplateEnvironment(hass)
+
+    with patch("homeassistant.helpers.template.COMPILED_CACHE_SIZE", 2):
+        env.compile("{{ 1 }}")
+        env.compile("{{ 2 }}")
+        env.compile("{{ 1 }}")
+        env.compile("{{ 3 }}")
+
+    assert list(env._compiled_cache) == ["{{ 1 }}", "{{ 3 }}"]
+    assert env.compiled_cache_hits == 1
+    assert env.compiled_cache_misses == 3
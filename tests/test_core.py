@@ -3,6 +3,7 @@
 import asyncio
 from datetime import datetime, timedelta
 import functools
+import json
 import logging
 import os
 from tempfile import TemporaryDirectory
@@ -31,6 +32,7 @@ from homeassistant.const import (
 )
 import homeassistant.core as ha
 from homeassistant.exceptions import InvalidEntityFormatError, InvalidStateError
+from homeassistant.helpers.json import JSONEncoder
 import homeassistant.util.dt as dt_util
 from homeassistant.util.unit_system import METRIC_SYSTEM
 
@@ -44,6 +46,15 @@ def test_split_entity_id():
     assert ha.split_entity_id("domain.object_id") == ["domain", "object_id"]
 
 
+def test_valid_entity_id_is_cached():
+    """Test the validation results of entity ids are cached."""
+    ha.valid_entity_id.cache_clear()
+    assert ha.valid_entity_id("light.kitchen")
+    assert not ha.valid_entity_id("Light.Kitchen")
+    assert ha.valid_entity_id("light.kitchen")
+    assert ha.valid_entity_id.cache_info().hits == 1
+
+
 def test_async_add_job_schedule_callback():
     """Test that we schedule coroutines and add jobs to the job pool."""
     hass = MagicMock()
@@ -510,6 +521,23 @@ def test_state_dict_conversion():
     assert state == ha.State.from_dict(state.as_dict())
 
 
+def test_state_as_dict_is_cached():
+    """Test the dict and JSON of a state are created once and are read only."""
+    state = ha.State("domain.hello", "world", {"some": "attr"})
+    as_dict = state.as_dict()
+    assert state.as_dict() is as_dict
+
+    with pytest.raises(RuntimeError):
+        as_dict["state"] = "moon"
+    with pytest.raises(RuntimeError):
+        as_dict["attributes"]["some"] = "other"
+    assert dict(as_dict) == as_dict
+
+    as_json = state.as_json()
+    assert state.as_json() is as_json
+    assert json.loads(as_json) == json.loads(json.dumps(as_dict, cls=JSONEncoder))
+
+
 def test_state_dict_conversion_with_wrong_data():
     """Test conversion with wrong data."""
     assert ha.State.from_dict(None) is None
@@ -1180,3 +1208,97 @@ def test_context():
     assert c.user_id == 23
     assert c.parent_id == 100
     assert c.id is not None
+
+
+async def test_timer_scheduler(hass):
+    """Test the timer scheduler runs callbacks once they are due."""
+    runs = []
+    now = dt_util.utcnow()
+
+    hass.scheduler.async_schedule(now + timedelta(seconds=2), runs.append)
+    hass.scheduler.async_schedule(now + timedelta(seconds=1), runs.append)
+    handle = hass.scheduler.async_schedule(now + timedelta(seconds=1), runs.append)
+    handle.cancel()
+
+    assert len(hass.scheduler) == 2
+    assert hass.bus.async_listeners()[EVENT_TIME_CHANGED] == 1
+
+    hass.bus.async_fire(EVENT_TIME_CHANGED, {ATTR_NOW: now})
+    await hass.async_block_till_done()
+    assert runs == []
+
+    hass.bus.async_fire(EVENT_TIME_CHANGED, {ATTR_NOW: now + timedelta(seconds=3)})
+    await hass.async_block_till_done()
+    assert runs == [now + timedelta(seconds=3), now + timedelta(seconds=3)]
+
+    assert len(hass.scheduler) == 0
+    assert EVENT_TIME_CHANGED not in hass.bus.async_listeners()
+
+
+async def test_timer_scheduler_defers_callbacks_added_during_tick(hass):
+    """Test callbacks scheduled while handling a tick wait for the next one."""
+    runs = []
+    now = dt_util.utcnow()
+
+    @ha.callback
+    def reschedule(when):
+        """Schedule another callback that is already due."""
+        runs.append("first")
+        hass.scheduler.async_schedule(now, lambda when: runs.append("second"))
+
+    hass.scheduler.async_schedule(now, reschedule)
+
+    hass.bus.async_fire(EVENT_TIME_CHANGED, {ATTR_NOW: now})
+    await hass.async_block_till_done()
+    assert runs == ["first"]
+
+    hass.bus.async_fire(EVENT_TIME_CHANGED, {ATTR_NOW: now})
+    await hass.async_block_till_done()
+    assert runs == ["first", "second"]
+
+
+async def test_timer_scheduler_clock_rollback(hass):
+    """Test rollback actions are called when the clock jumps backwards."""
+    runs = []
+    rollbacks = []
+    now = dt_util.utcnow()
+
+    hass.scheduler.async_schedule(now + timedelta(hours=1), runs.append)
+    hass.scheduler.async_schedule(
+        now + timedelta(hours=1), runs.append, rollbacks.append
+    )
+
+    hass.bus.async_fire(EVENT_TIME_CHANGED, {ATTR_NOW: now})
+    await hass.async_block_till_done()
+    hass.bus.async_fire(EVENT_TIME_CHANGED, {ATTR_NOW: now - timedelta(hours=2)})
+    await hass.async_block_till_done()
+
+    assert runs == []
+    assert rollbacks == [now - timedelta(hours=2)]
+    assert len(hass.scheduler) == 1
+
+
+def test_hass_job_type():
+    """Test the job type of a HassJob is determined once."""
+
+    @ha.callback
+    def callback_func():
+        """Run a callback."""
+
+    async def coro_func():
+        """Run a coroutine function."""
+
+    def executor_func():
+        """Run in the executor."""
+
+    assert ha.HassJob(callback_func).job_type == ha.HassJobType.Callback
+    assert (
+        ha.HassJob(functools.partial(callback_func)).job_type == ha.HassJobType.Callback
+    )
+    assert ha.HassJob(coro_func).job_type == ha.HassJobType.Coroutinefunction
+    assert ha.HassJob(executor_func).job_type == ha.HassJobType.Executor
+
+    coro = coro_func()
+    with pytest.raises(ValueError):
+        ha.HassJob(coro)
+    coro.close()
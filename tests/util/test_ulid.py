@@ -0,0 +1,18 @@
+"""Test the ULID-like identifiers."""
+from unittest.mock import patch
+
+from homeassistant.util.ulid import ulid_hex
+
+
+def test_ulid_hex():
+    """Test the identifiers are unique hex strings sorted by time."""
+    with patch("homeassistant.util.ulid.time.time", return_value=1000.0):
+        first = ulid_hex()
+    with patch("homeassistant.util.ulid.time.time", return_value=1000.001):
+        second = ulid_hex()
+
+    assert len(first) == 32
+    int(first, 16)
+    assert first[:12] == "0000000f4240"
+    assert first < second
+    assert ulid_hex() != ulid_hex()